@@ -0,0 +1,136 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Таблицы могли быть уже созданы ботом через init_database(),
+    # поэтому создаем только отсутствующие
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("telegram_id", sa.BigInteger(), nullable=False),
+            sa.Column("username", sa.String(length=255), nullable=True),
+            sa.Column("first_name", sa.String(length=255), nullable=True),
+            sa.Column("last_name", sa.String(length=255), nullable=True),
+            sa.Column("phone", sa.String(length=20), nullable=True),
+            sa.Column("is_admin", sa.Boolean(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_telegram_id", "users", ["telegram_id"], unique=True)
+
+    if "categories" not in existing:
+        op.create_table(
+            "categories",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=255), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("image_url", sa.String(length=500), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("sort_order", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_categories_id", "categories", ["id"])
+
+    if "dishes" not in existing:
+        op.create_table(
+            "dishes",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=255), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("image_url", sa.String(length=500), nullable=True),
+            sa.Column("telegram_post_url", sa.String(length=500), nullable=True),
+            sa.Column("category_id", sa.Integer(), nullable=False),
+            sa.Column("is_available", sa.Boolean(), nullable=True),
+            sa.Column("sort_order", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["category_id"], ["categories.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_dishes_id", "dishes", ["id"])
+
+    if "orders" not in existing:
+        op.create_table(
+            "orders",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("total_amount", sa.Float(), nullable=True),
+            sa.Column("status", sa.String(length=50), nullable=True),
+            sa.Column("payment_method", sa.String(length=20), nullable=True),
+            sa.Column("payment_screenshot", sa.String(length=500), nullable=True),
+            sa.Column("payment_photo_file_id", sa.String(length=500), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("custom_name", sa.String(length=255), nullable=True),
+            sa.Column("delivery_date", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.Column("completed_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_orders_id", "orders", ["id"])
+
+    if "order_items" not in existing:
+        op.create_table(
+            "order_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=False),
+            sa.Column("dish_id", sa.Integer(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["dish_id"], ["dishes.id"]),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_order_items_id", "order_items", ["id"])
+
+    if "payments" not in existing:
+        op.create_table(
+            "payments",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("payment_method", sa.String(length=50), nullable=True),
+            sa.Column("status", sa.String(length=50), nullable=True),
+            sa.Column("screenshot_url", sa.String(length=500), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("confirmed_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_payments_id", "payments", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("payments")
+    op.drop_table("order_items")
+    op.drop_table("orders")
+    op.drop_table("dishes")
+    op.drop_table("categories")
+    op.drop_table("users")
@@ -0,0 +1,43 @@
+"""unique (order_id, dish_id) in order_items
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Склеиваем возможные дубли позиций (одно блюдо дважды в одном заказе),
+    # иначе уникальный индекс не создастся
+    op.execute(
+        "UPDATE order_items SET quantity = ("
+        "    SELECT SUM(dup.quantity) FROM order_items dup"
+        "    WHERE dup.order_id = order_items.order_id AND dup.dish_id = order_items.dish_id"
+        ") WHERE id IN ("
+        "    SELECT MIN(id) FROM order_items GROUP BY order_id, dish_id HAVING COUNT(*) > 1"
+        ")"
+    )
+    op.execute(
+        "DELETE FROM order_items WHERE id NOT IN ("
+        "    SELECT MIN(id) FROM order_items GROUP BY order_id, dish_id"
+        ")"
+    )
+
+    # Нужен для upsert позиций корзины: INSERT ... ON CONFLICT (order_id, dish_id)
+    op.create_index(
+        "uq_order_items_order_dish", "order_items", ["order_id", "dish_id"],
+        unique=True, if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_order_items_order_dish", table_name="order_items")
@@ -0,0 +1,32 @@
+"""keyset pagination indexes for orders
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Постраничный просмотр заказов в админке: WHERE status = ? ORDER BY created_at, id
+    op.create_index(
+        "ix_orders_status_created_at_id", "orders", ["status", "created_at", "id"],
+        if_not_exists=True
+    )
+    op.create_index(
+        "ix_orders_created_at_id", "orders", ["created_at", "id"],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_created_at_id", table_name="orders")
+    op.drop_index("ix_orders_status_created_at_id", table_name="orders")
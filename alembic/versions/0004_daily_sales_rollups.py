@@ -0,0 +1,48 @@
+"""daily sales rollup tables
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # После миграции заполните сводки по истории: python backfill_sales_stats.py
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "daily_sales" not in existing:
+        op.create_table(
+            "daily_sales",
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("status", sa.String(length=50), nullable=False),
+            sa.Column("orders_count", sa.Integer(), nullable=False),
+            sa.Column("total_amount", sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint("day", "status"),
+        )
+
+    if "daily_dish_sales" not in existing:
+        op.create_table(
+            "daily_dish_sales",
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("dish_id", sa.Integer(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("revenue", sa.Float(), nullable=False),
+            sa.Column("orders_count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["dish_id"], ["dishes.id"]),
+            sa.PrimaryKeyConstraint("day", "dish_id"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_dish_sales")
+    op.drop_table("daily_sales")
@@ -0,0 +1,38 @@
+"""indexes for order and cart hot paths
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Корзина пользователя и его заказы
+    op.create_index(
+        "ix_orders_user_id_status", "orders", ["user_id", "status"],
+        if_not_exists=True
+    )
+    op.create_index(
+        "ix_orders_user_id_created_at", "orders", ["user_id", "created_at"],
+        if_not_exists=True
+    )
+    # order_items(order_id) уже покрыт уникальным индексом (order_id, dish_id)
+    op.create_index(
+        "ix_order_items_dish_id", "order_items", ["dish_id"],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_items_dish_id", table_name="order_items")
+    op.drop_index("ix_orders_user_id_created_at", table_name="orders")
+    op.drop_index("ix_orders_user_id_status", table_name="orders")
@@ -0,0 +1,34 @@
+"""persistent fsm storage table
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "fsm_states" not in existing:
+        op.create_table(
+            "fsm_states",
+            sa.Column("key", sa.String(length=255), nullable=False),
+            sa.Column("state", sa.String(length=255), nullable=True),
+            sa.Column("data", sa.Text(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("key"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("fsm_states")
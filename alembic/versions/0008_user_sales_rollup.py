@@ -0,0 +1,35 @@
+"""user sales rollup table
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # После миграции заполните сводку по истории: python backfill_sales_stats.py
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "user_sales" not in existing:
+        op.create_table(
+            "user_sales",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("orders_count", sa.Integer(), nullable=False),
+            sa.Column("total_spent", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("user_id"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("user_sales")
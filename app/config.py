@@ -14,6 +14,21 @@ class Settings:
         self.bot_token: str = os.getenv("BOT_TOKEN", "")
         self.database_url: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:////app/data/bot.db")
         
+        # Пул соединений PostgreSQL (postgresql+asyncpg://...)
+        self.db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+        self.db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        self.db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+        self.db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # секунды
+        self.db_statement_cache_size: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # 0 - для pgbouncer
+        
+        # Профиль SQLite (для других СУБД не используется)
+        self.sqlite_wal: bool = os.getenv("SQLITE_WAL", "true").lower() == "true"
+        self.sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        self.sqlite_cache_size_mb: int = int(os.getenv("SQLITE_CACHE_SIZE_MB", "32"))  # на соединение
+        self.sqlite_mmap_size_mb: int = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+        self.sqlite_pool_size: int = int(os.getenv("SQLITE_POOL_SIZE", "5"))
+        self.sqlite_single_writer: bool = os.getenv("SQLITE_SINGLE_WRITER", "true").lower() == "true"
+        
         # Приветственное сообщение
         self.welcome_message: str = os.getenv(
             "WELCOME_MESSAGE",
@@ -40,8 +55,31 @@ class Settings:
             "Переведите сумму и отправьте скриншот. В комментариях при оплате напишите Имя и Фамилию"
         )
         
+        # Режим работы: polling (getUpdates) или webhook (aiohttp-сервер)
+        self.bot_mode: str = os.getenv("BOT_MODE", "polling").lower()
+        self.webhook_url: str = os.getenv("WEBHOOK_URL", "")  # публичный адрес, например https://bot.example.com
+        self.webhook_path: str = os.getenv("WEBHOOK_PATH", "/webhook")
+        self.webhook_secret: str = os.getenv("WEBHOOK_SECRET", "")
+        self.webapp_host: str = os.getenv("WEBAPP_HOST", "0.0.0.0")
+        self.webapp_port: int = int(os.getenv("WEBAPP_PORT", "8080"))
+        self.webhook_drain_timeout: float = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "30"))  # секунды
+        # Сбросить очередь апдейтов при регистрации webhook (теряются апдейты, не принятые при остановке)
+        self.webhook_drop_pending_updates: bool = os.getenv("WEBHOOK_DROP_PENDING_UPDATES", "false").lower() == "true"
+        
         # Настройки уведомлений
         self.notification_chat_id: int = int(os.getenv("NOTIFICATION_CHAT_ID", "0"))
+        self.notify_concurrency: int = int(os.getenv("NOTIFY_CONCURRENCY", "10"))  # одновременных отправок
+        self.notify_global_rate: float = float(os.getenv("NOTIFY_GLOBAL_RATE", "30"))  # сообщений в секунду на бота
+        self.notify_chat_rate: float = float(os.getenv("NOTIFY_CHAT_RATE", "1"))  # сообщений в секунду в один чат
+        self.notify_chat_burst: float = float(os.getenv("NOTIFY_CHAT_BURST", "3"))
+        self.notify_max_retries: int = int(os.getenv("NOTIFY_MAX_RETRIES", "3"))  # повторов после flood wait
+        
+        # Очередь уведомлений (outbox)
+        self.outbox_workers: int = int(os.getenv("OUTBOX_WORKERS", "4"))
+        self.outbox_batch_size: int = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+        self.outbox_poll_interval: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))  # секунды
+        self.outbox_max_attempts: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+        self.outbox_keep_days: int = int(os.getenv("OUTBOX_KEEP_DAYS", "7"))  # хранить отправленные, дней
         
         # Настройки каналов и ссылок
         self.telegram_channel_url: str = os.getenv("TELEGRAM_CHANNEL_URL", "")
@@ -50,6 +88,12 @@ class Settings:
         self.upload_path: str = os.getenv("UPLOAD_PATH", "./uploads")
         self.max_file_size: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
         
+        # Хранилище скриншотов оплаты
+        self.screenshot_retention_days: int = int(os.getenv("SCREENSHOT_RETENTION_DAYS", "90"))
+        self.screenshot_max_disk_mb: int = int(os.getenv("SCREENSHOT_MAX_DISK_MB", "1024"))
+        self.screenshot_thumb_size: int = int(os.getenv("SCREENSHOT_THUMB_SIZE", "320"))  # пикселей по большей стороне
+        self.screenshot_sweep_interval_hours: float = float(os.getenv("SCREENSHOT_SWEEP_INTERVAL_HOURS", "6"))
+        
         # Настройки заказов
         self.min_order_amount: float = float(os.getenv("MIN_ORDER_AMOUNT", "500.0"))
         self.max_dish_quantity: int = int(os.getenv("MAX_DISH_QUANTITY", "50"))
@@ -59,6 +103,34 @@ class Settings:
         if delivery_days_str:
             self.delivery_days = [int(x.strip()) for x in delivery_days_str.split(",") if x.strip()]
             
+        # Настройки кэша пользователей
+        self.user_cache_size: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+        self.user_cache_ttl: float = float(os.getenv("USER_CACHE_TTL", "600"))  # секунды
+        self.user_cache_flush_interval: float = float(os.getenv("USER_CACHE_FLUSH_INTERVAL", "5"))  # секунды
+        
+        # Метрики обработчиков (/perf и выгрузка в формате Prometheus)
+        self.perf_window: int = int(os.getenv("PERF_WINDOW", "1024"))  # последних замеров на обработчик
+        self.perf_metrics_file: str = os.getenv("PERF_METRICS_FILE", "")  # пусто - не писать
+        self.perf_metrics_port: int = int(os.getenv("PERF_METRICS_PORT", "0"))  # 0 - не поднимать HTTP
+        self.perf_metrics_interval: float = float(os.getenv("PERF_METRICS_INTERVAL", "15"))  # секунды
+        
+        # Хранилище состояний FSM: database (таблица fsm_states) или memory
+        self.fsm_storage: str = os.getenv("FSM_STORAGE", "database").lower()
+        self.fsm_cache_size: int = int(os.getenv("FSM_CACHE_SIZE", "10000"))
+        self.fsm_cache_ttl: float = float(os.getenv("FSM_CACHE_TTL", "60"))  # секунды, 0 - читать из БД
+        self.fsm_flush_interval: float = float(os.getenv("FSM_FLUSH_INTERVAL", "1"))  # секунды, 0 - писать сразу
+        
+        # Очереди апдейтов по чатам: один чат - по порядку, разные чаты - параллельно
+        self.update_lanes: bool = os.getenv("UPDATE_LANES", "true").lower() == "true"
+        self.update_lane_max_pending: int = int(os.getenv("UPDATE_LANE_MAX_PENDING", "20"))  # апдейтов в очереди чата
+        
+        # Нажатия +/- в корзине за это окно склеиваются в одну запись, секунды
+        self.cart_tap_window: float = float(os.getenv("CART_TAP_WINDOW", "0.4"))
+        
+        # Отпечатки содержимого сообщений: правки без изменений не отправляются (0 - выключено).
+        # Работает только в режиме polling - в webhook процессов бота может быть несколько
+        self.edit_cache_size: int = int(os.getenv("EDIT_CACHE_SIZE", "10000"))  # сообщений
+            
         # Создаем папку для загрузок
         os.makedirs(self.upload_path, exist_ok=True)
 
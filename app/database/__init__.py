@@ -1,6 +1,12 @@
 # Инициализация пакета database
-from .database import Base, engine, async_session_maker, get_async_session, init_database, close_database
-from .models import User, Category, Dish, Order, OrderItem, Payment, OrderStatus, PaymentStatus
+from .database import (
+    Base, engine, async_session_maker, get_async_session, init_database, close_database, dialect_insert,
+    day_of
+)
+from .models import (
+    User, Category, Dish, Order, OrderItem, Payment, OrderStatus, PaymentStatus,
+    DailySales, DailyDishSales, UserSales, FsmState, OutboxMessage
+)
 
 __all__ = [
     "Base",
@@ -9,6 +15,8 @@ __all__ = [
     "get_async_session",
     "init_database",
     "close_database",
+    "dialect_insert",
+    "day_of",
     "User",
     "Category", 
     "Dish",
@@ -16,5 +24,10 @@ __all__ = [
     "OrderItem",
     "Payment",
     "OrderStatus",
-    "PaymentStatus"
+    "PaymentStatus",
+    "DailySales",
+    "DailyDishSales",
+    "UserSales",
+    "FsmState",
+    "OutboxMessage"
 ]
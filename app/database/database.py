@@ -1,6 +1,12 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import logging
+from sqlalchemy import Date
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.sql.functions import FunctionElement
 from app.config import settings
+from app.database.sqlite import SerializedWriteSession, apply_sqlite_profile
 
 
 class Base(DeclarativeBase):
@@ -8,17 +14,51 @@ class Base(DeclarativeBase):
     pass
 
 
+def create_database_engine(database_url: str) -> AsyncEngine:
+    """Создать движок; для SQLite - с профилем из app.database.sqlite"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql":
+        return create_async_engine(
+            database_url,
+            echo=False,
+            future=True,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            pool_recycle=settings.db_pool_recycle,
+            # Кэш подготовленных запросов asyncpg; 0 - для pgbouncer в режиме transaction
+            connect_args={
+                "statement_cache_size": settings.db_statement_cache_size,
+                "prepared_statement_cache_size": settings.db_statement_cache_size
+            }
+        )
+    if url.get_backend_name() != "sqlite":
+        return create_async_engine(database_url, echo=False, future=True)
+
+    pool_options = {}
+    if url.database and url.database != ":memory:":
+        # Соединения переиспользуются: pragma выставляются один раз на соединение.
+        # Без предела сверх пула: сессия, ждущая очередь записи, держит соединение,
+        # и писатель не должен ждать свободного соединения от нее
+        pool_options = {"pool_size": settings.sqlite_pool_size, "max_overflow": -1}
+
+    engine = create_async_engine(
+        database_url,
+        echo=False,  # Установить в True для отладки SQL запросов
+        future=True,
+        **pool_options
+    )
+    apply_sqlite_profile(engine)
+    return engine
+
+
 # Создаем движок базы данных
-engine = create_async_engine(
-    settings.database_url,
-    echo=False,  # Установить в True для отладки SQL запросов
-    future=True
-)
+engine = create_database_engine(settings.database_url)
 
-# Создаем фабрику сессий
+# Создаем фабрику сессий; пишущие транзакции SQLite идут через очередь
 async_session_maker = async_sessionmaker(
     engine,
-    class_=AsyncSession,
+    class_=SerializedWriteSession,
     expire_on_commit=False
 )
 
@@ -36,10 +76,56 @@ async def init_database():
     """Инициализация базы данных"""
     async with engine.begin() as conn:
         # Импортируем все модели для создания таблиц
-        from app.database.models import User, Category, Dish, Order, OrderItem, Payment
+        from app.database.models import (
+            User, Category, Dish, Order, OrderItem, Payment, DailySales, DailyDishSales,
+            FsmState, OutboxMessage
+        )
         
         # Создаем все таблицы
         await conn.run_sync(Base.metadata.create_all)
+    
+    # create_all не добавляет индексы в уже существующие таблицы
+    await ensure_indexes()
+
+
+async def ensure_indexes():
+    """Создать недостающие индексы моделей в существующих таблицах"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                async with engine.begin() as conn:
+                    await conn.run_sync(index.create, checkfirst=True)
+            except Exception as e:
+                logging.warning(
+                    f"Не удалось создать индекс {index.name}: {e}. "
+                    f"Выполните миграции: python -m alembic upgrade head"
+                )
+
+
+class day_of(FunctionElement):
+    """Дата без времени из DateTime-колонки: date(x) в SQLite, CAST(x AS DATE) в остальных СУБД"""
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(day_of)
+def _compile_day_of(element, compiler, **kw):
+    return f"CAST({compiler.process(element.clauses, **kw)} AS DATE)"
+
+
+@compiles(day_of, "sqlite")
+def _compile_day_of_sqlite(element, compiler, **kw):
+    # CAST AS DATE в SQLite дает число (год), а не дату
+    return f"date({compiler.process(element.clauses, **kw)})"
+
+
+def dialect_insert(session: AsyncSession):
+    """insert() с поддержкой ON CONFLICT для СУБД текущей сессии"""
+    if session.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
 
 
 async def close_database():
@@ -0,0 +1,66 @@
+"""Подсчет SQL-запросов, соединений и транзакций для тестов и профилирования"""
+from contextlib import contextmanager
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database.database import engine as default_engine
+
+
+class QueryCounter:
+    """Счетчик SQL-запросов, выполненных через движок.
+
+    Заодно считает выдачи соединений из пула (checkouts) и COMMIT
+    (commits) - сколько сессий и транзакций открыл обработчик.
+    """
+
+    def __init__(self, engine: Optional[AsyncEngine] = None):
+        self.engine = engine or default_engine
+        self.count = 0
+        self.checkouts = 0
+        self.commits = 0
+        self.statements: List[str] = []
+        # (запрос, параметры) одиночных execute - для EXPLAIN и отладки
+        self.executed: List[Tuple[str, Any]] = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+        if not executemany:
+            self.executed.append((statement, parameters))
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def _commit(self, conn):
+        self.commits += 1
+
+    def _listeners(self):
+        return (
+            ("before_cursor_execute", self._before_cursor_execute),
+            ("checkout", self._checkout),
+            ("commit", self._commit),
+        )
+
+    def __enter__(self) -> "QueryCounter":
+        for name, listener in self._listeners():
+            event.listen(self.engine.sync_engine, name, listener)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for name, listener in self._listeners():
+            event.remove(self.engine.sync_engine, name, listener)
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine: Optional[AsyncEngine] = None):
+    """Проверить, что блок with выполнил не больше limit запросов"""
+    with QueryCounter(engine) as counter:
+        yield counter
+
+    if counter.count > limit:
+        statements = "\n".join(f"  {i}. {s}" for i, s in enumerate(counter.statements, 1))
+        raise AssertionError(
+            f"Ожидалось не больше {limit} SQL-запросов, выполнено {counter.count}:\n{statements}"
+        )
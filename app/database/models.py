@@ -1,6 +1,6 @@
 from sqlalchemy import (
-    Column, Integer, String, Float, Boolean, DateTime, Text, 
-    ForeignKey, func, BigInteger
+    Column, Integer, String, Float, Boolean, DateTime, Date, Text, 
+    ForeignKey, func, BigInteger, Index
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -117,6 +117,17 @@ class Order(Base):
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     payments = relationship("Payment", back_populates="order")
     
+    __table_args__ = (
+        # Keyset-пагинация админских списков: фильтр по статусу + сортировка
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+        # Список "Все заказы" без фильтра по статусу
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        # Корзина пользователя: WHERE user_id = ? AND status = 'cart'
+        Index("ix_orders_user_id_status", "user_id", "status"),
+        # История заказов пользователя: WHERE user_id = ? ORDER BY created_at
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+    )
+    
     def __repr__(self):
         return f"<Order(id={self.id}, user_id={self.user_id}, status={self.status}, total={self.total_amount})>"
     
@@ -145,6 +156,12 @@ class Order(Base):
 class OrderItem(Base):
     """Модель позиции заказа"""
     __tablename__ = "order_items"
+    __table_args__ = (
+        # Одно блюдо - одна позиция в заказе; на этом держится upsert корзины
+        Index("uq_order_items_order_dish", "order_id", "dish_id", unique=True),
+        # Продажи блюда и проверка перед удалением блюда
+        Index("ix_order_items_dish_id", "dish_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
@@ -184,3 +201,79 @@ class Payment(Base):
     
     def __repr__(self):
         return f"<Payment(id={self.id}, order_id={self.order_id}, amount={self.amount}, status={self.status})>"
+
+
+class DailySales(Base):
+    """Дневная сводка заказов по статусам (день создания заказа)"""
+    __tablename__ = "daily_sales"
+    
+    day = Column(Date, primary_key=True)
+    status = Column(String(50), primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f"<DailySales(day={self.day}, status={self.status}, count={self.orders_count})>"
+
+
+class DailyDishSales(Base):
+    """Дневная сводка продаж блюд (только подтвержденные заказы)"""
+    __tablename__ = "daily_dish_sales"
+    
+    day = Column(Date, primary_key=True)
+    dish_id = Column(Integer, ForeignKey("dishes.id"), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    orders_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DailyDishSales(day={self.day}, dish_id={self.dish_id}, qty={self.quantity})>"
+
+
+class UserSales(Base):
+    """Сводка продаж по клиентам за все время (только подтвержденные заказы)"""
+    __tablename__ = "user_sales"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f"<UserSales(user_id={self.user_id}, orders={self.orders_count})>"
+
+
+class FsmState(Base):
+    """Состояние FSM пользователя (aiogram) - переживает перезапуск бота"""
+    __tablename__ = "fsm_states"
+    
+    key = Column(String(255), primary_key=True)  # ключ DefaultKeyBuilder
+    state = Column(String(255), nullable=True)
+    data = Column(Text, nullable=False, default="{}")  # JSON
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<FsmState(key={self.key}, state={self.state})>"
+
+
+class OutboxMessage(Base):
+    """Исходящее сообщение Telegram в очереди на отправку (outbox)"""
+    __tablename__ = "notification_outbox"
+    
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(BigInteger, nullable=False)
+    method = Column(String(50), nullable=False)  # send_message, send_photo
+    payload = Column(Text, nullable=False)  # JSON аргументов метода бота
+    status = Column(String(20), nullable=False, default="pending")  # pending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        # Выборка готовых к отправке сообщений
+        Index("ix_notification_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+    
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, chat_id={self.chat_id}, method={self.method}, status={self.status})>"
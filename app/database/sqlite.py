@@ -0,0 +1,175 @@
+"""Профиль SQLite для конкурентной работы бота: pragma и очередь записи"""
+import asyncio
+import weakref
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+# Ключ в session.info: очередь записи, в которой сессия сейчас стоит первой
+_WRITER_KEY = "sqlite_writer_queue"
+# Ключ в session.info: в текущей транзакции были изменения
+_WRITES_KEY = "has_writes"
+
+
+def apply_sqlite_profile(engine: AsyncEngine):
+    """Выставлять pragma при каждом новом соединении пула.
+
+    WAL позволяет читать параллельно с записью, synchronous=NORMAL в
+    режиме WAL не теряет целостность и не делает fsync на каждый commit,
+    busy_timeout заставляет SQLite ждать блокировку, а не сразу отвечать
+    "database is locked".
+    """
+    pragmas = [
+        f"busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"cache_size=-{settings.sqlite_cache_size_mb * 1024}",  # отрицательное значение - в КиБ
+        f"mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024}",
+        "temp_store=MEMORY",
+    ]
+    if settings.sqlite_wal:
+        pragmas[:0] = ["journal_mode=WAL", "synchronous=NORMAL"]
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+class NestedWriterError(RuntimeError):
+    """Вторая пишущая сессия в задаче, которая уже держит очередь записи"""
+
+
+class WriterQueue:
+    """Очередь пишущих транзакций одной базы SQLite.
+
+    SQLite допускает одного писателя; остальные ждут в busy handler,
+    который опрашивает блокировку с паузами до 100 мс и после
+    busy_timeout сдается. Здесь писатели ждут в asyncio.Lock: по
+    порядку и без опроса - блокировка передается следующему сразу
+    после commit.
+    """
+
+    def __init__(self):
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+        self.owner: Optional[asyncio.Task] = None
+
+    async def acquire(self):
+        """Встать в очередь.
+
+        Вложенная пишущая сессия в той же задаче ждала бы сама себя, а без
+        очереди - блокировку RESERVED внешней сессии на другом соединении,
+        и через busy_timeout получила бы "database is locked". Поэтому
+        сразу NestedWriterError: запись нужно делать в сессии внешнего
+        кода или после ее commit.
+        """
+        task = asyncio.current_task()
+        if self.owner is not None and self.owner is task:
+            raise NestedWriterError(
+                "в этой задаче уже идет пишущая транзакция SQLite - "
+                "пишите в ее сессии или после ее commit"
+            )
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock, self._loop, self.owner = asyncio.Lock(), loop, None
+        await self._lock.acquire()
+        self.owner = task
+
+    def release(self):
+        self.owner = None
+        self._lock.release()
+
+
+# Очереди записи по движкам
+_writer_queues = weakref.WeakKeyDictionary()
+
+
+class SerializedWriteSession(AsyncSession):
+    """AsyncSession, в которой пишущие транзакции SQLite идут по очереди.
+
+    Сессия встает в очередь перед первым изменением (DML-запрос, flush
+    или autoflush накопленных объектов) и выходит из нее при commit,
+    rollback или close. Чтения очередь не ждут. Для других СУБД и при
+    SQLITE_SINGLE_WRITER=false ведет себя как обычная AsyncSession.
+
+    has_writes показывает, есть ли в текущей транзакции изменения, -
+    по нему DbSessionMiddleware решает, нужен ли COMMIT.
+    """
+
+    def _writer_queue(self) -> Optional[WriterQueue]:
+        if _WRITER_KEY in self.info or not settings.sqlite_single_writer:
+            return None
+        bind = self.bind
+        if bind is None or bind.dialect.name != "sqlite":
+            return None
+        queue = _writer_queues.get(bind.sync_engine)
+        if queue is None:
+            queue = _writer_queues[bind.sync_engine] = WriterQueue()
+        return queue
+
+    def _has_pending_changes(self) -> bool:
+        sync_session = self.sync_session
+        return bool(sync_session.new or sync_session.deleted or sync_session.dirty)
+
+    @property
+    def has_writes(self) -> bool:
+        """Есть ли в текущей транзакции изменения (выполненные или накопленные)"""
+        return self.info.get(_WRITES_KEY, False) or self._has_pending_changes()
+
+    async def _enter_writer(self, flushes: bool, statement=None):
+        if not (getattr(statement, "is_dml", False) or (flushes and self._has_pending_changes())):
+            return
+        self.info[_WRITES_KEY] = True
+        queue = self._writer_queue()
+        if queue is not None:
+            await queue.acquire()
+            self.info[_WRITER_KEY] = queue
+
+    async def execute(self, statement, *args, **kwargs):
+        await self._enter_writer(self.autoflush, statement)
+        return await super().execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        await self._enter_writer(self.autoflush, statement)
+        return await super().scalar(statement, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        await self._enter_writer(self.autoflush)
+        return await super().get(*args, **kwargs)
+
+    async def flush(self, objects=None):
+        await self._enter_writer(True)
+        await super().flush(objects)
+
+    async def commit(self):
+        await self.flush()
+        await super().commit()
+
+    async def close(self):
+        try:
+            await super().close()
+        finally:
+            _release_writer(self.sync_session)
+
+
+def _release_writer(session: Session):
+    session.info.pop(_WRITES_KEY, None)
+    queue = session.info.pop(_WRITER_KEY, None)
+    if queue is not None:
+        queue.release()
+
+
+@event.listens_for(Session, "after_commit")
+def _release_after_commit(session):
+    _release_writer(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _release_after_rollback(session):
+    _release_writer(session)
@@ -1,29 +1,32 @@
 """Общие обработчики команд"""
 import logging
-from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery
-from aiogram.filters import Command, StateFilter
+from aiogram import F
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import Message, CallbackQuery, ErrorEvent
+from aiogram.filters import Command, ExceptionTypeFilter, StateFilter
 from aiogram.fsm.context import FSMContext
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.utils import texts, UserStates
 from app.keyboards.user import get_main_menu_keyboard
+from app.keyboards.callbacks import MAIN_MENU
 from app.database import User
+from app.services.update_lanes import LaneOverflowError
+from app.utils.callbacks import CallbackRouter
 
-router = Router()
+router = CallbackRouter()
 
 
 @router.message(Command("start"))
-async def cmd_start(message: Message, state: FSMContext, user: User):
+async def cmd_start(message: Message, state: FSMContext, user: User, session: AsyncSession):
     """Обработчик команды /start"""
     await state.set_state(UserStates.MAIN_MENU)
     
     # Получаем количество товаров в корзине
     from app.services.cart import CartService
-    from app.database import async_session_maker
     from app.config import settings
     
-    async with async_session_maker() as session:
-        cart_count = await CartService.get_cart_count(session, user.id)
+    cart_count = await CartService.get_cart_count(session, user.id)
     
     await message.answer(
         settings.welcome_message,
@@ -39,8 +42,8 @@ async def cmd_help(message: Message):
 
 
 @router.message(F.text == texts.BUTTON_MAIN_MENU)
-@router.callback_query(F.data == "main_menu")
-async def main_menu(event: Message | CallbackQuery, state: FSMContext, user: User = None):
+@router.callback_query(MAIN_MENU)
+async def main_menu(event: Message | CallbackQuery, state: FSMContext, session: AsyncSession, user: User = None):
     """Возврат в главное меню"""
     await state.set_state(UserStates.MAIN_MENU)
     
@@ -48,10 +51,8 @@ async def main_menu(event: Message | CallbackQuery, state: FSMContext, user: Use
     cart_count = 0
     if user:
         from app.services.cart import CartService
-        from app.database import async_session_maker
         
-        async with async_session_maker() as session:
-            cart_count = await CartService.get_cart_count(session, user.id)
+        cart_count = await CartService.get_cart_count(session, user.id)
     
     if isinstance(event, CallbackQuery):
         from app.config import settings
@@ -72,17 +73,15 @@ async def main_menu(event: Message | CallbackQuery, state: FSMContext, user: Use
 
 
 @router.message(StateFilter(None))
-async def any_message(message: Message, state: FSMContext, user: User):
+async def any_message(message: Message, state: FSMContext, user: User, session: AsyncSession):
     """Обработчик любых сообщений в состоянии None"""
     logging.info(f"Получено сообщение от пользователя {user.id}: '{message.text}'")
     await state.set_state(UserStates.MAIN_MENU)
     
     # Получаем количество товаров в корзине
     from app.services.cart import CartService
-    from app.database import async_session_maker
     
-    async with async_session_maker() as session:
-        cart_count = await CartService.get_cart_count(session, user.id)
+    cart_count = await CartService.get_cart_count(session, user.id)
     
     await message.answer(
         "👋 Добро пожаловать! Выберите действие:",
@@ -91,7 +90,7 @@ async def any_message(message: Message, state: FSMContext, user: User):
 
 
 @router.message()
-async def debug_all_messages(message: Message, state: FSMContext, user: User = None):
+async def debug_all_messages(message: Message, state: FSMContext, session: AsyncSession, user: User = None):
     """Отладочный обработчик всех сообщений (должен быть последним)"""
     current_state = await state.get_state()
     logging.info(f"Необработанное сообщение от пользователя {user.id if user else 'Unknown'}: '{message.text}', состояние: {current_state}")
@@ -107,12 +106,25 @@ async def debug_all_messages(message: Message, state: FSMContext, user: User = N
     
     # Получаем количество товаров в корзине
     from app.services.cart import CartService
-    from app.database import async_session_maker
     
-    async with async_session_maker() as session:
-        cart_count = await CartService.get_cart_count(session, user.id)
+    cart_count = await CartService.get_cart_count(session, user.id)
     
     await message.answer(
         "🤔 Не понял команду. Выберите действие из меню:",
         reply_markup=get_main_menu_keyboard(cart_count)
     )
+
+
+@router.errors(ExceptionTypeFilter(LaneOverflowError))
+async def lane_overflow(event: ErrorEvent):
+    """Апдейт отброшен: пользователь присылает их быстрее, чем бот успевает обработать"""
+    logging.warning(f"Апдейт {event.update.update_id} отброшен: {event.exception}")
+
+    # Без ответа кнопка в клиенте крутится до таймаута
+    callback = event.update.callback_query
+    if callback is not None:
+        try:
+            await callback.answer("⏳ Подождите, предыдущие нажатия еще обрабатываются")
+        except TelegramAPIError as e:
+            logging.warning(f"Не удалось ответить на отброшенный callback {callback.id}: {e}")
+    return True
@@ -1,9 +1,13 @@
 """Обработчики для работы с корзиной"""
 import logging
-from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery
+from typing import Tuple
+
+from aiogram import F
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.utils import texts, UserStates
 from app.utils.helpers import format_price
@@ -11,16 +15,47 @@ from app.keyboards.user import (
     get_cart_keyboard, get_cart_item_edit_keyboard, 
     get_main_menu_keyboard, get_confirm_action_keyboard
 )
-from app.database import async_session_maker, User
+from app.keyboards.callbacks import (
+    CANCEL_CLEAR_CART, CART, CART_DECREASE, CART_INCREASE, CART_REMOVE, CART_SET,
+    CLEAR_CART, CONFIRM_CLEAR_CART, EDIT_CART_ITEM
+)
+from app.database import User
 from app.services.cart import CartService
+from app.services.cart_taps import cart_taps
+from app.utils.callbacks import CallbackRouter
+
+router = CallbackRouter()
+
 
-router = Router()
+async def render_cart(session: AsyncSession, user_id: int) -> Tuple[str, InlineKeyboardMarkup]:
+    """Текст и клавиатура корзины пользователя"""
+    cart = await CartService.get_cart_with_items(session, user_id)
+    
+    if not cart or not cart.items:
+        # Пустая корзина
+        return texts.CART_EMPTY, get_cart_keyboard([])
+    
+    # Формируем список товаров
+    cart_items_text = []
+    for item in cart.items:
+        item_text = texts.CART_ITEM_FORMAT.format(
+            dish_name=item.dish.name,
+            quantity=item.quantity,
+            total_price=format_price(item.total_price)
+        )
+        cart_items_text.append(item_text)
+    
+    message_text = texts.CART_MESSAGE.format(
+        cart_items="\n".join(cart_items_text),
+        total_amount=format_price(cart.total_amount)
+    )
+    return message_text, get_cart_keyboard(cart.items)
 
 
 @router.message(F.text.contains("🛒"), StateFilter("*"))
 @router.message(F.text == texts.BUTTON_CART, StateFilter("*"))
-@router.callback_query(F.data == "cart")
-async def show_cart(event: Message | CallbackQuery, state: FSMContext, user: User):
+@router.callback_query(CART)
+async def show_cart(event: Message | CallbackQuery, state: FSMContext, user: User, session: AsyncSession):
     """Показать корзину пользователя"""
     logging.info(f"Пользователь {user.id} открывает корзину, текст: {event.text if isinstance(event, Message) else 'callback'}")
     
@@ -28,29 +63,7 @@ async def show_cart(event: Message | CallbackQuery, state: FSMContext, user: Use
     if state:
         await state.set_state(UserStates.VIEWING_CART)
     
-    async with async_session_maker() as session:
-        cart = await CartService.get_cart_with_items(session, user.id)
-        
-        if not cart or not cart.items:
-            # Пустая корзина
-            message_text = texts.CART_EMPTY
-            keyboard = get_cart_keyboard([])
-        else:
-            # Формируем список товаров
-            cart_items_text = []
-            for item in cart.items:
-                item_text = texts.CART_ITEM_FORMAT.format(
-                    dish_name=item.dish.name,
-                    quantity=item.quantity,
-                    total_price=format_price(item.total_price)
-                )
-                cart_items_text.append(item_text)
-            
-            message_text = texts.CART_MESSAGE.format(
-                cart_items="\n".join(cart_items_text),
-                total_amount=format_price(cart.total_amount)
-            )
-            keyboard = get_cart_keyboard(cart.items)
+    message_text, keyboard = await render_cart(session, user.id)
     
     if isinstance(event, CallbackQuery):
         await event.message.edit_text(message_text, reply_markup=keyboard)
@@ -59,16 +72,11 @@ async def show_cart(event: Message | CallbackQuery, state: FSMContext, user: Use
         await event.answer(message_text, reply_markup=keyboard)
 
 
-@router.callback_query(F.data.startswith("edit_cart_item_"))
-async def edit_cart_item(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(EDIT_CART_ITEM)
+async def edit_cart_item(callback: CallbackQuery, state: FSMContext, item_id: int):
     """Редактировать позицию в корзине"""
-    item_id = int(callback.data.split("_")[3])
-    
-    async with async_session_maker() as session:
-        # Здесь можно добавить получение информации о товаре
-        # Пока просто показываем клавиатуру для редактирования
-        pass
-    
+    # Здесь можно добавить получение информации о товаре
+    # Пока просто показываем клавиатуру для редактирования
     await callback.message.edit_text(
         "✏️ Редактирование товара\n\nВыберите новое количество или удалите товар:",
         reply_markup=get_cart_item_edit_keyboard(item_id)
@@ -76,103 +84,93 @@ async def edit_cart_item(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("cart_increase_"))
-async def increase_cart_item(callback: CallbackQuery, state: FSMContext, user: User):
-    """Увеличить количество товара в корзине"""
-    item_id = int(callback.data.split("_")[2])
-    
-    async with async_session_maker() as session:
-        # Получаем текущее количество и увеличиваем на 1
-        cart = await CartService.get_cart_with_items(session, user.id)
-        if cart:
-            for item in cart.items:
-                if item.id == item_id:
-                    new_quantity = item.quantity + 1
-                    if new_quantity <= 10:  # Ограничение
-                        await CartService.update_item_quantity(
-                            session, user.id, item_id, new_quantity
-                        )
-                        await session.commit()
-                        await callback.answer("✅ Количество увеличено")
-                    else:
-                        await callback.answer("❌ Максимальное количество: 10", show_alert=True)
-                    break
-        else:
-            await callback.answer("❌ Товар не найден", show_alert=True)
+def _refresh_cart(callback: CallbackQuery, user: User):
+    """Одно обновление сообщения корзины после записи накопленных нажатий +/-"""
+    async def refresh(session: AsyncSession):
+        message_text, keyboard = await render_cart(session, user.id)
+        
+        try:
+            await callback.message.edit_text(message_text, reply_markup=keyboard)
+        except TelegramBadRequest as e:
+            # Например, "+" и "-" в сумме дали прежнее количество
+            if "message is not modified" not in str(e).lower():
+                raise
     
-    # Обновляем отображение корзины
-    await show_cart(callback, state, user)
+    return refresh
 
 
-@router.callback_query(F.data.startswith("cart_decrease_"))
-async def decrease_cart_item(callback: CallbackQuery, state: FSMContext, user: User):
-    """Уменьшить количество товара в корзине"""
-    item_id = int(callback.data.split("_")[2])
-    
-    async with async_session_maker() as session:
-        cart = await CartService.get_cart_with_items(session, user.id)
-        if cart:
-            for item in cart.items:
-                if item.id == item_id:
-                    new_quantity = item.quantity - 1
-                    if new_quantity > 0:
-                        await CartService.update_item_quantity(
-                            session, user.id, item_id, new_quantity
-                        )
-                        await session.commit()
-                        await callback.answer("✅ Количество уменьшено")
-                    else:
-                        # Удаляем товар если количество стало 0
-                        await CartService.remove_item_from_cart(session, user.id, item_id)
-                        await session.commit()
-                        await callback.answer("✅ Товар удален из корзины")
-                    break
-        else:
-            await callback.answer("❌ Товар не найден", show_alert=True)
+@router.callback_query(CART_INCREASE, flags={"cart_tap": True})
+async def increase_cart_item(
+    callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession, item_id: int
+):
+    """Увеличить количество товара в корзине.
     
-    # Обновляем отображение корзины
-    await show_cart(callback, state, user)
+    Нажатие отвечается сразу, а запись и обновление корзины делает
+    cart_taps - одна на серию быстрых нажатий.
+    """
+    await state.set_state(UserStates.VIEWING_CART)
+    result = await cart_taps.tap(
+        session, callback.from_user.id, user.id, item_id, 1, _refresh_cart(callback, user)
+    )
+    if result is None:
+        await callback.answer("❌ Товар не найден", show_alert=True)
+    elif result.clamped:
+        await callback.answer(f"❌ Максимальное количество: {cart_taps.max_quantity}", show_alert=True)
+    else:
+        await callback.answer("✅ Количество увеличено")
+
+
+@router.callback_query(CART_DECREASE, flags={"cart_tap": True})
+async def decrease_cart_item(
+    callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession, item_id: int
+):
+    """Уменьшить количество товара в корзине (запись - через cart_taps)"""
+    await state.set_state(UserStates.VIEWING_CART)
+    # Товар удаляется автоматически, если количество стало 0
+    result = await cart_taps.tap(
+        session, callback.from_user.id, user.id, item_id, -1, _refresh_cart(callback, user)
+    )
+    if result is None:
+        await callback.answer("❌ Товар не найден", show_alert=True)
+    elif result.quantity > 0:
+        await callback.answer("✅ Количество уменьшено")
+    else:
+        await callback.answer("✅ Товар удален из корзины")
 
 
-@router.callback_query(F.data.startswith("cart_set_"))
-async def set_cart_item_quantity(callback: CallbackQuery, state: FSMContext, user: User):
+@router.callback_query(CART_SET)
+async def set_cart_item_quantity(
+    callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession, item_id: int, quantity: int
+):
     """Установить определенное количество товара"""
-    parts = callback.data.split("_")
-    item_id = int(parts[2])
-    quantity = int(parts[3])
-    
-    async with async_session_maker() as session:
-        success = await CartService.update_item_quantity(
-            session, user.id, item_id, quantity
-        )
-        if success:
-            await session.commit()
-            await callback.answer(f"✅ Количество установлено: {quantity}")
-        else:
-            await callback.answer("❌ Ошибка обновления", show_alert=True)
+    success = await CartService.update_item_quantity(
+        session, user.id, item_id, quantity
+    )
+    if success:
+        await session.commit()
+        await callback.answer(f"✅ Количество установлено: {quantity}")
+    else:
+        await callback.answer("❌ Ошибка обновления", show_alert=True)
     
     # Обновляем отображение корзины
-    await show_cart(callback, state, user)
+    await show_cart(callback, state, user, session)
 
 
-@router.callback_query(F.data.startswith("cart_remove_"))
-async def remove_cart_item(callback: CallbackQuery, state: FSMContext, user: User):
+@router.callback_query(CART_REMOVE)
+async def remove_cart_item(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession, item_id: int):
     """Удалить товар из корзины"""
-    item_id = int(callback.data.split("_")[2])
-    
-    async with async_session_maker() as session:
-        success = await CartService.remove_item_from_cart(session, user.id, item_id)
-        if success:
-            await session.commit()
-            await callback.answer("✅ Товар удален из корзины")
-        else:
-            await callback.answer("❌ Товар не найден", show_alert=True)
+    success = await CartService.remove_item_from_cart(session, user.id, item_id)
+    if success:
+        await session.commit()
+        await callback.answer("✅ Товар удален из корзины")
+    else:
+        await callback.answer("❌ Товар не найден", show_alert=True)
     
     # Обновляем отображение корзины
-    await show_cart(callback, state, user)
+    await show_cart(callback, state, user, session)
 
 
-@router.callback_query(F.data == "clear_cart")
+@router.callback_query(CLEAR_CART)
 async def ask_clear_cart(callback: CallbackQuery):
     """Запросить подтверждение очистки корзины"""
     await callback.message.edit_text(
@@ -182,23 +180,22 @@ async def ask_clear_cart(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "confirm_clear_cart")
-async def clear_cart(callback: CallbackQuery, state: FSMContext, user: User):
+@router.callback_query(CONFIRM_CLEAR_CART)
+async def clear_cart(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession):
     """Очистить корзину"""
-    async with async_session_maker() as session:
-        success = await CartService.clear_cart(session, user.id)
-        if success:
-            await session.commit()
-            await callback.answer("✅ Корзина очищена")
-        else:
-            await callback.answer("❌ Корзина уже пуста")
+    success = await CartService.clear_cart(session, user.id)
+    if success:
+        await session.commit()
+        await callback.answer("✅ Корзина очищена")
+    else:
+        await callback.answer("❌ Корзина уже пуста")
     
     # Показываем пустую корзину
-    await show_cart(callback, state, user)
+    await show_cart(callback, state, user, session)
 
 
-@router.callback_query(F.data == "cancel_clear_cart")
-async def cancel_clear_cart(callback: CallbackQuery, state: FSMContext, user: User):
+@router.callback_query(CANCEL_CLEAR_CART)
+async def cancel_clear_cart(callback: CallbackQuery, state: FSMContext, user: User, session: AsyncSession):
     """Отменить очистку корзины"""
     await callback.answer("❌ Отменено")
-    await show_cart(callback, state, user)
+    await show_cart(callback, state, user, session)
@@ -1,19 +1,21 @@
 """Обработчики для FAQ и обратной связи"""
 import logging
-from aiogram import Router, F
+from aiogram import F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
 
 from app.utils import texts, UserStates
 from app.keyboards.user import get_main_menu_keyboard
+from app.keyboards.callbacks import CONTACT_US, FAQ, FAQ_SECTION
 from app.database import async_session_maker, User
+from app.utils.callbacks import CallbackRouter
 
-router = Router()
+router = CallbackRouter()
 
 
 @router.message(F.text == texts.BUTTON_FAQ)
-@router.callback_query(F.data == "faq")
+@router.callback_query(FAQ)
 async def show_faq(event: Message | CallbackQuery, state: FSMContext):
     """Показать FAQ"""
     await state.set_state(UserStates.VIEWING_FAQ)
@@ -51,11 +53,9 @@ async def show_faq(event: Message | CallbackQuery, state: FSMContext):
         await event.answer()
 
 
-@router.callback_query(F.data.startswith("faq_"))
-async def show_faq_answer(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(FAQ_SECTION)
+async def show_faq_answer(callback: CallbackQuery, state: FSMContext, section: str):
     """Показать ответ на конкретный вопрос"""
-    faq_type = callback.data.split("_")[1]
-    
     # Получаем текст ответа
     faq_answers = {
         "delivery": texts.FAQ_DELIVERY,
@@ -64,7 +64,7 @@ async def show_faq_answer(callback: CallbackQuery, state: FSMContext):
         "statuses": texts.FAQ_STATUSES
     }
     
-    answer_text = faq_answers.get(faq_type, texts.FAQ_NOT_FOUND)
+    answer_text = faq_answers.get(section, texts.FAQ_NOT_FOUND)
     
     # Клавиатура для возврата к FAQ
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -81,7 +81,7 @@ async def show_faq_answer(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "contact_us")
+@router.callback_query(CONTACT_US)
 async def show_contact_form(callback: CallbackQuery, state: FSMContext):
     """Показать форму обратной связи"""
     await state.set_state(UserStates.WRITING_FEEDBACK)
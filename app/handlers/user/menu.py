@@ -1,73 +1,66 @@
 """Обработчики для работы с меню"""
-from aiogram import Router, F
+from aiogram import F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.utils import texts, UserStates
 from app.keyboards.user import (
     get_categories_keyboard, get_dishes_keyboard, 
     get_dish_detail_keyboard, get_main_menu_keyboard
 )
-from app.database import async_session_maker, Category, Dish, User
+from app.keyboards.callbacks import (
+    ADD_TO_CART, CATEGORY, DISH, DISH_UNAVAILABLE, INPUT_QUANTITY, MENU
+)
+from app.database import User
+from app.services.catalog import catalog_cache
 from app.config import settings
+from app.utils.callbacks import CallbackRouter
 
-router = Router()
+router = CallbackRouter()
 
 
 @router.message(F.text == texts.BUTTON_MENU)
-@router.callback_query(F.data == "menu")
+@router.callback_query(MENU)
 async def show_menu(event: Message | CallbackQuery, state: FSMContext):
     """Показать главное меню с категориями"""
     await state.set_state(UserStates.BROWSING_MENU)
     
-    async with async_session_maker() as session:
-        # Получаем все активные категории
-        result = await session.execute(
-            select(Category)
-            .where(Category.is_active == True)
-            .order_by(Category.sort_order)
-        )
-        categories = result.scalars().all()
+    # Получаем все активные категории из кэша каталога
+    catalog = await catalog_cache.get()
+    categories = catalog.active_categories
     
     if isinstance(event, CallbackQuery):
         await event.message.edit_text(
             texts.MENU_MESSAGE,
-            reply_markup=get_categories_keyboard(categories)
+            reply_markup=get_categories_keyboard(categories, catalog.version)
         )
         await event.answer()
     else:
         await event.answer(
             texts.MENU_MESSAGE,
-            reply_markup=get_categories_keyboard(categories)
+            reply_markup=get_categories_keyboard(categories, catalog.version)
         )
 
 
-@router.callback_query(F.data.startswith("category_"))
-async def show_category(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(CATEGORY)
+async def show_category(callback: CallbackQuery, state: FSMContext, category_id: int):
     """Показать блюда в категории"""
-    category_id = int(callback.data.split("_")[1])
+    catalog = await catalog_cache.get()
     
-    async with async_session_maker() as session:
-        # Получаем категорию
-        category = await session.get(Category, category_id)
-        if not category:
-            await callback.answer("Категория не найдена", show_alert=True)
-            return
-        
-        # Получаем блюда в категории
-        result = await session.execute(
-            select(Dish)
-            .where(Dish.category_id == category_id)
-            .order_by(Dish.sort_order)
-        )
-        dishes = result.scalars().all()
+    # Получаем категорию
+    category = catalog.get_category(category_id)
+    if not category:
+        await callback.answer("Категория не найдена", show_alert=True)
+        return
+    
+    # Получаем блюда в категории
+    dishes = catalog.get_dishes(category_id)
     
     if not dishes:
         await callback.message.edit_text(
             f"📂 {category.name}\n\n{texts.NO_DISHES_IN_CATEGORY}",
-            reply_markup=get_dishes_keyboard([], category_id)
+            reply_markup=get_dishes_keyboard([], category_id, catalog.version)
         )
     else:
         message_text = texts.CATEGORY_MESSAGE.format(
@@ -77,33 +70,27 @@ async def show_category(callback: CallbackQuery, state: FSMContext):
         
         await callback.message.edit_text(
             message_text,
-            reply_markup=get_dishes_keyboard(dishes, category_id)
+            reply_markup=get_dishes_keyboard(dishes, category_id, catalog.version)
         )
     
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("dish_"))
-async def show_dish(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(DISH_UNAVAILABLE)
+async def dish_unavailable(callback: CallbackQuery):
+    """Кнопка блюда, которое временно недоступно"""
+    await callback.answer("Блюдо временно недоступно", show_alert=True)
+
+
+@router.callback_query(DISH)
+async def show_dish(callback: CallbackQuery, state: FSMContext, dish_id: int):
     """Показать детали блюда"""
-    if callback.data == "dish_unavailable":
-        await callback.answer("Блюдо временно недоступно", show_alert=True)
-        return
-        
-    dish_id = int(callback.data.split("_")[1])
+    catalog = await catalog_cache.get()
+    dish = catalog.get_dish(dish_id)
     
-    async with async_session_maker() as session:
-        # Получаем блюдо с категорией
-        result = await session.execute(
-            select(Dish)
-            .options(selectinload(Dish.category))
-            .where(Dish.id == dish_id)
-        )
-        dish = result.scalar_one_or_none()
-        
-        if not dish:
-            await callback.answer("Блюдо не найдено", show_alert=True)
-            return
+    if not dish:
+        await callback.answer("Блюдо не найдено", show_alert=True)
+        return
     
     message_text = texts.DISH_MESSAGE.format(
         dish_name=dish.name,
@@ -113,54 +100,46 @@ async def show_dish(callback: CallbackQuery, state: FSMContext):
     
     await callback.message.edit_text(
         message_text,
-        reply_markup=get_dish_detail_keyboard(dish.id, dish.category_id, dish)
+        reply_markup=get_dish_detail_keyboard(dish.id, dish.category_id, dish, catalog.version)
     )
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("add_to_cart_"))
-async def add_to_cart(callback: CallbackQuery, user: User):
+@router.callback_query(ADD_TO_CART)
+async def add_to_cart(callback: CallbackQuery, user: User, session: AsyncSession, dish_id: int, quantity: int):
     """Добавить блюдо в корзину"""
-    # Парсим данные: add_to_cart_dish_id_quantity
-    parts = callback.data.split("_")
-    dish_id = int(parts[3])
-    quantity = int(parts[4])
-    
-    async with async_session_maker() as session:
-        try:
-            from app.services.cart import CartService
-            
-            # Добавляем товар в корзину
-            item = await CartService.add_item_to_cart(
-                session, user.id, dish_id, quantity
+    try:
+        from app.services.cart import CartService
+        
+        # Добавляем товар в корзину
+        item = await CartService.add_item_to_cart(
+            session, user.id, dish_id, quantity
+        )
+        await session.commit()
+        
+        # Получаем информацию о блюде для уведомления
+        catalog = await catalog_cache.get()
+        dish = catalog.get_dish(dish_id)
+        if dish:
+            total_price = dish.price * quantity
+            await callback.answer(
+                f"✅ {dish.name} (x{quantity}) добавлено в корзину!\n"
+                f"💰 Сумма: {total_price} ₽"
             )
-            await session.commit()
+        else:
+            await callback.answer("✅ Товар добавлен в корзину!")
             
-            # Получаем информацию о блюде для уведомления
-            dish = await session.get(Dish, dish_id)
-            if dish:
-                total_price = dish.price * quantity
-                await callback.answer(
-                    f"✅ {dish.name} (x{quantity}) добавлено в корзину!\n"
-                    f"💰 Сумма: {total_price} ₽"
-                )
-            else:
-                await callback.answer("✅ Товар добавлен в корзину!")
-                
-        except ValueError as e:
-            await callback.answer(f"❌ {str(e)}", show_alert=True)
-        except Exception as e:
-            await callback.answer("❌ Ошибка добавления в корзину", show_alert=True)
+    except ValueError as e:
+        await session.rollback()
+        await callback.answer(f"❌ {str(e)}", show_alert=True)
+    except Exception as e:
+        await session.rollback()
+        await callback.answer("❌ Ошибка добавления в корзину", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("input_quantity_"))
-async def request_quantity_input(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(INPUT_QUANTITY)
+async def request_quantity_input(callback: CallbackQuery, state: FSMContext, dish_id: int, category_id: int):
     """Запросить ввод количества для блюда"""
-    # Парсим данные: input_quantity_dish_id_category_id
-    parts = callback.data.split("_")
-    dish_id = int(parts[2])
-    category_id = int(parts[3])
-    
     # Сохраняем данные в состоянии
     await state.update_data(
         dish_id=dish_id, 
@@ -169,24 +148,24 @@ async def request_quantity_input(callback: CallbackQuery, state: FSMContext):
     )
     await state.set_state(UserStates.ENTERING_QUANTITY)
     
-    async with async_session_maker() as session:
-        dish = await session.get(Dish, dish_id)
-        if dish:
-            from app.utils.helpers import format_price
-            message = texts.INPUT_QUANTITY_MESSAGE.format(
-                dish_name=dish.name,
-                price=format_price(dish.price),
-                max_quantity=settings.max_dish_quantity
-            )
-            await callback.message.edit_text(message)
-        else:
-            await callback.answer("❌ Блюдо не найдено", show_alert=True)
+    catalog = await catalog_cache.get()
+    dish = catalog.get_dish(dish_id)
+    if dish:
+        from app.utils.helpers import format_price
+        message = texts.INPUT_QUANTITY_MESSAGE.format(
+            dish_name=dish.name,
+            price=format_price(dish.price),
+            max_quantity=settings.max_dish_quantity
+        )
+        await callback.message.edit_text(message)
+    else:
+        await callback.answer("❌ Блюдо не найдено", show_alert=True)
     
     await callback.answer()
 
 
 @router.message(UserStates.ENTERING_QUANTITY)
-async def process_quantity_input(message: Message, state: FSMContext, user: User):
+async def process_quantity_input(message: Message, state: FSMContext, user: User, session: AsyncSession):
     """Обработать введенное количество"""
     data = await state.get_data()
     dish_id = data.get("dish_id")
@@ -211,42 +190,44 @@ async def process_quantity_input(message: Message, state: FSMContext, user: User
         return
     
     # Добавляем в корзину
-    async with async_session_maker() as session:
-        try:
-            from app.services.cart import CartService
+    try:
+        from app.services.cart import CartService
+        
+        # Добавляем товар в корзину
+        item = await CartService.add_item_to_cart(
+            session, user.id, dish_id, quantity
+        )
+        await session.commit()
+        
+        # Получаем информацию о блюде для уведомления
+        catalog = await catalog_cache.get()
+        dish = catalog.get_dish(dish_id)
+        if dish:
+            from app.utils.helpers import format_price
+            total_price = dish.price * quantity
+            await message.answer(
+                f"✅ {dish.name} (x{quantity}) добавлено в корзину!\n"
+                f"💰 Сумма: {format_price(total_price)}"
+            )
             
-            # Добавляем товар в корзину
-            item = await CartService.add_item_to_cart(
-                session, user.id, dish_id, quantity
+            # Возвращаемся к деталям блюда
+            await message.answer(
+                texts.DISH_MESSAGE.format(
+                    dish_name=dish.name,
+                    description=dish.description,
+                    price=format_price(dish.price)
+                ),
+                reply_markup=get_dish_detail_keyboard(dish.id, category_id, dish, catalog.version)
             )
-            await session.commit()
+        else:
+            await message.answer("✅ Товар добавлен в корзину!")
             
-            # Получаем информацию о блюде для уведомления
-            dish = await session.get(Dish, dish_id)
-            if dish:
-                from app.utils.helpers import format_price
-                total_price = dish.price * quantity
-                await message.answer(
-                    f"✅ {dish.name} (x{quantity}) добавлено в корзину!\n"
-                    f"💰 Сумма: {format_price(total_price)}"
-                )
-                
-                # Возвращаемся к деталям блюда
-                await message.answer(
-                    texts.DISH_MESSAGE.format(
-                        dish_name=dish.name,
-                        description=dish.description,
-                        price=format_price(dish.price)
-                    ),
-                    reply_markup=get_dish_detail_keyboard(dish.id, category_id, dish)
-                )
-            else:
-                await message.answer("✅ Товар добавлен в корзину!")
-                
-        except ValueError as e:
-            await message.answer(f"❌ {str(e)}")
-        except Exception as e:
-            await message.answer("❌ Ошибка добавления в корзину")
+    except ValueError as e:
+        await session.rollback()
+        await message.answer(f"❌ {str(e)}")
+    except Exception as e:
+        await session.rollback()
+        await message.answer("❌ Ошибка добавления в корзину")
     
     # Очищаем состояние
     await state.clear()
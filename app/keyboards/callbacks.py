@@ -0,0 +1,104 @@
+"""Callback data кнопок бота.
+
+Все маршруты в одном месте: клавиатуры собирают callback data через
+pack(), обработчики регистрируются на те же маршруты и получают
+разобранные поля аргументами. Формат строк прежний (prefix_поле_поле),
+поэтому кнопки в уже отправленных сообщениях продолжают работать.
+"""
+from app.utils.callbacks import CallbackRoute
+
+# Общие
+MAIN_MENU = CallbackRoute("main_menu")
+NO_ACTION = CallbackRoute("no_action")
+
+# Меню
+MENU = CallbackRoute("menu")
+CATEGORY = CallbackRoute("category", category_id=int)
+DISH = CallbackRoute("dish", dish_id=int)
+DISH_UNAVAILABLE = CallbackRoute("dish_unavailable")
+ADD_TO_CART = CallbackRoute("add_to_cart", dish_id=int, quantity=int)
+INPUT_QUANTITY = CallbackRoute("input_quantity", dish_id=int, category_id=int)
+
+# Корзина
+CART = CallbackRoute("cart")
+EDIT_CART_ITEM = CallbackRoute("edit_cart_item", item_id=int)
+CART_INCREASE = CallbackRoute("cart_increase", item_id=int)
+CART_DECREASE = CallbackRoute("cart_decrease", item_id=int)
+CART_SET = CallbackRoute("cart_set", item_id=int, quantity=int)
+CART_REMOVE = CallbackRoute("cart_remove", item_id=int)
+CLEAR_CART = CallbackRoute("clear_cart")
+CONFIRM_CLEAR_CART = CallbackRoute("confirm_clear_cart")
+CANCEL_CLEAR_CART = CallbackRoute("cancel_clear_cart")
+
+# Оформление и заказы пользователя
+CHECKOUT = CallbackRoute("checkout")
+CONFIRM_ORDER = CallbackRoute("confirm_order")
+PAYMENT_CARD = CallbackRoute("payment_card")
+RETRY_SCREENSHOT = CallbackRoute("retry_screenshot")
+ORDER = CallbackRoute("order", order_id=int)
+ORDER_DETAILS = CallbackRoute("order_details", order_id=int)
+CANCEL_ORDER = CallbackRoute("cancel_order", order_id=int)
+CANCEL_ORDER_CONFIRM = CallbackRoute("cancel_order_confirm", order_id=int)
+CANCEL_ORDER_FINAL = CallbackRoute("cancel_order_final", order_id=int)
+REPEAT_ORDER = CallbackRoute("repeat_order", order_id=int)
+REPEAT_ORDER_SKIP = CallbackRoute("repeat_order_skip", order_id=int)
+REPEAT_SAVED_ORDER = CallbackRoute("repeat_saved_order", order_id=int)
+BACK_TO_ORDERS = CallbackRoute("back_to_orders")
+BACK_TO_ORDER_FILTERS = CallbackRoute("back_to_order_filters")
+ORDERS_ACTIVE = CallbackRoute("orders_active")
+ORDERS_COMPLETED = CallbackRoute("orders_completed")
+ORDERS_SAVED = CallbackRoute("orders_saved")
+ORDERS_ALL = CallbackRoute("orders_all")
+
+# FAQ
+FAQ = CallbackRoute("faq")
+FAQ_SECTION = CallbackRoute("faq", section=str)
+CONTACT_US = CallbackRoute("contact_us")
+
+# Админ-панель: заказы
+BACK_TO_ADMIN_PANEL = CallbackRoute("back_to_admin_panel")
+ADMIN_ORDERS_MENU = CallbackRoute("admin_orders_menu")
+ADMIN_PENDING_ORDERS = CallbackRoute("admin_pending_orders")
+ADMIN_ALL_ORDERS = CallbackRoute("admin_all_orders")
+FILTER_ORDERS = CallbackRoute("filter_orders", filter_type=str)
+# direction: o - старее курсора, n - новее
+ORDERS_PAGE = CallbackRoute("orders_page", filter_type=str, direction=str, cursor=int)
+ADMIN_ORDER = CallbackRoute("admin_order", order_id=int)
+ADMIN_COMPLETE = CallbackRoute("admin_complete", order_id=int)
+ADMIN_CANCEL = CallbackRoute("admin_cancel", order_id=int)
+CONFIRM_PAYMENT = CallbackRoute("confirm_payment", order_id=int)
+REJECT_PAYMENT = CallbackRoute("reject_payment", order_id=int)
+SHOW_PAYMENT_PHOTO = CallbackRoute("show_payment_photo", order_id=int)
+ADMIN_CONFIRM_ORDER = CallbackRoute("confirm_order", order_id=int)
+ADMIN_REJECT_ORDER = CallbackRoute("reject_order", order_id=int)
+CHANGE_STATUS = CallbackRoute("change_status", order_id=int)
+SET_STATUS = CallbackRoute("set_status", order_id=int, new_status=str)
+SET_READY = CallbackRoute("set_ready", order_id=int)
+SET_COMPLETED = CallbackRoute("set_completed", order_id=int)
+CANCEL_BY_MASTER = CallbackRoute("cancel_by_master", order_id=int)
+
+# Админ-панель: статистика
+ADMIN_STATS = CallbackRoute("admin_stats")
+STATS = CallbackRoute("stats", period=str)
+
+# Админ-панель: меню
+ADMIN_MENU = CallbackRoute("admin_menu")
+ADMIN_CATEGORIES = CallbackRoute("admin_categories")
+ADMIN_DISHES = CallbackRoute("admin_dishes")
+ADD_CATEGORY = CallbackRoute("add_category")
+EDIT_CATEGORY = CallbackRoute("edit_category", category_id=int)
+TOGGLE_CATEGORY = CallbackRoute("toggle_category", category_id=int)
+RENAME_CATEGORY = CallbackRoute("rename_category", category_id=int)
+DELETE_CATEGORY = CallbackRoute("delete_category", category_id=int)
+CONFIRM_DELETE_CATEGORY = CallbackRoute("confirm_delete_category", category_id=int)
+DISHES_IN_CATEGORY = CallbackRoute("dishes_in_category", category_id=int)
+ADD_DISH = CallbackRoute("add_dish")
+ADD_DISH_TO_CATEGORY = CallbackRoute("add_dish", category_id=int)
+EDIT_DISH = CallbackRoute("edit_dish", dish_id=int)
+EDIT_DISH_NAME = CallbackRoute("edit_dish_name", dish_id=int)
+EDIT_DISH_PRICE = CallbackRoute("edit_dish_price", dish_id=int)
+EDIT_DISH_DESCRIPTION = CallbackRoute("edit_dish_description", dish_id=int)
+EDIT_DISH_LINK = CallbackRoute("edit_dish_link", dish_id=int)
+TOGGLE_DISH = CallbackRoute("toggle_dish", dish_id=int)
+DELETE_DISH = CallbackRoute("delete_dish", dish_id=int)
+CONFIRM_DELETE_DISH = CallbackRoute("confirm_delete_dish", dish_id=int)
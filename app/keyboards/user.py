@@ -4,12 +4,56 @@ from aiogram.types import (
     InlineKeyboardMarkup, InlineKeyboardButton
 )
 from aiogram.utils.keyboard import ReplyKeyboardBuilder, InlineKeyboardBuilder
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Optional
 from app.utils import texts
+from app.keyboards.callbacks import (
+    ADD_TO_CART, CANCEL_ORDER_CONFIRM, CART_DECREASE, CART_INCREASE, CART_REMOVE, CART_SET,
+    CATEGORY, DISH, DISH_UNAVAILABLE, EDIT_CART_ITEM, INPUT_QUANTITY, ORDER, REPEAT_ORDER,
+    REPEAT_SAVED_ORDER
+)
+
+
+class KeyboardCache:
+    """Кэш готовых клавиатур каталога.
+    
+    Разметка aiogram неизменяема (frozen pydantic-модели), поэтому один и
+    тот же объект можно отдавать всем пользователям. Ключ - версия каталога
+    и параметры клавиатуры; при смене версии кэш целиком сбрасывается.
+    """
+    
+    def __init__(self, max_size: int = 2048):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._version: Optional[int] = None
+        self._markups: Dict[Hashable, Any] = {}
+    
+    def get(self, version: int, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Получить клавиатуру из кэша или построить ее"""
+        if version != self._version:
+            self._version = version
+            self._markups.clear()
+        
+        markup = self._markups.get(key)
+        if markup is not None:
+            self.hits += 1
+            return markup
+        
+        self.misses += 1
+        markup = build()
+        if len(self._markups) < self.max_size:
+            self._markups[key] = markup
+        return markup
+
+
+# Глобальный кэш клавиатур каталога
+keyboard_cache = KeyboardCache()
 
 
+@lru_cache(maxsize=128)
 def get_main_menu_keyboard(cart_count: int = 0) -> ReplyKeyboardMarkup:
-    """Основное меню пользователя"""
+    """Основное меню пользователя (кэшируется по количеству товаров в корзине)"""
     builder = ReplyKeyboardBuilder()
     
     # Кнопка корзины с количеством товаров
@@ -32,15 +76,21 @@ def get_main_menu_keyboard(cart_count: int = 0) -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
-def get_categories_keyboard(categories) -> InlineKeyboardMarkup:
+def get_categories_keyboard(categories, catalog_version: Optional[int] = None) -> InlineKeyboardMarkup:
     """Клавиатура с категориями блюд"""
+    if catalog_version is not None:
+        return keyboard_cache.get(
+            catalog_version, ("categories",),
+            lambda: get_categories_keyboard(categories)
+        )
+    
     builder = InlineKeyboardBuilder()
     
     for category in categories:
         builder.row(
             InlineKeyboardButton(
                 text=f"{category.name}",
-                callback_data=f"category_{category.id}"
+                callback_data=CATEGORY.pack(category.id)
             )
         )
     
@@ -54,8 +104,14 @@ def get_categories_keyboard(categories) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def get_dishes_keyboard(dishes, category_id: int) -> InlineKeyboardMarkup:
+def get_dishes_keyboard(dishes, category_id: int, catalog_version: Optional[int] = None) -> InlineKeyboardMarkup:
     """Клавиатура с блюдами категории"""
+    if catalog_version is not None:
+        return keyboard_cache.get(
+            catalog_version, ("dishes", category_id),
+            lambda: get_dishes_keyboard(dishes, category_id)
+        )
+    
     builder = InlineKeyboardBuilder()
     
     for dish in dishes:
@@ -67,7 +123,7 @@ def get_dishes_keyboard(dishes, category_id: int) -> InlineKeyboardMarkup:
         builder.row(
             InlineKeyboardButton(
                 text=dish_text,
-                callback_data=f"dish_{dish.id}" if dish.is_available else "dish_unavailable"
+                callback_data=DISH.pack(dish.id) if dish.is_available else DISH_UNAVAILABLE.pack()
             )
         )
     
@@ -85,8 +141,19 @@ def get_dishes_keyboard(dishes, category_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def get_dish_detail_keyboard(dish_id: int, category_id: int, dish=None) -> InlineKeyboardMarkup:
+def get_dish_detail_keyboard(
+    dish_id: int, 
+    category_id: int, 
+    dish=None, 
+    catalog_version: Optional[int] = None
+) -> InlineKeyboardMarkup:
     """Клавиатура для деталей блюда"""
+    if catalog_version is not None:
+        return keyboard_cache.get(
+            catalog_version, ("dish", dish_id, category_id),
+            lambda: get_dish_detail_keyboard(dish_id, category_id, dish)
+        )
+    
     builder = InlineKeyboardBuilder()
     
     # Кнопки для выбора количества
@@ -97,7 +164,7 @@ def get_dish_detail_keyboard(dish_id: int, category_id: int, dish=None) -> Inlin
         quantity_buttons.append(
             InlineKeyboardButton(
                 text=str(qty),
-                callback_data=f"add_to_cart_{dish_id}_{qty}"
+                callback_data=ADD_TO_CART.pack(dish_id, qty)
             )
         )
     
@@ -109,7 +176,7 @@ def get_dish_detail_keyboard(dish_id: int, category_id: int, dish=None) -> Inlin
     builder.row(
         InlineKeyboardButton(
             text="✏️ Ввести количество",
-            callback_data=f"input_quantity_{dish_id}_{category_id}"
+            callback_data=INPUT_QUANTITY.pack(dish_id, category_id)
         )
     )
     
@@ -125,7 +192,7 @@ def get_dish_detail_keyboard(dish_id: int, category_id: int, dish=None) -> Inlin
     builder.row(
         InlineKeyboardButton(
             text=texts.BUTTON_BACK,
-            callback_data=f"category_{category_id}"
+            callback_data=CATEGORY.pack(category_id)
         ),
         InlineKeyboardButton(
             text=texts.BUTTON_MAIN_MENU,
@@ -146,7 +213,7 @@ def get_cart_keyboard(cart_items) -> InlineKeyboardMarkup:
             builder.row(
                 InlineKeyboardButton(
                     text=f"✏️ {item.dish.name} (x{item.quantity})",
-                    callback_data=f"edit_cart_item_{item.id}"
+                    callback_data=EDIT_CART_ITEM.pack(item.id)
                 )
             )
         
@@ -183,17 +250,17 @@ def get_cart_item_edit_keyboard(item_id: int) -> InlineKeyboardMarkup:
     
     # Кнопки изменения количества
     builder.row(
-        InlineKeyboardButton(text="-", callback_data=f"cart_decrease_{item_id}"),
-        InlineKeyboardButton(text="1", callback_data=f"cart_set_{item_id}_1"),
-        InlineKeyboardButton(text="2", callback_data=f"cart_set_{item_id}_2"),
-        InlineKeyboardButton(text="3", callback_data=f"cart_set_{item_id}_3"),
-        InlineKeyboardButton(text="+", callback_data=f"cart_increase_{item_id}")
+        InlineKeyboardButton(text="-", callback_data=CART_DECREASE.pack(item_id)),
+        InlineKeyboardButton(text="1", callback_data=CART_SET.pack(item_id, 1)),
+        InlineKeyboardButton(text="2", callback_data=CART_SET.pack(item_id, 2)),
+        InlineKeyboardButton(text="3", callback_data=CART_SET.pack(item_id, 3)),
+        InlineKeyboardButton(text="+", callback_data=CART_INCREASE.pack(item_id))
     )
     
     builder.row(
         InlineKeyboardButton(
             text=texts.BUTTON_REMOVE_ITEM,
-            callback_data=f"cart_remove_{item_id}"
+            callback_data=CART_REMOVE.pack(item_id)
         )
     )
     
@@ -300,7 +367,7 @@ def get_orders_keyboard(orders, filter_type="all") -> InlineKeyboardMarkup:
         builder.row(
             InlineKeyboardButton(
                 text=order_text,
-                callback_data=f"order_{order.id}"
+                callback_data=ORDER.pack(order.id)
             )
         )
     
@@ -349,7 +416,7 @@ def get_order_details_keyboard(order_id: int, can_repeat: bool = False, can_canc
         builder.row(
             InlineKeyboardButton(
                 text=texts.BUTTON_REPEAT_ORDER,
-                callback_data=f"repeat_order_{order_id}"
+                callback_data=REPEAT_ORDER.pack(order_id)
             )
         )
     
@@ -357,7 +424,7 @@ def get_order_details_keyboard(order_id: int, can_repeat: bool = False, can_canc
         builder.row(
             InlineKeyboardButton(
                 text="❌ Отменить заказ",
-                callback_data=f"cancel_order_confirm_{order_id}"
+                callback_data=CANCEL_ORDER_CONFIRM.pack(order_id)
             )
         )
     
@@ -411,7 +478,7 @@ def get_saved_orders_keyboard(saved_orders) -> InlineKeyboardMarkup:
             builder.row(
                 InlineKeyboardButton(
                     text=order_text,
-                    callback_data=f"repeat_saved_order_{order.id}"
+                    callback_data=REPEAT_SAVED_ORDER.pack(order.id)
                 )
             )
     else:
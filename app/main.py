@@ -4,23 +4,73 @@
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.base import BaseEventIsolation, BaseStorage
+from aiogram.fsm.storage.memory import DisabledEventIsolation, MemoryStorage
 
 from app.config import settings
 from app.database import init_database, close_database
 from app.handlers import register_all_handlers
-from app.middlewares import register_all_middlewares
+from app.middlewares import register_all_middlewares, register_bot_middlewares
+from app.services.cart_taps import cart_taps
+from app.services.fsm_storage import DatabaseStorage
+from app.services.outbox import outbox_worker
+from app.services.perf import perf_stats
+from app.services.screenshots import screenshot_store
+from app.services.update_lanes import UpdateLanes
+from app.services.user_cache import user_cache
+from app.webhook import run_webhook
 
 
-async def on_startup():
+def create_storage() -> BaseStorage:
+    """Хранилище состояний FSM по настройке FSM_STORAGE"""
+    if settings.fsm_storage == "memory":
+        return MemoryStorage()
+    if settings.fsm_storage != "database":
+        logging.warning(f"Неизвестное FSM_STORAGE={settings.fsm_storage}, используется database")
+    return DatabaseStorage(
+        max_size=settings.fsm_cache_size,
+        ttl=settings.fsm_cache_ttl,
+        flush_interval=settings.fsm_flush_interval
+    )
+
+
+def create_events_isolation() -> BaseEventIsolation:
+    """Изоляция апдейтов по настройке UPDATE_LANES"""
+    if not settings.update_lanes:
+        return DisabledEventIsolation()
+    return UpdateLanes(max_pending=settings.update_lane_max_pending)
+
+
+async def on_startup(bot: Bot):
     """Действия при запуске бота"""
     logging.info("Инициализация базы данных...")
     await init_database()
     logging.info("База данных инициализирована")
+    
+    # Отправка уведомлений из outbox, включая оставшиеся с прошлого запуска
+    outbox_worker.start(bot)
+    
+    # Периодическая очистка старых скриншотов оплаты
+    screenshot_store.start_sweeper()
+    
+    # Выгрузка метрик обработчиков в файл и/или на порт
+    await perf_stats.start_exporter()
 
 
-async def on_shutdown():
+async def on_shutdown(storage: BaseStorage):
     """Действия при остановке бота"""
+    logging.info("Остановка отправки уведомлений...")
+    await outbox_worker.close()
+    await screenshot_store.close()
+    await perf_stats.close()
+    
+    logging.info("Запись отложенных изменений пользователей...")
+    await cart_taps.close()
+    await user_cache.close()
+    
+    logging.info("Сохранение состояний FSM...")
+    await storage.close()
+    
     logging.info("Закрытие соединения с базой данных...")
     await close_database()
     logging.info("Соединение с базой данных закрыто")
@@ -38,23 +88,29 @@ async def main():
     
     # Создание бота и диспетчера
     bot = Bot(token=settings.bot_token)
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    storage = create_storage()
+    dp = Dispatcher(storage=storage, events_isolation=create_events_isolation())
     
     # Регистрация middleware и обработчиков
     register_all_middlewares(dp)
+    register_bot_middlewares(bot)
     register_all_handlers(dp)
     
     # Действия при запуске
-    await on_startup()
+    await on_startup(bot)
     
     try:
         # Запуск бота
-        logging.info("Бот запущен и готов к работе!")
-        await dp.start_polling(bot, skip_updates=True)
+        logging.info(f"Бот запущен и готов к работе! Режим: {settings.bot_mode}")
+        if settings.bot_mode == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            # Webhook, оставшийся от запуска в режиме webhook, мешает getUpdates
+            await bot.delete_webhook()
+            await dp.start_polling(bot, skip_updates=True)
     finally:
         # Действия при остановке
-        await on_shutdown()
+        await on_shutdown(storage)
         await bot.session.close()
 
 
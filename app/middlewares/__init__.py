@@ -1,14 +1,38 @@
 """Регистрация всех middleware"""
-from aiogram import Dispatcher
+from aiogram import Bot, Dispatcher
+
+from app.config import settings
 from .auth import AuthMiddleware
-from .admin import AdminMiddleware
+from .cart_taps import CartTapsMiddleware
+from .db import DbSessionMiddleware
+from .edit_cache import SkipUnchangedEditMiddleware
+from .perf import PerfMiddleware, PerfHandlerMiddleware, PerfRequestMiddleware
 
 
 def register_all_middlewares(dp: Dispatcher):
     """Регистрация всех middleware"""
-    # Порядок важен - auth должен быть первым
+    # Замер всего апдейта, включая фильтры и остальные middleware
+    dp.update.outer_middleware(PerfMiddleware())
+    
+    # Порядок важен - сначала дописываются нажатия корзины, затем
+    # открывается сессия БД, за ней auth
+    dp.message.middleware(CartTapsMiddleware())
+    dp.callback_query.middleware(CartTapsMiddleware())
+    
+    dp.message.middleware(DbSessionMiddleware())
+    dp.callback_query.middleware(DbSessionMiddleware())
+    
     dp.message.middleware(AuthMiddleware())
     dp.callback_query.middleware(AuthMiddleware())
     
-    dp.message.middleware(AdminMiddleware())
-    dp.callback_query.middleware(AdminMiddleware())
+    dp.message.middleware(PerfHandlerMiddleware())
+    dp.callback_query.middleware(PerfHandlerMiddleware())
+
+
+def register_bot_middlewares(bot: Bot):
+    """Регистрация middleware сессии бота (вызовы Telegram API)"""
+    # Пропущенная правка не считается вызовом API, поэтому проверка - снаружи замера.
+    # Кэш правок - только для одного процесса бота, то есть для polling
+    if settings.edit_cache_size and settings.bot_mode == "polling":
+        bot.session.middleware(SkipUnchangedEditMiddleware())
+    bot.session.middleware(PerfRequestMiddleware())
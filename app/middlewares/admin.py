@@ -2,12 +2,23 @@
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
+from sqlalchemy import select
+
+from app.database import async_session_maker, User
 from app.utils.helpers import is_admin
 
 
 class AdminMiddleware(BaseMiddleware):
-    """Middleware для проверки прав администратора"""
-    
+    """Middleware для проверки прав администратора.
+
+    Флаг users.is_admin читается из БД на каждый админский апдейт, а не
+    берется из закэшированного пользователя: права, выданные или снятые
+    в БД, действуют сразу. Администраторы из ADMIN_IDS запроса не делают.
+
+    Регистрируется только на админском роутере - запрос выполняется для
+    апдейтов, дошедших до админских обработчиков, а не для каждого апдейта.
+    """
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
@@ -15,11 +26,19 @@ class AdminMiddleware(BaseMiddleware):
         data: Dict[str, Any]
     ) -> Any:
         user = data.get("user")
-        
+
         if user:
             # Проверяем, является ли пользователь админом
-            data["is_admin"] = is_admin(user.telegram_id) or user.is_admin
+            data["is_admin"] = is_admin(user.telegram_id) or await self._is_admin_in_db(user, data.get("session"))
         else:
             data["is_admin"] = False
-        
+
         return await handler(event, data)
+
+    @staticmethod
+    async def _is_admin_in_db(user: User, session) -> bool:
+        query = select(User.is_admin).where(User.id == user.id)
+        if session is None:
+            async with async_session_maker() as own_session:
+                return bool(await own_session.scalar(query))
+        return bool(await session.scalar(query))
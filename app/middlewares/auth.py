@@ -2,14 +2,13 @@
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, User as TgUser
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import async_session_maker, User
+from app.services.user_cache import user_cache
 
 
 class AuthMiddleware(BaseMiddleware):
     """Middleware для создания/обновления пользователей в БД"""
-    
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
@@ -18,36 +17,10 @@ class AuthMiddleware(BaseMiddleware):
     ) -> Any:
         # Получаем пользователя из события
         telegram_user: TgUser = data.get("event_from_user")
-        
+
         if telegram_user:
-            async with async_session_maker() as session:
-                # Ищем пользователя в БД
-                from sqlalchemy import select
-                result = await session.execute(
-                    select(User).where(User.telegram_id == telegram_user.id)
-                )
-                user = result.scalar_one_or_none()
-                
-                if not user:
-                    # Создаем нового пользователя
-                    user = User(
-                        telegram_id=telegram_user.id,
-                        username=telegram_user.username,
-                        first_name=telegram_user.first_name,
-                        last_name=telegram_user.last_name,
-                        is_admin=False  # Администраторы назначаются через настройки
-                    )
-                    session.add(user)
-                else:
-                    # Обновляем данные существующего пользователя
-                    user.username = telegram_user.username
-                    user.first_name = telegram_user.first_name
-                    user.last_name = telegram_user.last_name
-                
-                await session.commit()
-                await session.refresh(user)
-                
-                # Добавляем пользователя в данные для обработчика
-                data["user"] = user
-        
+            # Пользователь берется из кэша; в БД пишем только новых пользователей
+            # и изменившиеся данные профиля (пачкой, в фоне)
+            data["user"] = await user_cache.get_user(telegram_user, data.get("session"))
+
         return await handler(event, data)
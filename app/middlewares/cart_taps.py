@@ -0,0 +1,28 @@
+"""Middleware: незаписанные нажатия корзины применяются до следующего апдейта"""
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject
+
+from app.services.cart_taps import cart_taps
+
+
+class CartTapsMiddleware(BaseMiddleware):
+    """Перед обработчиком без флага cart_tap применяет нажатия +/- пользователя.
+
+    Нажатия в корзине копятся в cart_taps и пишутся по таймеру. Если
+    за ними сразу пришел другой апдейт (оформление, корзина, удаление
+    позиции), он должен видеть количество с учетом нажатий - поэтому
+    пачка применяется здесь, до открытия сессии апдейта.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        from_user = data.get("event_from_user")
+        if from_user and not get_flag(data, "cart_tap"):
+            await cart_taps.drain(from_user.id)
+        return await handler(event, data)
@@ -0,0 +1,38 @@
+"""Middleware единицы работы: одна сессия БД на апдейт"""
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.database import async_session_maker
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Открывает одну сессию на апдейт и передает ее обработчику как session.
+
+    Сессия создается до AuthMiddleware, поэтому пользователь, которого
+    нет в кэше, читается ею же. Соединение берется из пула при первом
+    запросе и возвращается один раз, при закрытии сессии.
+
+    Обработчик может зафиксировать изменения сам (session.commit()),
+    если данные должны попасть в БД до ответа пользователю, - заодно
+    очередь записи SQLite не ждет вызовов Telegram API. Оставшиеся
+    изменения middleware фиксирует после обработчика, при исключении -
+    откатывает. Апдейт без записи обходится без COMMIT.
+    """
+
+    def __init__(self, session_maker=async_session_maker):
+        self.session_maker = session_maker
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self.session_maker() as session:
+            data["session"] = session
+            result = await handler(event, data)
+            # Обработчик мог перехватить ошибку БД - незавершенную транзакцию не фиксируем
+            if session.has_writes and session.is_active:
+                await session.commit()
+            return result
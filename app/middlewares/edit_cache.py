@@ -0,0 +1,79 @@
+"""Middleware сессии бота: правки сообщений без изменений не отправляются"""
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import (
+    DeleteMessage, EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup, EditMessageText
+)
+
+from app.services.edit_cache import EditCache, TARGET_FIELDS, edit_cache, fingerprint
+
+TEXT, MARKUP = 0, 1
+
+# Ответ Telegram на правку, которая ничего не меняет
+NOT_MODIFIED = (
+    "Bad Request: message is not modified: specified new message content and reply markup "
+    "are exactly the same as a current content and reply markup of the message"
+)
+
+
+class SkipUnchangedEditMiddleware(BaseRequestMiddleware):
+    """Сравнивает edit_text/edit_reply_markup с тем, что бот уже выставил сообщению.
+
+    Если отпечаток совпал (например, "🔄 Обновить", когда ничего не
+    изменилось), запрос в Telegram не уходит, а вызов возвращает тот же
+    Message, что и прошлая правка этим содержимым, - обработчик
+    продолжает, как после успешной правки. Если содержимое известно
+    только по ответу "message is not modified", вызов поднимает ту же
+    ошибку, что вернул бы Telegram. Иначе правка отправляется, а ее
+    содержимое и ответ запоминаются. Правка подписи или медиа и удаление
+    сообщения сбрасывают запись.
+
+    Регистрируется только в режиме polling: в webhook-режиме процессов
+    бота может быть несколько, и правку другого процесса кэш не увидит.
+    """
+
+    def __init__(self, cache: EditCache = edit_cache):
+        self.cache = cache
+
+    async def __call__(self, make_request, bot, method):
+        if isinstance(method, EditMessageText):
+            part = TEXT
+        elif isinstance(method, EditMessageReplyMarkup):
+            part = MARKUP
+        else:
+            if isinstance(method, (EditMessageCaption, EditMessageMedia, DeleteMessage)):
+                self.cache.forget(self._key(method))
+            return await make_request(bot, method)
+
+        key = self._key(method)
+        markup = fingerprint(method.reply_markup.model_dump() if method.reply_markup else None)
+        digest = fingerprint(method.model_dump(exclude=TARGET_FIELDS)) if part == TEXT else markup
+        if self.cache.is_unchanged(key, part, digest):
+            result = self.cache.result(key)
+            if result is None:
+                raise TelegramBadRequest(method=method, message=NOT_MODIFIED)
+            return result
+
+        try:
+            result = await make_request(bot, method)
+        except TelegramBadRequest as e:
+            if "message is not modified" in str(e).lower():
+                self._remember(key, part, digest, markup, None)
+            else:
+                self.cache.forget(key)
+            raise
+        except Exception:
+            self.cache.forget(key)
+            raise
+
+        self._remember(key, part, digest, markup, result)
+        return result
+
+    def _key(self, method):
+        return self.cache.message_key(
+            method.chat_id, method.message_id, getattr(method, "inline_message_id", None)
+        )
+
+    def _remember(self, key, part: int, digest: bytes, markup: bytes, result):
+        # Отпечаток текста включает клавиатуру - после смены одной клавиатуры он неизвестен
+        self.cache.remember(key, digest if part == TEXT else None, markup, result)
@@ -0,0 +1,65 @@
+"""Middleware для замера времени и нагрузки обработчиков"""
+import time
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import TelegramObject
+
+from app.services.perf import Sample, current_sample, perf_stats
+
+
+class PerfMiddleware(BaseMiddleware):
+    """Внешний middleware апдейта: замер времени, SQL-запросов и вызовов API.
+
+    Регистрируется на dp.update, поэтому учитывает и фильтры, и остальные
+    middleware. Имя обработчика проставляет PerfHandlerMiddleware.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        sample = Sample()
+        token = current_sample.set(sample)
+        started = time.perf_counter()
+        error = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            error = True
+            raise
+        finally:
+            sample.closed = True
+            current_sample.reset(token)
+            perf_stats.record(sample, time.perf_counter() - started, error)
+
+
+class PerfHandlerMiddleware(BaseMiddleware):
+    """Внутренний middleware: запоминает, какой обработчик выбран для апдейта"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        sample = current_sample.get()
+        handler_object = data.get("handler")
+        if sample is not None and handler_object is not None:
+            callback = handler_object.callback
+            module = callback.__module__.removeprefix("app.handlers.")
+            sample.handler = f"{module}:{callback.__name__}"
+
+        return await handler(event, data)
+
+
+class PerfRequestMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: считает вызовы Telegram API текущего апдейта"""
+
+    async def __call__(self, make_request, bot, method):
+        sample = current_sample.get()
+        if sample is not None and not sample.closed:
+            sample.api_calls += 1
+        return await make_request(bot, method)
@@ -0,0 +1,141 @@
+"""Запросы админ-панели к заказам"""
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.orm import aliased, joinedload
+
+from app.database.models import Order, OrderItem, OrderStatus
+
+
+# Статусы отмененных заказов (фильтр "Отмененные")
+CANCELLED_STATUSES = [
+    OrderStatus.CANCELLED_BY_CLIENT.value,
+    OrderStatus.CANCELLED_BY_MASTER.value
+]
+
+# Размер страницы в списках заказов админки
+ORDERS_PAGE_SIZE = 10
+
+
+class OrdersPage(NamedTuple):
+    """Страница заказов и наличие соседних страниц"""
+    orders: List[Order]
+    has_newer: bool
+    has_older: bool
+
+
+class AdminOrderService:
+    """Списки и карточки заказов для админ-панели.
+
+    Каждый метод выполняет ровно один SQL-запрос: пользователь
+    (и позиции с блюдами для карточки) подтягиваются JOIN-ом.
+    """
+
+    @staticmethod
+    async def get_orders(
+        session,
+        statuses: Optional[Sequence[str]] = None,
+        exclude_cart: bool = True,
+        limit: Optional[int] = 20
+    ) -> List[Order]:
+        """Получить последние заказы с пользователями"""
+        query = (
+            select(Order)
+            .options(joinedload(Order.user))
+            .order_by(Order.created_at.desc(), Order.id.desc())
+        )
+
+        if statuses:
+            query = query.where(Order.status.in_(list(statuses)))
+        elif exclude_cart:
+            query = query.where(Order.status != OrderStatus.CART.value)
+
+        if limit:
+            query = query.limit(limit)
+
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_orders_page(
+        session,
+        statuses: Optional[Sequence[str]] = None,
+        older_than: Optional[int] = None,
+        newer_than: Optional[int] = None,
+        page_size: int = ORDERS_PAGE_SIZE
+    ) -> OrdersPage:
+        """Получить страницу заказов (от новых к старым) по курсору.
+
+        Курсор - ID заказа на границе соседней страницы: older_than
+        листает к более старым заказам, newer_than - к более новым.
+        Сравнение идет по паре (created_at, id) и опирается на индекс,
+        поэтому любая страница стоит столько же, сколько первая.
+        """
+        sort_key = tuple_(Order.created_at, Order.id)
+        query = select(Order).options(joinedload(Order.user))
+        if statuses:
+            query = query.where(Order.status.in_(list(statuses)))
+
+        cursor_id = newer_than if newer_than is not None else older_than
+        if cursor_id is not None:
+            cursor_order = aliased(Order)
+            cursor_created_at = (
+                select(cursor_order.created_at)
+                .where(cursor_order.id == cursor_id)
+                .scalar_subquery()
+            )
+            cursor_key = tuple_(cursor_created_at, cursor_id)
+            if newer_than is not None:
+                query = query.where(sort_key > cursor_key)
+            else:
+                query = query.where(sort_key < cursor_key)
+
+        if newer_than is not None:
+            # Идем "назад": берем ближайшие более новые и разворачиваем
+            query = query.order_by(Order.created_at.asc(), Order.id.asc())
+        else:
+            query = query.order_by(Order.created_at.desc(), Order.id.desc())
+
+        # Лишняя запись показывает, есть ли еще страница в направлении движения
+        result = await session.execute(query.limit(page_size + 1))
+        orders = list(result.scalars().all())
+        has_more = len(orders) > page_size
+        orders = orders[:page_size]
+
+        if newer_than is not None:
+            orders.reverse()
+            return OrdersPage(orders, has_newer=has_more, has_older=True)
+
+        return OrdersPage(orders, has_newer=older_than is not None, has_older=has_more)
+
+    @staticmethod
+    async def count_by_status(session) -> Dict[str, int]:
+        """Количество заказов по статусам одним GROUP BY (без корзин)"""
+        result = await session.execute(
+            select(Order.status, func.count(Order.id))
+            .where(Order.status != OrderStatus.CART.value)
+            .group_by(Order.status)
+        )
+        return {status: count for status, count in result}
+
+    @staticmethod
+    async def get_order_details(session, order_id: int) -> Optional[Order]:
+        """Получить заказ с пользователем, позициями и блюдами"""
+        result = await session.execute(
+            select(Order)
+            .options(
+                joinedload(Order.user),
+                joinedload(Order.items).joinedload(OrderItem.dish)
+            )
+            .where(Order.id == order_id)
+        )
+        return result.unique().scalar_one_or_none()
+
+    @staticmethod
+    def format_customer(user) -> str:
+        """Подпись клиента в списках: @username или Telegram ID"""
+        if not user:
+            return "Неизвестен"
+        if user.username:
+            return f"@{user.username}"
+        return f"ID: {user.telegram_id}"
@@ -0,0 +1,152 @@
+"""Параллельная рассылка сообщений с учетом лимитов Telegram"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramRetryAfter,
+    TelegramUnauthorizedError
+)
+
+from app.config import settings
+
+
+class SendResult(NamedTuple):
+    """Результат отправки одному получателю"""
+    chat_id: int
+    ok: bool
+    attempts: int
+    error: Optional[str] = None
+    message: Any = None
+    # False - повтор не поможет (бот заблокирован, неверный запрос)
+    retryable: bool = True
+
+
+# Ошибки, после которых повторять отправку бессмысленно
+PERMANENT_ERRORS = (
+    TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramUnauthorizedError
+)
+
+
+class TokenBucket:
+    """Token bucket: rate токенов в секунду, запас до capacity.
+
+    Токен резервируется сразу (счетчик может уйти в минус), а ожидание
+    считается по очереди резервирования - конкурирующие отправки
+    получают слоты по порядку без блокировок.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Занять токен и вернуть, сколько секунд ждать до его выдачи"""
+        self._refill()
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Не выдавать токены ближайшие seconds секунд (flood wait)"""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self._tokens >= self.capacity
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class Broadcaster:
+    """Рассылка одного сообщения нескольким чатам.
+
+    Отправки идут параллельно, но не больше concurrency одновременно,
+    и укладываются в лимиты Telegram: общий (global_rate сообщений
+    в секунду на бота) и на каждый чат (chat_rate с запасом chat_burst).
+    На TelegramRetryAfter чат ставится на паузу на указанное время
+    и отправка повторяется, остальные получатели не ждут.
+    """
+
+    # Сколько бакетов чатов держать до чистки неактивных
+    MAX_CHAT_BUCKETS = 1000
+
+    def __init__(
+        self,
+        concurrency: int = 10,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        max_retries: int = 3
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._global = TokenBucket(global_rate)
+        self._chats: Dict[int, TokenBucket] = {}
+
+    async def send(
+        self,
+        chat_ids: Iterable[int],
+        send: Callable[[int], Awaitable[Any]]
+    ) -> List[SendResult]:
+        """Вызвать send(chat_id) для каждого чата, результаты - в порядке chat_ids"""
+        return list(await asyncio.gather(*(self._send_one(chat_id, send) for chat_id in chat_ids)))
+
+    async def _send_one(self, chat_id: int, send: Callable[[int], Awaitable[Any]]) -> SendResult:
+        bucket = self._chat_bucket(chat_id)
+        attempts = 0
+        while True:
+            attempts += 1
+            # Ждем лимит чата вне семафора, чтобы не занимать слот
+            await bucket.acquire()
+            try:
+                async with self._semaphore:
+                    await self._global.acquire()
+                    message = await send(chat_id)
+                return SendResult(chat_id, True, attempts, message=message)
+
+            except TelegramRetryAfter as e:
+                if attempts > self.max_retries:
+                    logging.error(f"Flood control for chat {chat_id}, giving up after {attempts} attempts")
+                    return SendResult(chat_id, False, attempts, f"retry after {e.retry_after}s")
+                logging.warning(f"Flood control for chat {chat_id}: retry in {e.retry_after}s")
+                bucket.pause(e.retry_after)
+
+            except Exception as e:
+                return SendResult(
+                    chat_id, False, attempts, str(e),
+                    retryable=not isinstance(e, PERMANENT_ERRORS)
+                )
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.MAX_CHAT_BUCKETS:
+                # Полный бакет ничем не отличается от нового
+                self._chats = {k: b for k, b in self._chats.items() if not b.is_full}
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+
+# Глобальный рассыльщик уведомлений
+broadcaster = Broadcaster(
+    concurrency=settings.notify_concurrency,
+    global_rate=settings.notify_global_rate,
+    chat_rate=settings.notify_chat_rate,
+    chat_burst=settings.notify_chat_burst,
+    max_retries=settings.notify_max_retries
+)
@@ -1,15 +1,16 @@
 """Сервис для работы с корзиной"""
-from typing import List, Optional
-from sqlalchemy import select, and_
+from typing import Optional
+from sqlalchemy import select, update, delete, and_, case, func, literal
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import Order, OrderItem, Dish, User, OrderStatus
+from app.database import Order, OrderItem, OrderStatus, dialect_insert
+from app.services.catalog import catalog_cache
 
 
 class CartService:
     """Сервис для управления корзиной пользователя"""
-    
+
     @staticmethod
     async def get_or_create_cart(session: AsyncSession, user_id: int) -> Order:
         """Получить или создать корзину пользователя"""
@@ -22,7 +23,7 @@ class CartService:
             ))
         )
         cart = result.scalar_one_or_none()
-        
+
         if not cart:
             # Создаем новую корзину
             cart = Order(
@@ -32,9 +33,9 @@ class CartService:
             )
             session.add(cart)
             await session.flush()  # Получаем ID
-        
+
         return cart
-    
+
     @staticmethod
     async def get_cart_with_items(session: AsyncSession, user_id: int) -> Optional[Order]:
         """Получить корзину с товарами"""
@@ -49,52 +50,46 @@ class CartService:
             ))
         )
         return result.scalar_one_or_none()
-    
+
     @staticmethod
     async def add_item_to_cart(
-        session: AsyncSession, 
-        user_id: int, 
-        dish_id: int, 
+        session: AsyncSession,
+        user_id: int,
+        dish_id: int,
         quantity: int
-    ) -> OrderItem:
-        """Добавить товар в корзину"""
-        # Получаем блюдо
-        dish = await session.get(Dish, dish_id)
+    ) -> int:
+        """Добавить товар в корзину, вернуть новое количество позиции"""
+        # Цена и доступность блюда берутся из кэша каталога, без запроса к БД
+        catalog = await catalog_cache.get()
+        dish = catalog.get_dish(dish_id)
         if not dish or not dish.is_available:
             raise ValueError("Блюдо недоступно")
-        
-        # Получаем или создаем корзину
-        cart = await CartService.get_or_create_cart(session, user_id)
-        
-        # Проверяем, есть ли уже такое блюдо в корзине
-        result = await session.execute(
-            select(OrderItem)
-            .where(and_(
-                OrderItem.order_id == cart.id,
-                OrderItem.dish_id == dish_id
-            ))
+
+        # INSERT ... SELECT из корзины пользователя с upsert по (order_id, dish_id):
+        # если блюдо уже в корзине - просто увеличиваем количество
+        insert = dialect_insert(session)
+        stmt = insert(OrderItem).from_select(
+            ["order_id", "dish_id", "quantity", "price"],
+            select(
+                Order.id, literal(dish_id), literal(quantity), literal(dish.price)
+            ).where(CartService._is_user_cart(user_id))
         )
-        existing_item = result.scalar_one_or_none()
-        
-        if existing_item:
-            # Обновляем количество
-            existing_item.quantity += quantity
-            item = existing_item
-        else:
-            # Создаем новую позицию
-            item = OrderItem(
-                order_id=cart.id,
-                dish_id=dish_id,
-                quantity=quantity,
-                price=dish.price
-            )
-            session.add(item)
-        
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OrderItem.order_id, OrderItem.dish_id],
+            set_={"quantity": OrderItem.quantity + stmt.excluded.quantity}
+        ).returning(OrderItem.quantity)
+
+        new_quantity = (await session.execute(stmt)).scalar_one_or_none()
+        if new_quantity is None:
+            # Корзины еще нет - создаем и повторяем вставку
+            await CartService.get_or_create_cart(session, user_id)
+            new_quantity = (await session.execute(stmt)).scalar_one()
+
         # Обновляем общую сумму корзины
-        await CartService._update_cart_total(session, cart.id)
-        
-        return item
-    
+        await CartService._update_cart_total(session, user_id)
+
+        return new_quantity
+
     @staticmethod
     async def update_item_quantity(
         session: AsyncSession,
@@ -105,26 +100,72 @@ class CartService:
         """Обновить количество товара в корзине"""
         if quantity <= 0:
             return await CartService.remove_item_from_cart(session, user_id, item_id)
-        
-        # Получаем позицию
+
         result = await session.execute(
-            select(OrderItem)
-            .join(Order)
-            .where(and_(
-                OrderItem.id == item_id,
-                Order.user_id == user_id,
-                Order.status == OrderStatus.CART.value
-            ))
+            update(OrderItem)
+            .where(CartService._is_cart_item(user_id, item_id))
+            .values(quantity=quantity)
+            .execution_options(synchronize_session=False)
         )
-        item = result.scalar_one_or_none()
-        
-        if item:
-            item.quantity = quantity
-            await CartService._update_cart_total(session, item.order_id)
+
+        if result.rowcount:
+            await CartService._update_cart_total(session, user_id)
             return True
-        
+
         return False
-    
+
+    @staticmethod
+    async def change_item_quantity(
+        session: AsyncSession,
+        user_id: int,
+        item_id: int,
+        delta: int,
+        max_quantity: Optional[int] = None,
+        clamp: bool = False
+    ) -> Optional[int]:
+        """Изменить количество товара на delta, вернуть новое количество.
+
+        Если количество стало нулевым, позиция удаляется (возвращается 0).
+        None - позиция не найдена или превышен max_quantity; с clamp=True
+        количество вместо этого ограничивается max_quantity.
+        """
+        quantity = OrderItem.quantity + delta
+        if max_quantity is not None and clamp:
+            quantity = case((quantity > max_quantity, max_quantity), else_=quantity)
+
+        stmt = (
+            update(OrderItem)
+            .where(CartService._is_cart_item(user_id, item_id))
+            .values(quantity=quantity)
+            .returning(OrderItem.quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if max_quantity is not None and not clamp:
+            stmt = stmt.where(OrderItem.quantity + delta <= max_quantity)
+
+        new_quantity = (await session.execute(stmt)).scalar_one_or_none()
+        if new_quantity is None:
+            return None
+
+        if new_quantity <= 0:
+            await session.execute(
+                delete(OrderItem)
+                .where(OrderItem.id == item_id)
+                .execution_options(synchronize_session=False)
+            )
+            new_quantity = 0
+
+        await CartService._update_cart_total(session, user_id)
+        return new_quantity
+
+    @staticmethod
+    async def get_item_quantity(session: AsyncSession, user_id: int, item_id: int) -> Optional[int]:
+        """Получить количество товара в корзине (None - позиции нет)"""
+        result = await session.execute(
+            select(OrderItem.quantity).where(CartService._is_cart_item(user_id, item_id))
+        )
+        return result.scalar_one_or_none()
+
     @staticmethod
     async def remove_item_from_cart(
         session: AsyncSession,
@@ -133,58 +174,78 @@ class CartService:
     ) -> bool:
         """Удалить товар из корзины"""
         result = await session.execute(
-            select(OrderItem)
-            .join(Order)
-            .where(and_(
-                OrderItem.id == item_id,
-                Order.user_id == user_id,
-                Order.status == OrderStatus.CART.value
-            ))
+            delete(OrderItem)
+            .where(CartService._is_cart_item(user_id, item_id))
+            .execution_options(synchronize_session=False)
         )
-        item = result.scalar_one_or_none()
-        
-        if item:
-            order_id = item.order_id
-            await session.delete(item)
-            await CartService._update_cart_total(session, order_id)
+
+        if result.rowcount:
+            await CartService._update_cart_total(session, user_id)
             return True
-        
+
         return False
-    
+
     @staticmethod
     async def clear_cart(session: AsyncSession, user_id: int) -> bool:
-        """Очистить корзину"""
-        cart = await CartService.get_cart_with_items(session, user_id)
-        if cart:
-            # Удаляем все позиции
-            for item in cart.items:
-                await session.delete(item)
-            
+        """Очистить корзину; False - корзины нет"""
+        result = await session.execute(
+            delete(OrderItem)
+            .where(OrderItem.order_id.in_(CartService._user_cart_ids(user_id)))
+            .execution_options(synchronize_session=False)
+        )
+
+        if result.rowcount:
             # Обнуляем сумму
-            cart.total_amount = 0.0
+            await CartService._update_cart_total(session, user_id)
             return True
-        
-        return False
-    
+
+        # Уже пустая корзина очищена успешно - проверяем только, что она есть
+        cart_id = await session.scalar(CartService._user_cart_ids(user_id).limit(1))
+        return cart_id is not None
+
     @staticmethod
     async def get_cart_count(session: AsyncSession, user_id: int) -> int:
         """Получить количество товаров в корзине"""
-        cart = await CartService.get_cart_with_items(session, user_id)
-        if cart:
-            return sum(item.quantity for item in cart.items)
-        return 0
-    
-    @staticmethod
-    async def _update_cart_total(session: AsyncSession, cart_id: int):
-        """Обновить общую сумму корзины"""
+        # Только агрегат по позициям, без загрузки заказа и блюд
         result = await session.execute(
-            select(OrderItem)
-            .where(OrderItem.order_id == cart_id)
+            select(func.coalesce(func.sum(OrderItem.quantity), 0))
+            .where(OrderItem.order_id.in_(CartService._user_cart_ids(user_id)))
         )
-        items = result.scalars().all()
-        
-        total = sum(item.quantity * item.price for item in items)
-        
-        cart = await session.get(Order, cart_id)
-        if cart:
-            cart.total_amount = total
+        return result.scalar_one()
+
+    @staticmethod
+    async def _update_cart_total(session: AsyncSession, user_id: int):
+        """Пересчитать общую сумму корзины одним UPDATE"""
+        items_total = (
+            select(func.coalesce(func.sum(OrderItem.quantity * OrderItem.price), 0.0))
+            .where(OrderItem.order_id == Order.id)
+            .scalar_subquery()
+        )
+        await session.execute(
+            update(Order)
+            .where(CartService._is_user_cart(user_id))
+            .values(total_amount=items_total)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _is_user_cart(user_id: int):
+        """Условие: заказ является корзиной пользователя"""
+        return and_(
+            Order.user_id == user_id,
+            Order.status == OrderStatus.CART.value
+        )
+
+    @staticmethod
+    def _user_cart_ids(user_id: int):
+        """Подзапрос ID корзины пользователя"""
+        return select(Order.id).where(CartService._is_user_cart(user_id))
+
+    @staticmethod
+    def _is_cart_item(user_id: int, item_id: int):
+        """Условие: позиция лежит в корзине пользователя"""
+        return and_(
+            OrderItem.id == item_id,
+            OrderItem.order_id.in_(CartService._user_cart_ids(user_id))
+        )
+
@@ -0,0 +1,176 @@
+"""Склейка быстрых нажатий +/- в корзине в одну запись"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session_maker
+from app.services.cart import CartService
+
+# Показать пользователю корзину после записи (в новой сессии)
+RefreshCallback = Callable[[AsyncSession], Awaitable[None]]
+
+
+class TapResult(NamedTuple):
+    """Итог нажатия с учетом еще не записанных нажатий"""
+    quantity: int  # количество позиции после нажатия (0 - позиция будет удалена)
+    clamped: bool  # нажатие уперлось в max_quantity и не учтено
+
+
+class _Batch:
+    """Нажатия одного пользователя, еще не записанные в БД"""
+
+    __slots__ = ("user_id", "deltas", "quantities", "refresh", "lock", "timer")
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.deltas: Dict[int, int] = {}
+        # item_id -> количество с учетом нажатий пачки
+        self.quantities: Dict[int, int] = {}
+        self.refresh: Optional[RefreshCallback] = None
+        self.lock = asyncio.Lock()
+        self.timer: Optional[asyncio.Task] = None
+
+
+class CartTapCoalescer:
+    """Копит нажатия +/- по позициям корзины и применяет их пачкой.
+
+    Первое нажатие запускает таймер на window секунд; нажатия, пришедшие
+    за это время, только складывают дельты по позициям. Количество
+    позиции читается из БД один раз на пачку, дальше оно считается в
+    памяти - tap() сразу возвращает его и то, уперлось ли нажатие в
+    max_quantity. По таймеру дельты записываются одной транзакцией, а
+    refresh последнего нажатия один раз обновляет сообщение. Если дельты
+    в сумме нулевые, ничего не пишется.
+
+    Запись, упавшую с ошибкой, повторяем один раз в новой сессии; если
+    не вышло и так, refresh показывает корзину такой, какая она в БД.
+
+    Пока пачка применяется, новые нажатия копятся в ту же пачку и уходят
+    следующим flush - записи одного пользователя не перекрываются.
+    drain() применяет пачку сразу: его вызывают перед любым другим
+    апдейтом пользователя, чтобы тот видел корзину с учетом нажатий.
+    """
+
+    def __init__(self, window: float, max_quantity: Optional[int] = None, session_maker=async_session_maker):
+        self.window = window
+        self.max_quantity = max_quantity
+        self.session_maker = session_maker
+        self.taps = 0
+        self.flushes = 0
+        self.failures = 0
+        self._batches: Dict[int, _Batch] = {}
+
+    @property
+    def pending(self) -> int:
+        """Сколько пользователей с незаписанными нажатиями"""
+        return len(self._batches)
+
+    async def tap(
+        self,
+        session: AsyncSession,
+        key: int,
+        user_id: int,
+        item_id: int,
+        delta: int,
+        refresh: RefreshCallback
+    ) -> Optional[TapResult]:
+        """Учесть нажатие; None - позиции нет в корзине.
+
+        session нужна только для чтения количества при первом нажатии
+        по позиции; refresh берется от последнего нажатия пачки.
+        """
+        batch = self._batches.get(key)
+        quantity = batch.quantities.get(item_id) if batch is not None else None
+        if quantity is None:
+            quantity = await CartService.get_item_quantity(session, user_id, item_id)
+            if quantity is None:
+                return None
+            # Пока шел запрос, пачку могли создать или записать
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = self._batches[key] = _Batch(user_id)
+            quantity = batch.quantities.setdefault(item_id, quantity)
+
+        if quantity <= 0:
+            # Позиция уже уменьшена до нуля и будет удалена
+            return None
+
+        new_quantity = max(quantity + delta, 0)
+        if self.max_quantity is not None and new_quantity > self.max_quantity:
+            new_quantity = max(quantity, self.max_quantity)
+
+        batch.quantities[item_id] = new_quantity
+        if new_quantity != quantity:
+            batch.deltas[item_id] = batch.deltas.get(item_id, 0) + new_quantity - quantity
+        batch.refresh = refresh
+        self.taps += 1
+
+        if batch.timer is None:
+            batch.timer = asyncio.create_task(self._flush_later(key, batch))
+        return TapResult(new_quantity, new_quantity - quantity != delta)
+
+    async def drain(self, key: int):
+        """Применить нажатия пользователя сейчас, не дожидаясь таймера"""
+        batch = self._batches.get(key)
+        if batch is None:
+            return
+
+        if batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+        await self._flush(key, batch)
+
+    async def close(self):
+        """Применить все незаписанные нажатия"""
+        for key in list(self._batches):
+            await self.drain(key)
+
+    async def _flush_later(self, key: int, batch: _Batch):
+        await asyncio.sleep(self.window)
+        batch.timer = None
+        await self._flush(key, batch)
+
+    async def _flush(self, key: int, batch: _Batch):
+        async with batch.lock:
+            deltas = {item_id: delta for item_id, delta in batch.deltas.items() if delta}
+            batch.deltas = {}
+            if deltas:
+                self.flushes += 1
+                if not await self._apply(key, batch.user_id, deltas):
+                    # Количества в памяти разошлись с БД - следующее нажатие прочитает их заново
+                    self.failures += 1
+                    batch.quantities.clear()
+                try:
+                    async with self.session_maker() as session:
+                        await batch.refresh(session)
+                except Exception as e:
+                    logging.error(f"CartTapCoalescer: ошибка обновления корзины пользователя {key}: {e}")
+
+            # Новых нажатий за время записи не было - пачка больше не нужна
+            if not batch.deltas and batch.timer is None and self._batches.get(key) is batch:
+                del self._batches[key]
+
+    async def _apply(self, key: int, user_id: int, deltas: Dict[int, int]) -> bool:
+        """Записать дельты одной транзакцией; при ошибке - еще одна попытка"""
+        for attempt in (1, 2):
+            try:
+                async with self.session_maker() as session:
+                    # Позиция удаляется автоматически, если количество стало 0
+                    for item_id, delta in deltas.items():
+                        await CartService.change_item_quantity(
+                            session, user_id, item_id, delta, max_quantity=self.max_quantity, clamp=True
+                        )
+                    await session.commit()
+                return True
+            except Exception as e:
+                logging.error(
+                    f"CartTapCoalescer: ошибка записи нажатий пользователя {key} (попытка {attempt}): {e}"
+                )
+        return False
+
+
+# Глобальный склейщик нажатий корзины; одна позиция - не больше 10 штук
+cart_taps = CartTapCoalescer(window=settings.cart_tap_window, max_quantity=10)
@@ -0,0 +1,90 @@
+"""Кэш каталога меню: категории и блюда в памяти"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.database import async_session_maker, Category, Dish
+
+
+class CatalogSnapshot:
+    """Неизменяемый снимок каталога определенной версии"""
+
+    def __init__(self, version: int, categories: List[Category], dishes: List[Dish]):
+        self.version = version
+
+        self.categories_by_id: Dict[int, Category] = {c.id: c for c in categories}
+        # Активные категории в порядке показа пользователю
+        self.active_categories: List[Category] = sorted(
+            (c for c in categories if c.is_active),
+            key=lambda c: (c.sort_order or 0, c.id)
+        )
+
+        self.dishes_by_id: Dict[int, Dish] = {d.id: d for d in dishes}
+        self.dishes_by_category: Dict[int, List[Dish]] = {}
+        for dish in sorted(dishes, key=lambda d: (d.sort_order or 0, d.id)):
+            self.dishes_by_category.setdefault(dish.category_id, []).append(dish)
+
+    def get_category(self, category_id: int) -> Optional[Category]:
+        """Получить категорию по ID"""
+        return self.categories_by_id.get(category_id)
+
+    def get_dishes(self, category_id: int) -> List[Dish]:
+        """Получить блюда категории в порядке показа"""
+        return self.dishes_by_category.get(category_id, [])
+
+    def get_dish(self, dish_id: int) -> Optional[Dish]:
+        """Получить блюдо по ID"""
+        return self.dishes_by_id.get(dish_id)
+
+
+class CatalogCache:
+    """Материализованный каталог меню.
+
+    Меню меняется только из админ-панели, поэтому пользовательские
+    обработчики читают его из памяти. Админские обработчики после
+    изменения категорий/блюд вызывают invalidate(), и следующий
+    читатель строит новый снимок одной парой запросов.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> CatalogSnapshot:
+        """Получить актуальный снимок каталога"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        async with self._lock:
+            while self._snapshot is None:
+                version = self._version
+                snapshot = await self._load(version)
+                # Если каталог инвалидировали во время загрузки - грузим заново
+                if version == self._version:
+                    self._snapshot = snapshot
+
+            return self._snapshot
+
+    def invalidate(self):
+        """Сбросить снимок после изменения меню"""
+        self._version += 1
+        self._snapshot = None
+
+    async def _load(self, version: int) -> CatalogSnapshot:
+        async with async_session_maker() as session:
+            categories = (await session.execute(select(Category))).scalars().all()
+            dishes = (await session.execute(select(Dish))).scalars().all()
+
+        logging.info(
+            f"Каталог загружен (версия {version}): "
+            f"{len(categories)} категорий, {len(dishes)} блюд"
+        )
+        return CatalogSnapshot(version, list(categories), list(dishes))
+
+
+# Глобальный кэш каталога
+catalog_cache = CatalogCache()
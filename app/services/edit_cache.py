@@ -0,0 +1,79 @@
+"""Отпечатки отправленного содержимого сообщений: пропуск правок без изменений"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.config import settings
+
+# Поля метода, которые указывают на сообщение, а не на его содержимое
+TARGET_FIELDS = {"chat_id", "message_id", "inline_message_id", "business_connection_id"}
+
+
+def fingerprint(value: Any) -> bytes:
+    """Короткий отпечаток содержимого (текст, разметка, клавиатура)"""
+    # Default("parse_mode") и подобные значения по умолчанию - через repr
+    dump = json.dumps(value, default=repr, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(dump.encode(), digest_size=16).digest()
+
+
+class EditCache:
+    """Последнее содержимое, которое бот выставил сообщению.
+
+    Для каждого сообщения (chat_id, message_id) или inline_message_id
+    хранятся отпечатки текста целиком (с разметкой и клавиатурой) и
+    отдельно клавиатуры, а также ответ Telegram на последнюю правку
+    (Message, для inline-сообщений True). Правка с тем же отпечатком
+    ничего не изменит - Telegram ответил бы "message is not modified",
+    поэтому ее можно не отправлять. Записи вытесняются по LRU: в памяти
+    не больше max_size сообщений.
+
+    Кэш знает только правки своего процесса, поэтому годится, когда
+    процесс бота один (polling): правку из другого процесса он не увидит.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # ключ сообщения -> [отпечаток текста, отпечаток клавиатуры, ответ Telegram]
+        self._entries: "OrderedDict[Hashable, list]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def message_key(chat_id: Any, message_id: Optional[int], inline_message_id: Optional[str]) -> Hashable:
+        return inline_message_id if inline_message_id else (chat_id, message_id)
+
+    def is_unchanged(self, key: Hashable, part: int, digest: bytes) -> bool:
+        """Совпадает ли отпечаток части сообщения (0 - текст, 1 - клавиатура); считает попадания"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[part] == digest:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def result(self, key: Hashable) -> Any:
+        """Ответ Telegram на последнюю правку (None - был "message is not modified")"""
+        return self._entries[key][2]
+
+    def remember(self, key: Hashable, text: Optional[bytes], markup: bytes, result: Any = None):
+        """Запомнить содержимое после правки; text=None - текст неизвестен"""
+        self._entries[key] = [text, markup, result]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def forget(self, key: Hashable):
+        """Содержимое сообщения изменилось иначе (подпись, медиа) или оно удалено"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Глобальный кэш отпечатков сообщений
+edit_cache = EditCache(max_size=settings.edit_cache_size)
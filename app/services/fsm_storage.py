@@ -0,0 +1,212 @@
+"""Хранилище состояний FSM в базе данных бота"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Mapping, Optional, Set
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from sqlalchemy import delete, select
+
+from app.database import async_session_maker, dialect_insert, FsmState
+
+
+class _Record:
+    """Состояние и данные одного ключа в кэше"""
+    __slots__ = ("state", "data", "expires_at")
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any], expires_at: float):
+        self.state = state
+        self.data = data
+        self.expires_at = expires_at
+
+
+class DatabaseStorage(BaseStorage):
+    """FSM-хранилище aiogram поверх таблицы fsm_states.
+
+    Чтения идут из LRU-кэша в памяти (промах - один SELECT по ключу),
+    записи меняют кэш сразу, а в БД уходят пачкой раз в flush_interval
+    секунд: серия set_state/update_data одного обработчика превращается
+    в одну строку upsert. При flush_interval=0 каждая запись сразу
+    сохраняется в БД.
+
+    Несохраненные ключи из кэша не вытесняются. При аварийной остановке
+    теряется не больше flush_interval секунд изменений, при штатной
+    остановке close() записывает все.
+
+    Уже сохраненное состояние отдается из кэша до ttl секунд - повторные
+    get_state/get_data обходятся без запросов к БД. Это рассчитано на
+    один процесс бота (polling или один webhook-сервер). Несколько
+    процессов с общей БД видят изменения друг друга с задержкой до ttl
+    (чтение из кэша) плюс flush_interval (запись в БД); если нужна
+    согласованность, задайте им ttl=0 и flush_interval=0 - тогда каждое
+    чтение и каждая запись идут в БД.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl: float = 60,
+        flush_interval: float = 1,
+        session_maker=async_session_maker,
+        key_builder: Optional[KeyBuilder] = None,
+        json_dumps: Callable[..., str] = json.dumps,
+        json_loads: Callable[..., Any] = json.loads
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.session_maker = session_maker
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self.json_dumps = json_dumps
+        self.json_loads = json_loads
+        self._entries: "OrderedDict[str, _Record]" = OrderedDict()
+        self._dirty: Set[str] = set()
+        # Ключи, которые записываются прямо сейчас
+        self._flushing: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self.key_builder.build(key)
+        record = await self._get_record(storage_key)
+        record.state = state.state if isinstance(state, State) else state
+        await self._mark_dirty(storage_key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._get_record(self.key_builder.build(key))).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        storage_key = self.key_builder.build(key)
+        record = await self._get_record(storage_key)
+        record.data = data.copy()
+        await self._mark_dirty(storage_key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._get_record(self.key_builder.build(key))).data.copy()
+
+    async def flush(self):
+        """Записать накопленные изменения в БД"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+
+            dirty, self._dirty = self._dirty, set()
+            self._flushing = dirty
+            rows, empty = [], []
+            now = datetime.utcnow()
+            for storage_key in dirty:
+                record = self._entries[storage_key]
+                if record.state is None and not record.data:
+                    # state.clear() - строка больше не нужна
+                    empty.append(storage_key)
+                else:
+                    rows.append({
+                        "key": storage_key,
+                        "state": record.state,
+                        "data": self.json_dumps(record.data),
+                        "updated_at": now
+                    })
+
+            try:
+                async with self.session_maker() as session:
+                    if rows:
+                        insert = dialect_insert(session)
+                        stmt = insert(FsmState)
+                        await session.execute(
+                            stmt.on_conflict_do_update(
+                                index_elements=[FsmState.key],
+                                set_={
+                                    "state": stmt.excluded.state,
+                                    "data": stmt.excluded.data,
+                                    "updated_at": stmt.excluded.updated_at
+                                }
+                            ),
+                            rows
+                        )
+                    if empty:
+                        await session.execute(delete(FsmState).where(FsmState.key.in_(empty)))
+                    await session.commit()
+                logging.debug(f"DatabaseStorage: записано {len(rows)} состояний, удалено {len(empty)}")
+            except Exception as e:
+                logging.error(f"DatabaseStorage: ошибка записи состояний FSM: {e}")
+                # Значения остаются в кэше - достаточно снова пометить ключи
+                self._dirty |= dirty
+            finally:
+                self._flushing = set()
+
+    async def close(self) -> None:
+        """Остановить фоновую запись и сохранить остаток изменений"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+        await self.flush()
+
+    async def _get_record(self, storage_key: str) -> _Record:
+        record = self._entries.get(storage_key)
+        if record is not None and self._is_fresh(storage_key, record):
+            self._entries.move_to_end(storage_key)
+            return record
+
+        async with self.session_maker() as session:
+            row = (await session.execute(
+                select(FsmState.state, FsmState.data).where(FsmState.key == storage_key)
+            )).one_or_none()
+
+        # Пока шел запрос, ключ мог загрузить или изменить другой обработчик
+        record = self._entries.get(storage_key)
+        if record is not None and self._is_fresh(storage_key, record):
+            return record
+
+        if row is None:
+            record = _Record(None, {}, 0)
+        else:
+            record = _Record(row.state, self.json_loads(row.data), 0)
+        self._put(storage_key, record)
+        return record
+
+    def _is_pinned(self, storage_key: str) -> bool:
+        """Ключ еще не сохранен в БД - кэш главнее базы"""
+        return storage_key in self._dirty or storage_key in self._flushing
+
+    def _is_fresh(self, storage_key: str, record: _Record) -> bool:
+        return self._is_pinned(storage_key) or (self.ttl > 0 and record.expires_at >= time.monotonic())
+
+    def _put(self, storage_key: str, record: _Record):
+        record.expires_at = time.monotonic() + self.ttl
+        self._entries[storage_key] = record
+        self._entries.move_to_end(storage_key)
+
+        # Вытесняем самые старые записи, уже сохраненные в БД
+        while len(self._entries) > self.max_size:
+            old_key = next((k for k in self._entries if not self._is_pinned(k)), None)
+            if old_key is None:
+                break
+            del self._entries[old_key]
+
+    async def _mark_dirty(self, storage_key: str, record: _Record):
+        self._dirty.add(storage_key)
+        self._entries[storage_key] = record
+        record.expires_at = time.monotonic() + self.ttl
+
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
@@ -1,45 +1,59 @@
 """Сервис для отправки уведомлений администраторам"""
+import asyncio
 import logging
 from typing import List
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest
 
 from app.config import settings
+from app.keyboards.callbacks import ADMIN_ORDER
+from app.services.broadcast import broadcaster, SendResult
+from app.services.outbox import NotificationOutbox
 from app.utils.helpers import get_user_display_name, format_price, format_datetime
 
 
+def _order_keyboard(order_id: int) -> dict:
+    """Кнопка для быстрого перехода к заказу"""
+    return {
+        "inline_keyboard": [
+            [{"text": "📋 Посмотреть заказ", "callback_data": ADMIN_ORDER.pack(order_id)}]
+        ]
+    }
+
+
 class NotificationService:
     """Сервис для отправки уведомлений"""
     
     @staticmethod
     async def notify_admins(bot: Bot, message: str, parse_mode: str = None):
         """Отправить сообщение всем администраторам"""
+        results = await NotificationService.send_to_admins(
+            lambda admin_id: bot.send_message(chat_id=admin_id, text=message, parse_mode=parse_mode),
+            "Notification"
+        )
+        return any(result.ok for result in results)
+    
+    @staticmethod
+    async def send_to_admins(send, kind: str = "Notification") -> List[SendResult]:
+        """Параллельно вызвать send(admin_id) для всех администраторов.
+        
+        Возвращает результат по каждому получателю в порядке ADMIN_IDS.
+        """
         if not settings.admin_ids:
             logging.warning("No admin IDs configured for notifications")
-            return False
-            
-        sent_count = 0
-        failed_count = 0
-        
-        for admin_id in settings.admin_ids:
-            try:
-                await bot.send_message(
-                    chat_id=admin_id,
-                    text=message,
-                    parse_mode=parse_mode
-                )
-                sent_count += 1
-                logging.info(f"Notification sent to admin {admin_id}")
-                
-            except TelegramBadRequest as e:
-                failed_count += 1
-                logging.error(f"Failed to send notification to admin {admin_id}: {e}")
-            except Exception as e:
-                failed_count += 1
-                logging.error(f"Unexpected error sending to admin {admin_id}: {e}")
-        
-        logging.info(f"Notification stats: {sent_count} sent, {failed_count} failed")
-        return sent_count > 0
+            return []
+        
+        results = await broadcaster.send(settings.admin_ids, send)
+        
+        for result in results:
+            if result.ok:
+                logging.info(f"{kind} sent to admin {result.chat_id}")
+            else:
+                logging.error(f"Failed to send {kind.lower()} to admin {result.chat_id}: {result.error}")
+        
+        sent_count = sum(1 for result in results if result.ok)
+        logging.info(f"{kind} stats: {sent_count} sent, {len(results) - sent_count} failed")
+        return results
     
     @staticmethod
     async def notify_user(bot: Bot, user_id: int, message: str, parse_mode: str = None):
@@ -95,13 +109,7 @@ class NotificationService:
     @staticmethod
     async def notify_payment_received(bot: Bot, order, user):
         """Уведомить о получении скриншота оплаты"""
-        from app.utils import texts
-        
-        message = texts.PAYMENT_RECEIVED_NOTIFICATION.format(
-            order_id=order.id,
-            amount=format_price(order.total_amount),
-            user_name=get_user_display_name(user)
-        )
+        message = NotificationService._payment_received_text(order, user)
         
         # Отправляем уведомление с фото если есть file_id
         if order.payment_photo_file_id:
@@ -114,41 +122,19 @@ class NotificationService:
     @staticmethod
     async def notify_admins_with_photo(bot: Bot, caption: str, photo_file_id: str, order_id: int):
         """Отправить фото с подписью всем администраторам"""
-        if not settings.admin_ids:
-            logging.warning("No admin IDs configured for notifications")
-            return False
-            
-        sent_count = 0
-        failed_count = 0
-        
-        # Создаем кнопку для быстрого перехода к заказу
-        keyboard = {
-            "inline_keyboard": [
-                [{"text": "📋 Посмотреть заказ", "callback_data": f"admin_order_{order_id}"}]
-            ]
-        }
-        
-        for admin_id in settings.admin_ids:
-            try:
-                await bot.send_photo(
-                    chat_id=admin_id,
-                    photo=photo_file_id,
-                    caption=caption,
-                    parse_mode="HTML",
-                    reply_markup=keyboard
-                )
-                sent_count += 1
-                logging.info(f"Photo notification sent to admin {admin_id}")
-                
-            except TelegramBadRequest as e:
-                failed_count += 1
-                logging.error(f"Failed to send photo to admin {admin_id}: {e}")
-            except Exception as e:
-                failed_count += 1
-                logging.error(f"Unexpected error sending photo to admin {admin_id}: {e}")
-        
-        logging.info(f"Photo notification stats: {sent_count} sent, {failed_count} failed")
-        return sent_count > 0
+        keyboard = _order_keyboard(order_id)
+        
+        results = await NotificationService.send_to_admins(
+            lambda admin_id: bot.send_photo(
+                chat_id=admin_id,
+                photo=photo_file_id,
+                caption=caption,
+                parse_mode="HTML",
+                reply_markup=keyboard
+            ),
+            "Photo notification"
+        )
+        return any(result.ok for result in results)
     
     @staticmethod
     async def notify_feedback(bot: Bot, user, feedback_text: str):
@@ -167,14 +153,8 @@ class NotificationService:
     @staticmethod
     async def notify_order_status_change(bot: Bot, order, user, old_status: str, new_status: str):
         """Уведомить об изменении статуса заказа"""
-        from app.utils import texts
-        
         # Уведомляем пользователя об изменении статуса
-        user_message = texts.ORDER_STATUS_CHANGED_USER.format(
-            order_id=order.id,
-            old_status=texts.ORDER_STATUSES.get(old_status, old_status),
-            new_status=texts.ORDER_STATUSES.get(new_status, new_status)
-        )
+        user_message = NotificationService._status_change_text(order, old_status, new_status)
         
         return await NotificationService.notify_user(bot, user.telegram_id, user_message)
     
@@ -183,13 +163,71 @@ class NotificationService:
         """Уведомить об отмене заказа"""
         from app.utils import texts
         
-        # Уведомляем пользователя об отмене
-        user_message = f"❌ Ваш заказ #{order.id} на сумму {format_price(order.total_amount)} был отменен."
-        
-        # Уведомляем администраторов
-        admin_message = f"❌ Заказ #{order.id} отменен пользователем {get_user_display_name(user)} (ID: {user.telegram_id})"
+        user_message, admin_message = NotificationService._order_cancelled_texts(order, user)
         
-        user_result = await NotificationService.notify_user(bot, user.telegram_id, user_message)
-        admin_result = await NotificationService.notify_admins(bot, admin_message)
+        user_result, admin_result = await asyncio.gather(
+            NotificationService.notify_user(bot, user.telegram_id, user_message),
+            NotificationService.notify_admins(bot, admin_message)
+        )
         
         return user_result or admin_result
+    
+    # Очередь уведомлений: сообщения уходят после commit сессии фоновыми воркерами
+    
+    @staticmethod
+    def queue_payment_received(session, order, user):
+        """Поставить в очередь уведомление админам о скриншоте оплаты"""
+        message = NotificationService._payment_received_text(order, user)
+        
+        if order.payment_photo_file_id:
+            NotificationOutbox.enqueue_admins(
+                session, "send_photo",
+                photo=order.payment_photo_file_id,
+                caption=message,
+                parse_mode="HTML",
+                reply_markup=_order_keyboard(order.id)
+            )
+        else:
+            NotificationOutbox.enqueue_admins(session, "send_message", text=message)
+    
+    @staticmethod
+    def queue_order_status_change(session, order, user, old_status: str, new_status: str):
+        """Поставить в очередь уведомление клиенту о смене статуса"""
+        NotificationOutbox.enqueue_message(
+            session, user.telegram_id,
+            NotificationService._status_change_text(order, old_status, new_status)
+        )
+    
+    @staticmethod
+    def queue_order_cancelled(session, order, user):
+        """Поставить в очередь уведомления клиенту и админам об отмене заказа"""
+        user_message, admin_message = NotificationService._order_cancelled_texts(order, user)
+        NotificationOutbox.enqueue_message(session, user.telegram_id, user_message)
+        NotificationOutbox.enqueue_admins(session, "send_message", text=admin_message)
+    
+    @staticmethod
+    def _payment_received_text(order, user) -> str:
+        from app.utils import texts
+        
+        return texts.PAYMENT_RECEIVED_NOTIFICATION.format(
+            order_id=order.id,
+            amount=format_price(order.total_amount),
+            user_name=get_user_display_name(user)
+        )
+    
+    @staticmethod
+    def _status_change_text(order, old_status: str, new_status: str) -> str:
+        from app.utils import texts
+        
+        return texts.ORDER_STATUS_CHANGED_USER.format(
+            order_id=order.id,
+            old_status=texts.ORDER_STATUSES.get(old_status, old_status),
+            new_status=texts.ORDER_STATUSES.get(new_status, new_status)
+        )
+    
+    @staticmethod
+    def _order_cancelled_texts(order, user):
+        """Тексты об отмене заказа: (клиенту, администраторам)"""
+        user_message = f"❌ Ваш заказ #{order.id} на сумму {format_price(order.total_amount)} был отменен."
+        admin_message = f"❌ Заказ #{order.id} отменен пользователем {get_user_display_name(user)} (ID: {user.telegram_id})"
+        return user_message, admin_message
@@ -1,11 +1,13 @@
 """Сервис для работы с заказами"""
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 
 from app.database.models import Order, OrderItem, OrderStatus
 from app.services.cart import CartService
+from app.services.sales_stats import SalesStatsService
+from app.services.status_counts import status_counts
 
 
 class OrderService:
@@ -48,6 +50,8 @@ class OrderService:
             # Очищаем корзину после создания заказа
             await CartService.clear_cart(session, user_id)
             
+            await OrderService._record_transition(session, order, None, order.status)
+            
             return order
             
         except Exception as e:
@@ -114,6 +118,40 @@ class OrderService:
             print(f"Ошибка получения деталей заказа: {e}")
             return None
     
+    @staticmethod
+    async def change_status(
+        session,
+        order_id: int,
+        new_status: str,
+        **values
+    ) -> Optional[Tuple[Order, str]]:
+        """Сменить статус заказа, вернуть (заказ с клиентом, прежний статус).
+
+        Единственная точка смены статуса: здесь же обновляются сводки
+        продаж и счетчики статусов. values - дополнительные поля заказа
+        (например, completed_at).
+        """
+        result = await session.execute(
+            select(Order)
+            .options(joinedload(Order.user))
+            .where(Order.id == order_id)
+            # Блокируем только строку заказа: PostgreSQL не разрешает FOR UPDATE
+            # для nullable-стороны LEFT JOIN из joinedload
+            .with_for_update(of=Order)
+        )
+        order = result.scalar_one_or_none()
+        if not order:
+            return None
+        
+        old_status = order.status
+        order.status = new_status
+        order.updated_at = datetime.utcnow()
+        for field, value in values.items():
+            setattr(order, field, value)
+        
+        await OrderService._record_transition(session, order, old_status, new_status)
+        return order, old_status
+    
     @staticmethod
     async def update_order_status(
         session, 
@@ -122,12 +160,7 @@ class OrderService:
     ) -> bool:
         """Обновить статус заказа"""
         try:
-            order = await OrderService.get_order_by_id(session, order_id)
-            if order:
-                order.status = new_status
-                order.updated_at = datetime.utcnow()
-                return True
-            return False
+            return await OrderService.change_status(session, order_id, new_status) is not None
         except Exception as e:
             print(f"Ошибка обновления статуса заказа: {e}")
             return False
@@ -146,8 +179,10 @@ class OrderService:
                 order.payment_screenshot = screenshot_path
                 if photo_file_id:
                     order.payment_photo_file_id = photo_file_id
+                old_status = order.status
                 order.status = OrderStatus.PAYMENT_RECEIVED.value
                 order.updated_at = datetime.utcnow()
+                await OrderService._record_transition(session, order, old_status, order.status)
                 return True
             return False
         except Exception as e:
@@ -250,11 +285,19 @@ class OrderService:
                 return False
             
             # Отменяем заказ
+            old_status = order.status
             order.status = OrderStatus.CANCELLED_BY_CLIENT.value
             order.updated_at = datetime.utcnow()
+            await OrderService._record_transition(session, order, old_status, order.status)
             
             return True
             
         except Exception as e:
             print(f"Ошибка отмены заказа: {e}")
             return False
+
+    @staticmethod
+    async def _record_transition(session, order: Order, old_status: Optional[str], new_status: str):
+        """Учесть смену статуса в сводках продаж и счетчиках админки"""
+        await SalesStatsService.record_transition(session, order, old_status, new_status)
+        status_counts.track_transition(session, old_status, new_status)
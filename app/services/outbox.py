@@ -0,0 +1,246 @@
+"""Очередь исходящих уведомлений (outbox) и фоновая отправка"""
+import asyncio
+import json
+import logging
+import time
+import weakref
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from aiogram import Bot
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import async_session_maker, OutboxMessage
+from app.services.broadcast import broadcaster
+
+# Ключ в session.info: в сессии поставлены сообщения, после commit будим воркеры
+_ENQUEUED_KEY = "outbox_enqueued"
+
+# Запущенные пулы воркеров
+_running_workers = weakref.WeakSet()
+
+
+class NotificationOutbox:
+    """Постановка сообщений в outbox.
+
+    Сообщения добавляются в ту же сессию, что и изменение заказа, и
+    становятся видны воркерам только вместе с ним после commit - обработчик
+    не ждет Telegram, а уведомление не теряется при перезапуске.
+    """
+
+    @staticmethod
+    def enqueue(session, chat_ids: Iterable[int], method: str, **kwargs) -> List[OutboxMessage]:
+        """Поставить вызов bot.<method>(chat_id=..., **kwargs) для каждого чата"""
+        payload = json.dumps(kwargs, ensure_ascii=False)
+        now = datetime.utcnow()
+        messages = [
+            OutboxMessage(
+                chat_id=chat_id,
+                method=method,
+                payload=payload,
+                status="pending",
+                attempts=0,
+                next_attempt_at=now
+            )
+            for chat_id in chat_ids
+        ]
+        session.add_all(messages)
+        session.info[_ENQUEUED_KEY] = True
+        return messages
+
+    @staticmethod
+    def enqueue_message(session, chat_id: int, text: str, **kwargs) -> List[OutboxMessage]:
+        """Поставить текстовое сообщение одному чату"""
+        return NotificationOutbox.enqueue(session, [chat_id], "send_message", text=text, **kwargs)
+
+    @staticmethod
+    def enqueue_admins(session, method: str, **kwargs) -> List[OutboxMessage]:
+        """Поставить сообщение всем администраторам - по строке на получателя"""
+        if not settings.admin_ids:
+            logging.warning("No admin IDs configured for notifications")
+        return NotificationOutbox.enqueue(session, settings.admin_ids, method, **kwargs)
+
+
+class OutboxWorker:
+    """Пул воркеров, разбирающих notification_outbox.
+
+    Каждый воркер забирает пачку готовых сообщений условным UPDATE
+    (аренда на lease секунд), отправляет их через общий broadcaster
+    с его лимитами и записывает результат. Если процесс упал во время
+    отправки, сообщение вернется в работу по истечении аренды - доставка
+    "хотя бы один раз". Временные ошибки повторяются с экспоненциальной
+    паузой до max_attempts попыток, постоянные сразу помечают сообщение
+    как failed.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        batch_size: int = 20,
+        poll_interval: float = 5,
+        lease: float = 60,
+        max_attempts: int = 8,
+        retry_delay: float = 5,
+        max_retry_delay: float = 3600,
+        keep_days: int = 7,
+        session_maker=async_session_maker
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.keep_days = keep_days
+        self.session_maker = session_maker
+        self.bot: Optional[Bot] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._purged_at = 0.0
+
+    def start(self, bot: Bot):
+        """Запустить воркеры"""
+        if self._tasks:
+            return
+        self.bot = bot
+        self._tasks = [asyncio.create_task(self._run(i)) for i in range(self.workers)]
+        _running_workers.add(self)
+        logging.info(f"Outbox: запущено воркеров: {self.workers}")
+
+    def wake(self):
+        """Сообщить воркерам о новых сообщениях"""
+        self._wakeup.set()
+
+    async def close(self):
+        """Остановить воркеры; неотправленное останется в таблице"""
+        _running_workers.discard(self)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def process_batch(self) -> int:
+        """Забрать и отправить одну пачку, вернуть число обработанных сообщений"""
+        messages = await self._claim()
+        if messages:
+            await asyncio.gather(*(self._deliver(message) for message in messages))
+        return len(messages)
+
+    async def purge(self) -> int:
+        """Удалить отправленные сообщения старше keep_days"""
+        border = datetime.utcnow() - timedelta(days=self.keep_days)
+        async with self.session_maker() as session:
+            result = await session.execute(
+                delete(OutboxMessage)
+                .where(OutboxMessage.status == "sent", OutboxMessage.sent_at < border)
+            )
+            await session.commit()
+        return result.rowcount
+
+    async def _run(self, number: int):
+        while True:
+            try:
+                self._wakeup.clear()
+                if await self.process_batch():
+                    continue
+
+                if number == 0 and time.monotonic() - self._purged_at > 3600:
+                    self._purged_at = time.monotonic()
+                    await self.purge()
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Outbox: ошибка воркера {number}: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        ready = (OutboxMessage.status == "pending", OutboxMessage.next_attempt_at <= now)
+        async with self.session_maker() as session:
+            # Повтор условий во внешнем WHERE: сообщение, которое успел
+            # забрать другой воркер, не будет взято второй раз
+            result = await session.execute(
+                update(OutboxMessage)
+                .where(
+                    OutboxMessage.id.in_(
+                        select(OutboxMessage.id)
+                        .where(*ready)
+                        .order_by(OutboxMessage.id)
+                        .limit(self.batch_size)
+                    ),
+                    *ready
+                )
+                .values(
+                    next_attempt_at=now + timedelta(seconds=self.lease),
+                    attempts=OutboxMessage.attempts + 1
+                )
+                .returning(
+                    OutboxMessage.id, OutboxMessage.chat_id, OutboxMessage.method,
+                    OutboxMessage.payload, OutboxMessage.attempts
+                )
+                .execution_options(synchronize_session=False)
+            )
+            messages = result.all()
+            await session.commit()
+        return sorted(messages, key=lambda message: message.id)
+
+    async def _deliver(self, message):
+        kwargs = json.loads(message.payload)
+        method = getattr(self.bot, message.method)
+        result, = await broadcaster.send(
+            [message.chat_id], lambda chat_id: method(chat_id=chat_id, **kwargs)
+        )
+
+        values = {"last_error": result.error}
+        if result.ok:
+            values.update(status="sent", sent_at=datetime.utcnow())
+        elif not result.retryable or message.attempts >= self.max_attempts:
+            logging.error(
+                f"Outbox: сообщение {message.id} для {message.chat_id} не доставлено: {result.error}"
+            )
+            values.update(status="failed")
+        else:
+            delay = min(self.max_retry_delay, self.retry_delay * 2 ** (message.attempts - 1))
+            logging.warning(
+                f"Outbox: сообщение {message.id} для {message.chat_id} - повтор через {delay:.0f} с: {result.error}"
+            )
+            values.update(next_attempt_at=datetime.utcnow() + timedelta(seconds=delay))
+
+        async with self.session_maker() as session:
+            await session.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id == message.id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+
+# Глобальный пул воркеров outbox
+outbox_worker = OutboxWorker(
+    workers=settings.outbox_workers,
+    batch_size=settings.outbox_batch_size,
+    poll_interval=settings.outbox_poll_interval,
+    max_attempts=settings.outbox_max_attempts,
+    keep_days=settings.outbox_keep_days
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_outbox_workers(session):
+    if session.info.pop(_ENQUEUED_KEY, False):
+        for worker in list(_running_workers):
+            worker.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_messages(session):
+    session.info.pop(_ENQUEUED_KEY, None)
@@ -0,0 +1,254 @@
+"""Метрики обработчиков: время, SQL-запросы, строки и вызовы Telegram API"""
+import asyncio
+import bisect
+import logging
+import os
+from collections import deque
+from contextlib import suppress
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.config import settings
+from app.services.edit_cache import edit_cache
+
+# Границы корзин гистограммы времени обработки, секунды
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Sample:
+    """Замер одного апдейта; наполняется событиями БД и сессии бота.
+
+    queries - все SQL-запросы апдейта, rows - строки результатов
+    запросов через сессии SQLAlchemy (session.execute/scalars/get).
+    """
+
+    __slots__ = ("handler", "queries", "rows", "api_calls", "closed")
+
+    def __init__(self):
+        self.handler = "unhandled"
+        self.queries = 0
+        self.rows = 0
+        self.api_calls = 0
+        # Фоновые задачи, созданные обработчиком, наследуют контекст -
+        # после завершения апдейта их запросы не засчитываются
+        self.closed = False
+
+
+# Замер апдейта, который обрабатывается в текущей задаче
+current_sample: ContextVar[Optional[Sample]] = ContextVar("perf_sample", default=None)
+
+
+class HandlerStats:
+    """Накопленные метрики одного обработчика"""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.api_calls = 0
+        # Накопительные корзины - для Prometheus, окно последних замеров - для /perf
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def percentile(self, p: float) -> float:
+        """Перцентиль времени по окну последних замеров, миллисекунды"""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+
+class PerfRegistry:
+    """Метрики по обработчикам.
+
+    PerfMiddleware отдает сюда замер каждого апдейта: ключ - модуль
+    роутера (user.cart, admin.admin_panel) и имя функции обработчика.
+    Отчет для админа (/perf) строится по окну последних window замеров,
+    выгрузка в формате Prometheus - по накопительным счетчикам; она
+    пишется в файл metrics_file раз в interval секунд и/или отдается
+    по HTTP на metrics_port (GET /metrics).
+    """
+
+    def __init__(
+        self,
+        window: int = 1024,
+        metrics_file: str = "",
+        metrics_port: int = 0,
+        interval: float = 15
+    ):
+        self.window = window
+        self.metrics_file = metrics_file
+        self.metrics_port = metrics_port
+        self.interval = interval
+        self._stats: Dict[Tuple[str, str], HandlerStats] = {}
+        self._writer: Optional[asyncio.Task] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    def record(self, sample: Sample, seconds: float, error: bool = False):
+        """Учесть замер апдейта"""
+        router, _, handler = sample.handler.rpartition(":")
+        key = (router, handler)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = HandlerStats(self.window)
+
+        stats.count += 1
+        stats.errors += error
+        stats.seconds += seconds
+        stats.queries += sample.queries
+        stats.rows += sample.rows
+        stats.api_calls += sample.api_calls
+        stats.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        stats.recent.append(seconds)
+
+    def reset(self):
+        self._stats.clear()
+
+    def render_text(self, limit: int = 15) -> str:
+        """Отчет для админа: самые нагруженные обработчики по суммарному времени"""
+        if not self._stats:
+            return "📊 <b>Производительность</b>\n\nЗамеров пока нет"
+
+        lines = ["📊 <b>Производительность обработчиков</b>", ""]
+        ranked = sorted(self._stats.items(), key=lambda item: item[1].seconds, reverse=True)
+        for (router, handler), stats in ranked[:limit]:
+            lines.append(
+                f"<b>{router}:{handler}</b> - {stats.count} выз."
+                + (f", ошибок {stats.errors}" if stats.errors else "")
+            )
+            lines.append(
+                f"   p50 {stats.percentile(50):.1f} / p95 {stats.percentile(95):.1f} / "
+                f"p99 {stats.percentile(99):.1f} мс; на вызов: SQL {stats.queries / stats.count:.1f}, "
+                f"строк {stats.rows / stats.count:.1f}, API {stats.api_calls / stats.count:.1f}"
+            )
+        if len(ranked) > limit:
+            lines.append(f"\n... и еще {len(ranked) - limit}")
+        return "\n".join(lines)
+
+    def render_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines: List[str] = [
+            "# HELP bot_handler_duration_seconds Время обработки апдейта",
+            "# TYPE bot_handler_duration_seconds histogram"
+        ]
+        for (router, handler), stats in sorted(self._stats.items()):
+            labels = f'router="{router}",handler="{handler}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, stats.buckets):
+                cumulative += count
+                lines.append(f'bot_handler_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'bot_handler_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+            lines.append(f"bot_handler_duration_seconds_sum{{{labels}}} {stats.seconds:.6f}")
+            lines.append(f"bot_handler_duration_seconds_count{{{labels}}} {stats.count}")
+
+        for name, attribute, help_text in (
+            ("bot_handler_errors_total", "errors", "Апдейты, завершившиеся исключением"),
+            ("bot_handler_sql_queries_total", "queries", "SQL-запросы, выполненные обработчиком"),
+            ("bot_handler_sql_rows_total", "rows", "Строки, полученные из БД"),
+            ("bot_handler_api_calls_total", "api_calls", "Вызовы Telegram API"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (router, handler), stats in sorted(self._stats.items()):
+                lines.append(f'{name}{{router="{router}",handler="{handler}"}} {getattr(stats, attribute)}')
+
+        for name, value, help_text in (
+            ("bot_edit_cache_hits_total", edit_cache.hits, "Правки сообщений без изменений, не отправленные в Telegram"),
+            ("bot_edit_cache_misses_total", edit_cache.misses, "Правки сообщений, отправленные в Telegram"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def write_file(self):
+        """Записать выгрузку в metrics_file (атомарно, через временный файл)"""
+        part_path = f"{self.metrics_file}.part"
+        content = self.render_prometheus()
+
+        def write():
+            with open(part_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(part_path, self.metrics_file)
+
+        await asyncio.to_thread(write)
+
+    async def start_exporter(self):
+        """Запустить запись в файл и HTTP-выгрузку, если они настроены"""
+        if self.metrics_file and (self._writer is None or self._writer.done()):
+            self._writer = asyncio.create_task(self._write_loop())
+
+        if self.metrics_port and self._runner is None:
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle_metrics)
+            self._runner = web.AppRunner(app, handle_signals=False)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, port=self.metrics_port).start()
+            logging.info(f"Метрики: http://0.0.0.0:{self.metrics_port}/metrics")
+
+    async def close(self):
+        if self._writer and not self._writer.done():
+            self._writer.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._writer
+            # Последняя выгрузка с итогами работы
+            await self.write_file()
+        self._writer = None
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    async def _write_loop(self):
+        while True:
+            try:
+                await self.write_file()
+            except Exception as e:
+                logging.error(f"Метрики: ошибка записи {self.metrics_file}: {e}")
+            await asyncio.sleep(self.interval)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    sample = current_sample.get()
+    if sample is None or sample.closed:
+        return
+    sample.queries += 1
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _count_rows(orm_execute_state: ORMExecuteState):
+    # Строки считаются по результату запроса сессии: асинхронные драйверы
+    # все равно буферизуют его целиком, поэтому freeze() ничего не
+    # дочитывает. Потоковые результаты (session.stream) не трогаем
+    sample = current_sample.get()
+    if sample is None or sample.closed or orm_execute_state.execution_options.get("stream_results"):
+        return None
+    result = orm_execute_state.invoke_statement()
+    # ORM-результаты возвращают строки всегда, у CursorResult для
+    # UPDATE/DELETE без RETURNING строк нет
+    if not getattr(result, "returns_rows", True):
+        return result
+    frozen = result.freeze()
+    sample.rows += len(frozen.data)
+    return frozen()
+
+
+# Глобальный реестр метрик
+perf_stats = PerfRegistry(
+    window=settings.perf_window,
+    metrics_file=settings.perf_metrics_file,
+    metrics_port=settings.perf_metrics_port,
+    interval=settings.perf_metrics_interval
+)
@@ -0,0 +1,218 @@
+"""Сводки продаж для статистики админ-панели"""
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, delete, func, desc, literal
+
+from app.database import (
+    Order, OrderItem, Dish, User, OrderStatus, DailySales, DailyDishSales, UserSales, dialect_insert, day_of
+)
+
+
+# Статусы, в которых заказ считается проданным (оплата подтверждена)
+SOLD_STATUSES = [
+    OrderStatus.CONFIRMED.value,
+    OrderStatus.READY.value,
+    OrderStatus.COMPLETED.value
+]
+
+
+class SalesStatsService:
+    """Инкрементальные сводки daily_sales / daily_dish_sales / user_sales.
+
+    Сводки ведутся по дню создания заказа и обновляются при каждом
+    изменении статуса (OrderService.change_status), поэтому статистика
+    за любой период - это сумма по нескольким сотням строк сводки,
+    а не агрегирование всей истории заказов.
+    """
+
+    @staticmethod
+    async def record_transition(
+        session,
+        order: Order,
+        old_status: Optional[str],
+        new_status: str
+    ):
+        """Учесть переход заказа из old_status в new_status"""
+        if old_status == new_status:
+            return
+
+        day = (order.created_at or datetime.utcnow()).date()
+        amount = order.total_amount or 0.0
+
+        # Корзина еще не заказ - в сводках ее нет
+        if old_status and old_status != OrderStatus.CART.value:
+            await SalesStatsService._add_daily(session, day, old_status, -1, -amount)
+        if new_status != OrderStatus.CART.value:
+            await SalesStatsService._add_daily(session, day, new_status, 1, amount)
+
+        was_sold = old_status in SOLD_STATUSES
+        is_sold = new_status in SOLD_STATUSES
+        if was_sold != is_sold:
+            sign = 1 if is_sold else -1
+            await SalesStatsService._add_dishes(session, day, order.id, sign)
+            await SalesStatsService._add_user(session, order.user_id, sign, amount * sign)
+
+    @staticmethod
+    async def get_period_stats(session, start_date: date) -> Dict[str, Tuple[int, float]]:
+        """Количество и сумма заказов по статусам начиная с start_date"""
+        result = await session.execute(
+            select(
+                DailySales.status,
+                func.sum(DailySales.orders_count),
+                func.sum(DailySales.total_amount)
+            )
+            .where(DailySales.day >= start_date)
+            .group_by(DailySales.status)
+        )
+        return {
+            # Сумма копится инкрементами +-amount, округляем погрешность float
+            status: (count or 0, round(amount or 0.0, 2))
+            for status, count, amount in result
+            if count
+        }
+
+    @staticmethod
+    async def get_top_dishes(session, limit: int = 10) -> List[tuple]:
+        """Топ блюд за все время: (название, порции, заказы, выручка)"""
+        total_quantity = func.sum(DailyDishSales.quantity).label("total_quantity")
+        result = await session.execute(
+            select(
+                Dish.name,
+                total_quantity,
+                func.sum(DailyDishSales.orders_count),
+                func.sum(DailyDishSales.revenue)
+            )
+            .join(Dish, Dish.id == DailyDishSales.dish_id)
+            .group_by(Dish.id, Dish.name)
+            .having(total_quantity > 0)
+            .order_by(desc(total_quantity))
+            .limit(limit)
+        )
+        return result.all()
+
+    @staticmethod
+    async def get_top_customers(session, limit: int = 10) -> List[tuple]:
+        """Топ клиентов за все время: (имя, фамилия, username, заказы, сумма)"""
+        result = await session.execute(
+            select(
+                User.first_name,
+                User.last_name,
+                User.username,
+                UserSales.orders_count,
+                UserSales.total_spent
+            )
+            .join(User, User.id == UserSales.user_id)
+            .where(UserSales.orders_count > 0)
+            .order_by(desc(UserSales.orders_count))
+            .limit(limit)
+        )
+        return result.all()
+
+    @staticmethod
+    async def forget_dish(session, dish_id: int):
+        """Удалить блюдо из сводки - перед удалением самого блюда и его позиций"""
+        await session.execute(
+            delete(DailyDishSales)
+            .where(DailyDishSales.dish_id == dish_id)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    async def rebuild(session) -> Tuple[int, int, int]:
+        """Пересобрать сводки по таблице заказов (бэкфилл)"""
+        await session.execute(delete(DailySales))
+        await session.execute(delete(DailyDishSales))
+        await session.execute(delete(UserSales))
+
+        order_day = day_of(Order.created_at)
+        sales = await session.execute(
+            DailySales.__table__.insert().from_select(
+                ["day", "status", "orders_count", "total_amount"],
+                select(
+                    order_day,
+                    Order.status,
+                    func.count(Order.id),
+                    func.coalesce(func.sum(Order.total_amount), 0.0)
+                )
+                .where(Order.status != OrderStatus.CART.value)
+                .group_by(order_day, Order.status)
+            )
+        )
+        dishes = await session.execute(
+            DailyDishSales.__table__.insert().from_select(
+                ["day", "dish_id", "quantity", "revenue", "orders_count"],
+                select(
+                    order_day,
+                    OrderItem.dish_id,
+                    func.sum(OrderItem.quantity),
+                    func.sum(OrderItem.quantity * OrderItem.price),
+                    func.count(func.distinct(Order.id))
+                )
+                .join(Order, Order.id == OrderItem.order_id)
+                .where(Order.status.in_(SOLD_STATUSES))
+                .group_by(order_day, OrderItem.dish_id)
+            )
+        )
+        users = await session.execute(
+            UserSales.__table__.insert().from_select(
+                ["user_id", "orders_count", "total_spent"],
+                select(
+                    Order.user_id,
+                    func.count(Order.id),
+                    func.coalesce(func.sum(Order.total_amount), 0.0)
+                )
+                .where(Order.status.in_(SOLD_STATUSES))
+                .group_by(Order.user_id)
+            )
+        )
+        return sales.rowcount, dishes.rowcount, users.rowcount
+
+    @staticmethod
+    async def _add_daily(session, day: date, status: str, count: int, amount: float):
+        insert = dialect_insert(session)
+        stmt = insert(DailySales).values(
+            day=day, status=status, orders_count=count, total_amount=amount
+        )
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[DailySales.day, DailySales.status],
+            set_={
+                "orders_count": DailySales.orders_count + stmt.excluded.orders_count,
+                "total_amount": DailySales.total_amount + stmt.excluded.total_amount
+            }
+        ))
+
+    @staticmethod
+    async def _add_dishes(session, day: date, order_id: int, sign: int):
+        """Прибавить (sign=1) или вычесть (sign=-1) позиции заказа"""
+        insert = dialect_insert(session)
+        stmt = insert(DailyDishSales).from_select(
+            ["day", "dish_id", "quantity", "revenue", "orders_count"],
+            select(
+                literal(day, DailyDishSales.day.type),
+                OrderItem.dish_id,
+                OrderItem.quantity * sign,
+                OrderItem.quantity * OrderItem.price * sign,
+                literal(sign)
+            ).where(OrderItem.order_id == order_id)
+        )
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyDishSales.day, DailyDishSales.dish_id],
+            set_={
+                "quantity": DailyDishSales.quantity + stmt.excluded.quantity,
+                "revenue": DailyDishSales.revenue + stmt.excluded.revenue,
+                "orders_count": DailyDishSales.orders_count + stmt.excluded.orders_count
+            }
+        ))
+
+    @staticmethod
+    async def _add_user(session, user_id: int, count: int, amount: float):
+        insert = dialect_insert(session)
+        stmt = insert(UserSales).values(user_id=user_id, orders_count=count, total_spent=amount)
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[UserSales.user_id],
+            set_={
+                "orders_count": UserSales.orders_count + stmt.excluded.orders_count,
+                "total_spent": UserSales.total_spent + stmt.excluded.total_spent
+            }
+        ))
@@ -0,0 +1,241 @@
+"""Хранилище скриншотов оплаты с адресацией по содержимому"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from contextlib import suppress
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import aiofiles.os
+from PIL import Image, ImageOps
+from sqlalchemy import case, func, select
+
+from app.config import settings
+from app.database import async_session_maker, Order, OrderStatus
+from app.services.admin_orders import CANCELLED_STATUSES
+from app.utils.helpers import download_telegram_file
+
+# Статусы, после которых скриншот нужен только для истории
+FINISHED_STATUSES = [OrderStatus.COMPLETED.value, *CANCELLED_STATUSES]
+
+THUMB_SUFFIX = ".thumb.jpg"
+
+
+class StoredScreenshot(NamedTuple):
+    """Сохраненный скриншот: пути относительно settings.upload_path"""
+    path: str
+    thumb_path: Optional[str]
+    sha256: str
+    size: int
+    deduplicated: bool
+
+
+class SweepStats(NamedTuple):
+    """Итог очистки хранилища"""
+    deleted: int
+    freed_bytes: int
+    kept_bytes: int
+
+
+class ScreenshotStore:
+    """Скриншоты в каталоге screenshots/ под settings.upload_path.
+
+    Файл хранится один раз по SHA-256 содержимого:
+    screenshots/ab/cd/<sha256>.jpg, рядом - сжатая миниатюра для
+    предпросмотра у админа. Повторно отправленная картинка не занимает
+    место. Очистка (sweep) удаляет скриншоты завершенных заказов старше
+    retention_days, файлы без заказов и, если каталог все еще больше
+    max_bytes, самые старые скриншоты завершенных заказов. Скриншоты
+    заказов в работе и файлы моложе суток не удаляются никогда.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        retention_days: int = 90,
+        max_bytes: int = 1024 * 1024 * 1024,
+        thumb_size: int = 320,
+        sweep_interval: float = 6 * 3600,
+        session_maker=async_session_maker
+    ):
+        self.root = root or settings.upload_path
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.thumb_size = thumb_size
+        self.sweep_interval = sweep_interval
+        self.session_maker = session_maker
+        # Файлы моложе grace не трогаем: заказ со ссылкой на них мог еще не сохраниться
+        self.orphan_grace = 24 * 3600
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def absolute(self, path: str) -> str:
+        return os.path.join(self.root, path)
+
+    @staticmethod
+    def thumbnail_path(path: str) -> str:
+        """Путь миниатюры для пути скриншота"""
+        return os.path.splitext(path)[0] + THUMB_SUFFIX
+
+    async def save_from_telegram(self, bot, photo) -> StoredScreenshot:
+        """Скачать фото из Telegram и положить в хранилище"""
+        tmp_path = self.absolute(os.path.join("screenshots", "tmp", f"{uuid.uuid4().hex}.jpg"))
+        saved = await download_telegram_file(bot, photo, tmp_path)
+
+        digest = saved.sha256
+        path = os.path.join("screenshots", digest[:2], digest[2:4], f"{digest}.jpg")
+        absolute = self.absolute(path)
+
+        deduplicated = await aiofiles.os.path.exists(absolute)
+        if deduplicated:
+            await aiofiles.os.remove(tmp_path)
+            # Свежий mtime защищает файл от очистки, пока заказ не сохранен
+            await asyncio.to_thread(os.utime, absolute)
+        else:
+            await aiofiles.os.makedirs(os.path.dirname(absolute), exist_ok=True)
+            await aiofiles.os.replace(tmp_path, absolute)
+
+        thumb_path = self.thumbnail_path(path)
+        if not await aiofiles.os.path.exists(self.absolute(thumb_path)):
+            try:
+                # Декодирование и сжатие - в пуле потоков, цикл событий не ждет
+                await asyncio.to_thread(self._make_thumbnail, absolute, self.absolute(thumb_path))
+            except Exception as e:
+                logging.warning(f"Не удалось сделать миниатюру {path}: {e}")
+                thumb_path = None
+
+        return StoredScreenshot(path, thumb_path, digest, saved.size, deduplicated)
+
+    def _make_thumbnail(self, source: str, destination: str):
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((self.thumb_size, self.thumb_size))
+            part_path = f"{destination}.part"
+            image.convert("RGB").save(part_path, "JPEG", quality=70, optimize=True)
+        os.replace(part_path, destination)
+
+    def start_sweeper(self):
+        """Запустить периодическую очистку"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def close(self):
+        if self._sweeper and not self._sweeper.done():
+            self._sweeper.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._sweeper
+        self._sweeper = None
+
+    async def sweep(self) -> SweepStats:
+        """Удалить устаревшие и брошенные скриншоты, уложиться в max_bytes"""
+        files = await asyncio.to_thread(self._scan)
+
+        # Один GROUP BY: когда путь последний раз использовался и есть ли заказы в работе
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(
+                    Order.payment_screenshot,
+                    func.max(Order.created_at),
+                    func.sum(case((Order.status.in_(FINISHED_STATUSES), 0), else_=1))
+                )
+                .where(Order.payment_screenshot.isnot(None))
+                .group_by(Order.payment_screenshot)
+            )
+            references: Dict[str, Tuple[datetime, int]] = {
+                path: (last_used, active or 0) for path, last_used, active in result
+            }
+
+        now = time.time()
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        to_delete, candidates = [], []
+        for path, (size, mtime) in files.items():
+            if now - mtime < self.orphan_grace:
+                continue
+
+            reference = references.get(path)
+            if reference is None:
+                to_delete.append(path)
+                continue
+
+            last_used, active = reference
+            if active:
+                continue
+            if last_used < cutoff:
+                to_delete.append(path)
+            else:
+                candidates.append((last_used, path))
+
+        total = sum(size for size, _ in files.values())
+        freed = sum(files[path][0] for path in to_delete)
+
+        # Лимит диска: дальше удаляем самые старые завершенные заказы
+        for _, path in sorted(candidates):
+            if total - freed <= self.max_bytes:
+                break
+            to_delete.append(path)
+            freed += files[path][0]
+
+        await asyncio.to_thread(self._remove, to_delete)
+        stats = SweepStats(len(to_delete), freed, total - freed)
+        logging.info(
+            f"Очистка скриншотов: удалено {stats.deleted}, "
+            f"освобождено {stats.freed_bytes} байт, занято {stats.kept_bytes} байт"
+        )
+        return stats
+
+    def _scan(self) -> Dict[str, Tuple[int, float]]:
+        """Скриншоты на диске: путь -> (размер вместе с миниатюрой, mtime)"""
+        files: Dict[str, Tuple[int, float]] = {}
+        thumbs: Dict[str, int] = {}
+        base = self.absolute("screenshots")
+        tmp_dir = os.path.join(base, "tmp")
+        now = time.time()
+
+        for directory, _, names in os.walk(base):
+            for name in names:
+                absolute = os.path.join(directory, name)
+                try:
+                    stat = os.stat(absolute)
+                except FileNotFoundError:
+                    continue
+
+                if directory == tmp_dir:
+                    # Недокачанные файлы упавших загрузок
+                    if now - stat.st_mtime > self.orphan_grace:
+                        with suppress(OSError):
+                            os.remove(absolute)
+                    continue
+
+                path = os.path.relpath(absolute, self.root)
+                if name.endswith(THUMB_SUFFIX):
+                    thumbs[path] = stat.st_size
+                elif not name.endswith(".part"):
+                    files[path] = (stat.st_size, stat.st_mtime)
+
+        for path, (size, mtime) in files.items():
+            files[path] = (size + thumbs.get(self.thumbnail_path(path), 0), mtime)
+        return files
+
+    def _remove(self, paths):
+        for path in paths:
+            for target in (path, self.thumbnail_path(path)):
+                with suppress(FileNotFoundError):
+                    os.remove(self.absolute(target))
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logging.error(f"Ошибка очистки скриншотов: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+
+# Глобальное хранилище скриншотов
+screenshot_store = ScreenshotStore(
+    retention_days=settings.screenshot_retention_days,
+    max_bytes=settings.screenshot_max_disk_mb * 1024 * 1024,
+    thumb_size=settings.screenshot_thumb_size,
+    sweep_interval=settings.screenshot_sweep_interval_hours * 3600
+)
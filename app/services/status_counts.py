@@ -0,0 +1,93 @@
+"""Счетчики заказов по статусам для меню админ-панели"""
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import async_session_maker
+from app.services.admin_orders import AdminOrderService
+
+# Ключ в session.info: {реестр: изменения счетчиков, ожидающие commit}
+_PENDING_KEY = "status_count_deltas"
+
+
+class StatusCountRegistry:
+    """Количество заказов по статусам в памяти.
+
+    Заполняется одним GROUP BY при первом обращении, затем
+    поддерживается переходами статусов (OrderService): изменения
+    копятся в сессии и применяются только после успешного commit.
+    Раз в ttl секунд счетчики перечитываются из БД на случай
+    изменений в обход бота (скрипты, другой процесс).
+    """
+
+    def __init__(self, ttl: int = 300, session_maker=async_session_maker):
+        self.ttl = ttl
+        self.session_maker = session_maker
+        self._counts: Optional[Dict[str, int]] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    async def get_counts(self) -> Dict[str, int]:
+        """Получить количество заказов по статусам"""
+        if self._counts is None or time.monotonic() - self._loaded_at > self.ttl:
+            async with self._lock:
+                if self._counts is None or time.monotonic() - self._loaded_at > self.ttl:
+                    return dict(await self._load())
+        return dict(self._counts)
+
+    def track_transition(self, session, old_status: Optional[str], new_status: str):
+        """Запомнить переход статуса до commit сессии"""
+        if old_status == new_status:
+            return
+        pending = session.info.setdefault(_PENDING_KEY, {}).setdefault(self, Counter())
+        if old_status:
+            pending[old_status] -= 1
+        pending[new_status] += 1
+
+    def invalidate(self):
+        """Сбросить счетчики - следующее чтение загрузит их из БД"""
+        self._generation += 1
+        self._counts = None
+
+    def _apply(self, deltas: Counter):
+        self._generation += 1
+        if self._counts is None:
+            return
+        for status, delta in deltas.items():
+            self._counts[status] = self._counts.get(status, 0) + delta
+
+    async def _load(self) -> Dict[str, int]:
+        generation = self._generation
+        async with self.session_maker() as session:
+            counts = await AdminOrderService.count_by_status(session)
+
+        # Если во время загрузки прошел commit со сменой статуса, снимок
+        # мог его не увидеть - отдаем как есть, но не кэшируем
+        if generation == self._generation:
+            self._counts = counts
+            self._loaded_at = time.monotonic()
+        else:
+            logging.debug("Счетчики статусов изменились во время загрузки, кэш не обновлен")
+        return counts
+
+
+# Глобальный реестр счетчиков
+status_counts = StatusCountRegistry()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_deltas(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    for registry, deltas in (pending or {}).items():
+        registry._apply(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_deltas(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,74 @@
+"""Очереди апдейтов по чатам: по порядку внутри чата, параллельно между чатами"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Dict, Hashable
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+
+class LaneOverflowError(Exception):
+    """Очередь чата заполнена - апдейт отброшен"""
+
+
+class _Lane:
+    """Очередь одного чата"""
+
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0  # выполняется + ждут очереди
+
+
+class UpdateLanes(BaseEventIsolation):
+    """Изоляция событий aiogram: у каждого чата своя очередь апдейтов.
+
+    Диспетчер берет lock(key) до чтения состояния FSM и держит его, пока
+    обрабатывается апдейт. Поэтому апдейты одного чата выполняются по
+    одному в порядке поступления (двойное нажатие "В корзину" не создаст
+    две корзины), а разные чаты обрабатываются параллельно без общего
+    предела.
+
+    В очереди чата не больше max_pending апдейтов вместе с выполняемым;
+    следующие отклоняются LaneOverflowError, и поток нажатий одного
+    пользователя не копит задачи без предела. Очередь удаляется, как
+    только опустела, - в памяти держатся только активные чаты.
+    """
+
+    def __init__(self, max_pending: int = 20):
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._lanes: Dict[Hashable, _Lane] = {}
+
+    @property
+    def active(self) -> int:
+        """Сколько чатов сейчас с апдейтами в работе"""
+        return len(self._lanes)
+
+    def lane_key(self, key: StorageKey) -> Hashable:
+        # Весь чат, а не пара чат+пользователь из стратегии FSM
+        return key.bot_id, key.chat_id
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        lane_key = self.lane_key(key)
+        lane = self._lanes.get(lane_key)
+        if lane is None:
+            lane = self._lanes[lane_key] = _Lane()
+        elif lane.pending >= self.max_pending:
+            self.dropped += 1
+            raise LaneOverflowError(
+                f"в очереди чата {key.chat_id} уже {lane.pending} апдейтов"
+            )
+
+        lane.pending += 1
+        try:
+            async with lane.lock:
+                yield
+        finally:
+            lane.pending -= 1
+            if not lane.pending:
+                del self._lanes[lane_key]
+
+    async def close(self) -> None:
+        self._lanes.clear()
@@ -0,0 +1,169 @@
+"""Кэш пользователей для AuthMiddleware с отложенной записью профиля"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from aiogram.types import User as TgUser
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session_maker, User
+
+
+class UserCache:
+    """In-process кэш пользователей по telegram_id.
+
+    Записи вытесняются по TTL и по LRU при переполнении. Изменения
+    username/first_name/last_name не пишутся в БД сразу, а копятся и
+    сбрасываются пачкой фоновой задачей раз в flush_interval секунд.
+
+    is_admin закэшированного пользователя может отставать от БД до ttl
+    секунд, поэтому права проверяет AdminMiddleware запросом к БД.
+    """
+
+    def __init__(self, max_size: int, ttl: float, flush_interval: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+
+        self._entries: "OrderedDict[int, tuple[User, float]]" = OrderedDict()
+        self._pending: Dict[int, dict] = {}  # user.id -> изменившиеся поля
+        self._load_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def get_user(self, telegram_user: TgUser, session: Optional[AsyncSession] = None) -> User:
+        """Получить пользователя, при необходимости загрузив или создав его.
+
+        При промахе пользователь читается через session (сессию апдейта),
+        а без нее - через отдельную сессию.
+        """
+        user = self._get(telegram_user.id)
+
+        if user is None:
+            # Промахи редкие, поэтому сериализуем их одной блокировкой -
+            # это заодно защищает от двойного INSERT при быстрых повторных апдейтах
+            async with self._load_lock:
+                user = self._get(telegram_user.id)
+                if user is None:
+                    if session is None:
+                        async with async_session_maker() as own_session:
+                            user = await self._load_or_create(own_session, telegram_user)
+                    else:
+                        user = await self._load_or_create(session, telegram_user)
+                    self._put(user)
+
+        self._sync_profile(user, telegram_user)
+        return user
+
+    def invalidate(self, telegram_id: int):
+        """Удалить пользователя из кэша"""
+        self._entries.pop(telegram_id, None)
+
+    async def flush(self):
+        """Записать накопленные изменения профилей в БД"""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        try:
+            async with async_session_maker() as session:
+                # ORM bulk UPDATE по первичному ключу - один executemany на пачку
+                await session.execute(
+                    update(User),
+                    [{"id": user_id, **values} for user_id, values in pending.items()]
+                )
+                await session.commit()
+            logging.debug(f"UserCache: записано {len(pending)} профилей")
+        except Exception as e:
+            logging.error(f"UserCache: ошибка записи профилей: {e}")
+            # Возвращаем изменения в очередь, не затирая более свежие
+            for user_id, values in pending.items():
+                self._pending[user_id] = {**values, **self._pending.get(user_id, {})}
+
+    async def close(self):
+        """Остановить фоновую запись и сбросить остаток изменений"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+        await self.flush()
+
+    def _get(self, telegram_id: int) -> Optional[User]:
+        entry = self._entries.get(telegram_id)
+        if entry is None:
+            return None
+
+        user, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[telegram_id]
+            return None
+
+        self._entries.move_to_end(telegram_id)
+        return user
+
+    def _put(self, user: User):
+        self._entries[user.telegram_id] = (user, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user.telegram_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _load_or_create(self, session: AsyncSession, telegram_user: TgUser) -> User:
+        result = await session.execute(
+            select(User).where(User.telegram_id == telegram_user.id)
+        )
+        user = result.scalar_one_or_none()
+
+        if not user:
+            # Новый пользователь нужен сразу с id, поэтому создаем синхронно
+            user = User(
+                telegram_id=telegram_user.id,
+                username=telegram_user.username,
+                first_name=telegram_user.first_name,
+                last_name=telegram_user.last_name,
+                is_admin=False  # Администраторы назначаются через настройки
+            )
+            session.add(user)
+            await session.flush()
+            # Значения по умолчанию из БД - до commit, пока соединение еще у сессии
+            await session.refresh(user)
+            await session.commit()
+
+        # Кэш живет дольше сессии: откат транзакции апдейта не должен
+        # сбрасывать атрибуты закэшированного объекта
+        session.expunge(user)
+        return user
+
+    def _sync_profile(self, user: User, telegram_user: TgUser):
+        """Обновить профиль в кэше и поставить запись в очередь, если он изменился"""
+        changes = {}
+        for field in ("username", "first_name", "last_name"):
+            value = getattr(telegram_user, field)
+            if getattr(user, field) != value:
+                setattr(user, field, value)
+                changes[field] = value
+
+        if not changes:
+            return
+
+        self._pending.setdefault(user.id, {}).update(changes)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+# Глобальный кэш пользователей
+user_cache = UserCache(
+    max_size=settings.user_cache_size,
+    ttl=settings.user_cache_ttl,
+    flush_interval=settings.user_cache_flush_interval
+)
@@ -0,0 +1,186 @@
+"""Типизированные callback data и роутер с индексом по префиксам"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import UNHANDLED, SkipHandler
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.filters import Filter
+from aiogram.types import CallbackQuery
+
+# Ограничение Telegram на callback_data, байты
+MAX_CALLBACK_DATA = 64
+SEPARATOR = "_"
+
+
+class CallbackRoute(Filter):
+    """Шаблон callback data: префикс и типизированные поля через "_".
+
+    CallbackRoute("cart_set", item_id=int, quantity=int) собирает и
+    разбирает строки вида cart_set_15_3. Поля - int или str; первое
+    str-поле может содержать "_" (например, статус pending_payment),
+    остальные поля отсчитываются от него справа. Маршрут без полей
+    совпадает только со своим префиксом целиком.
+
+    Как фильтр aiogram передает в обработчик разобранные поля по именам.
+    """
+
+    def __init__(self, prefix: str, **fields: type):
+        for field_type in fields.values():
+            if field_type not in (int, str):
+                raise TypeError(f"{prefix}: поддерживаются только поля int и str")
+        self.prefix = prefix
+        self.fields: Tuple[Tuple[str, type], ...] = tuple(fields.items())
+        self.tokens = tuple(prefix.split(SEPARATOR))
+        # Первое str-поле забирает все лишние "_"
+        self._greedy = next((i for i, (_, t) in enumerate(self.fields) if t is str), None)
+
+    def pack(self, *values: Any) -> str:
+        """Собрать callback data из значений полей (в порядке объявления)"""
+        if len(values) != len(self.fields):
+            raise ValueError(f"{self.prefix}: ожидается полей {len(self.fields)}, передано {len(values)}")
+
+        parts = [self.prefix]
+        for index, ((name, field_type), value) in enumerate(zip(self.fields, values)):
+            text = str(int(value) if field_type is int else value)
+            if not text or (SEPARATOR in text and index != self._greedy):
+                raise ValueError(f"{self.prefix}: недопустимое значение поля {name}: {value!r}")
+            parts.append(text)
+
+        data = SEPARATOR.join(parts)
+        if len(data.encode()) > MAX_CALLBACK_DATA:
+            raise ValueError(f"callback data длиннее {MAX_CALLBACK_DATA} байт: {data}")
+        return data
+
+    def unpack(self, data: str) -> Optional[Dict[str, Any]]:
+        """Разобрать callback data; None - строка не подходит под шаблон"""
+        if not self.fields:
+            return {} if data == self.prefix else None
+
+        head = self.prefix + SEPARATOR
+        if not data.startswith(head):
+            return None
+        parts = data[len(head):].split(SEPARATOR)
+
+        count = len(self.fields)
+        if self._greedy is None:
+            if len(parts) != count:
+                return None
+        elif len(parts) < count:
+            return None
+        else:
+            # Склеиваем лишние части в жадное поле
+            tail = count - self._greedy - 1
+            end = len(parts) - tail
+            parts = parts[:self._greedy] + [SEPARATOR.join(parts[self._greedy:end])] + parts[end:]
+
+        values = {}
+        for (name, field_type), part in zip(self.fields, parts):
+            if field_type is int:
+                if not part.isdigit():
+                    return None
+                values[name] = int(part)
+            else:
+                if not part:
+                    return None
+                values[name] = part
+        return values
+
+    async def __call__(self, callback: CallbackQuery) -> Any:
+        if callback.data is None:
+            return False
+        values = self.unpack(callback.data)
+        if values is None:
+            return False
+        # Пустой dict aiogram считает непрошедшим фильтром
+        return values or True
+
+    def __str__(self) -> str:
+        return SEPARATOR.join([self.prefix, *(f"{{{name}}}" for name, _ in self.fields)])
+
+
+class _RouteNode:
+    """Узел индекса: один токен префикса (части между "_")"""
+
+    __slots__ = ("children", "exact", "with_fields")
+
+    def __init__(self):
+        self.children: Dict[str, "_RouteNode"] = {}
+        # Позиции обработчиков: маршрут без полей / с полями после префикса
+        self.exact: List[int] = []
+        self.with_fields: List[int] = []
+
+
+class CallbackQueryObserver(TelegramEventObserver):
+    """Наблюдатель callback_query с индексом маршрутов.
+
+    Обычный наблюдатель проверяет фильтры всех обработчиков по очереди.
+    Здесь обработчики с CallbackRoute разложены по дереву токенов
+    префикса, и для callback data проверяются только те, чей префикс с
+    ней совпадает, - за число токенов в data. Обработчики без
+    CallbackRoute проверяются всегда; порядок регистрации сохраняется.
+    """
+
+    def __init__(self, router: Router, event_name: str = "callback_query"):
+        super().__init__(router=router, event_name=event_name)
+        self._index = _RouteNode()
+        self._unindexed: List[int] = []
+
+    def register(self, callback, *filters, flags=None, **kwargs):
+        super().register(callback, *filters, flags=flags, **kwargs)
+        position = len(self.handlers) - 1
+
+        route = next((f for f in filters if isinstance(f, CallbackRoute)), None)
+        if route is None:
+            self._unindexed.append(position)
+            return callback
+
+        node = self._index
+        for token in route.tokens:
+            node = node.children.setdefault(token, _RouteNode())
+        (node.with_fields if route.fields else node.exact).append(position)
+        return callback
+
+    def candidates(self, data: Optional[str]) -> List[HandlerObject]:
+        """Обработчики, которые могут подойти для callback data, по порядку регистрации"""
+        positions = list(self._unindexed)
+        if data:
+            tokens = data.split(SEPARATOR)
+            last = len(tokens) - 1
+            node = self._index
+            for i, token in enumerate(tokens):
+                node = node.children.get(token)
+                if node is None:
+                    break
+                positions.extend(node.exact if i == last else node.with_fields)
+            positions.sort()
+        return [self.handlers[position] for position in positions]
+
+    async def trigger(self, event: CallbackQuery, **kwargs: Any) -> Any:
+        # Копия TelegramEventObserver.trigger из aiogram 3.31.0, но только по
+        # кандидатам из индекса. Использует приватный _resolve_middlewares -
+        # при обновлении aiogram сверьте с исходным trigger
+        for handler in self.candidates(event.data):
+            kwargs["handler"] = handler
+            result, data = await handler.check(event, **kwargs)
+            if result:
+                kwargs.update(data)
+                try:
+                    wrapped_inner = self.outer_middleware.wrap_middlewares(
+                        self._resolve_middlewares(),
+                        handler.call,
+                    )
+                    return await wrapped_inner(event, kwargs)
+                except SkipHandler:
+                    continue
+
+        return UNHANDLED
+
+
+class CallbackRouter(Router):
+    """Router, в котором callback_query ищет обработчик по индексу маршрутов"""
+
+    def __init__(self, *, name: Optional[str] = None):
+        super().__init__(name=name)
+        self.callback_query = CallbackQueryObserver(router=self)
+        self.observers["callback_query"] = self.callback_query
@@ -1,10 +1,31 @@
 """Вспомогательные функции"""
+import hashlib
+import logging
 import os
 import uuid
+from contextlib import aclosing, suppress
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import AsyncIterator, NamedTuple, Optional
+
+import aiofiles
+import aiofiles.os
+
 from app.config import settings
 
+# Размер блока при скачивании и записи файлов
+CHUNK_SIZE = 64 * 1024
+
+
+class FileTooLargeError(ValueError):
+    """Файл больше допустимого размера"""
+
+
+class SavedFile(NamedTuple):
+    """Файл, записанный на диск"""
+    path: str
+    size: int
+    sha256: str
+
 
 def format_price(price: float) -> str:
     """Форматирование цены"""
@@ -57,14 +78,93 @@ async def save_file(file_content: bytes, filename: str) -> str:
     file_path = os.path.join(settings.upload_path, filename)
     
     # Создаем директорию если не существует
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    await aiofiles.os.makedirs(os.path.dirname(file_path), exist_ok=True)
     
-    with open(file_path, 'wb') as f:
-        f.write(file_content)
+    # Запись идет в пуле потоков aiofiles и не блокирует обработку других апдейтов
+    async with aiofiles.open(file_path, 'wb') as f:
+        await f.write(file_content)
     
     return file_path
 
 
+async def save_stream(
+    chunks: AsyncIterator[bytes],
+    file_path: str,
+    max_size: Optional[int] = None
+) -> SavedFile:
+    """Записать поток на диск частями, считая размер и SHA-256 на лету.
+    
+    Файл пишется во временный .part и переименовывается только после
+    успешного окончания потока. Если поток превысил max_size (по умолчанию
+    settings.max_file_size), скачивание прерывается с FileTooLargeError,
+    а недописанный файл удаляется.
+    """
+    if max_size is None:
+        max_size = settings.max_file_size
+    
+    await aiofiles.os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    part_path = f"{file_path}.part"
+    digest = hashlib.sha256()
+    size = 0
+    
+    try:
+        async with aclosing(chunks) as stream, aiofiles.open(part_path, "wb") as f:
+            async for chunk in stream:
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError(f"Файл больше {max_size} байт")
+                digest.update(chunk)
+                await f.write(chunk)
+        await aiofiles.os.replace(part_path, file_path)
+    except BaseException:
+        with suppress(OSError):
+            await aiofiles.os.remove(part_path)
+        raise
+    
+    return SavedFile(file_path, size, digest.hexdigest())
+
+
+async def _read_local_file(file_path: str) -> AsyncIterator[bytes]:
+    """Чтение файла частями (локальный сервер Bot API)"""
+    async with aiofiles.open(file_path, "rb") as f:
+        while chunk := await f.read(CHUNK_SIZE):
+            yield chunk
+
+
+async def download_telegram_file(
+    bot,
+    file,
+    destination: str,
+    max_size: Optional[int] = None,
+    timeout: int = 30
+) -> SavedFile:
+    """Скачать файл Telegram (file_id или PhotoSize/Document) потоком на диск"""
+    if max_size is None:
+        max_size = settings.max_file_size
+    
+    # Размер известен заранее - не начинаем заведомо лишнее скачивание
+    if getattr(file, "file_size", None) and file.file_size > max_size:
+        raise FileTooLargeError(f"Файл больше {max_size} байт")
+    
+    file_id = file if isinstance(file, str) else file.file_id
+    file_info = await bot.get_file(file_id)
+    if file_info.file_size and file_info.file_size > max_size:
+        raise FileTooLargeError(f"Файл больше {max_size} байт")
+    
+    api = bot.session.api
+    if api.is_local:
+        chunks = _read_local_file(api.wrap_local_file.to_local(file_info.file_path))
+    else:
+        chunks = bot.session.stream_content(
+            url=api.file_url(bot.token, file_info.file_path),
+            timeout=timeout,
+            chunk_size=CHUNK_SIZE,
+            raise_for_status=True
+        )
+    
+    return await save_stream(chunks, destination, max_size)
+
+
 def is_valid_image_type(filename: str) -> bool:
     """Проверка типа изображения"""
     valid_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
@@ -160,33 +260,21 @@ async def get_file_url(file_path: str) -> Optional[str]:
 
 
 async def save_payment_screenshot(photo, order_id: int, bot=None) -> str:
-    """Сохранить скриншот оплаты"""
-    try:
-        # Создаем директорию для скриншотов если её нет
-        screenshots_dir = os.path.join(settings.upload_path, "screenshots")
-        os.makedirs(screenshots_dir, exist_ok=True)
-        
-        # Генерируем уникальное имя файла
-        filename = f"payment_{order_id}_{uuid.uuid4().hex}.jpg"
-        file_path = os.path.join(screenshots_dir, filename)
-        
-        # Используем переданный bot объект
-        if bot:
-            await bot.download(photo, file_path)
-        else:
-            # Пробуем альтернативный способ
-            file_info = await photo.get_file()
-            file_url = f"https://api.telegram.org/file/bot{bot.token}/{file_info.file_path}"
-            
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                async with session.get(file_url) as resp:
-                    with open(file_path, 'wb') as f:
-                        f.write(await resp.read())
-        
-        # Возвращаем относительный путь
-        return f"screenshots/{filename}"
-        
-    except Exception as e:
-        print(f"Ошибка сохранения скриншота: {e}")
-        return ""
+    """Сохранить скриншот оплаты, вернуть путь относительно UPLOAD_PATH.
+    
+    Ошибки скачивания, в том числе FileTooLargeError, не глотаются - о них
+    нужно сообщить клиенту, а заказ оставить ждать скриншот.
+    """
+    from app.services.screenshots import screenshot_store
+    
+    if bot is None:
+        # Скачать файл без бота (токена) нельзя
+        raise ValueError("bot не передан")
+    
+    stored = await screenshot_store.save_from_telegram(bot, photo)
+    logging.info(
+        f"Скриншот заказа #{order_id}: {stored.size} байт, sha256 {stored.sha256}"
+        f"{' (уже был в хранилище)' if stored.deduplicated else ''}"
+    )
+    
+    return stored.path
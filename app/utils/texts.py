@@ -329,6 +329,18 @@ SCREENSHOT_REQUIRED = """
 Выберите действие:
 """
 
+SCREENSHOT_TOO_LARGE = """
+❌ Файл слишком большой: максимальный размер {max_size_mb} МБ.
+
+📷 Пожалуйста, отправьте скриншот оплаты еще раз.
+"""
+
+SCREENSHOT_SAVE_ERROR = """
+❌ Не удалось сохранить скриншот.
+
+📷 Пожалуйста, отправьте скриншот оплаты еще раз.
+"""
+
 SCREENSHOT_RETRY_MESSAGE = """
 📷 Отправьте скриншот оплаты
 
@@ -413,6 +425,7 @@ ADMIN_HELP = """
 
 Доступные команды:
 • /admin - открыть панель управления
+• /perf - производительность обработчиков
 • Управление заказами
 • Просмотр статистики
 • Настройки бота
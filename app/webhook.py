@@ -0,0 +1,171 @@
+"""
+Режим webhook - прием апдейтов aiohttp-сервером вместо long polling
+"""
+import asyncio
+import logging
+import signal
+import time
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import TelegramObject
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from app.config import settings
+
+
+class DrainingRequestHandler(SimpleRequestHandler):
+    """Обработчик webhook с мягкой остановкой.
+
+    Апдейт обрабатывается в фоне: Telegram сразу получает ответ 200, а
+    задачу обработки outer middleware диспетчера запоминает в self._tasks.
+    При остановке новые апдейты получают 503 - Telegram повторит их позже,
+    уже новому процессу, - а принятые дорабатывают не дольше drain_timeout
+    секунд. Сессию бота не закрываем: она еще нужна outbox в on_shutdown.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: Optional[str] = None,
+        drain_timeout: float = 30,
+        **data
+    ):
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.drain_timeout = drain_timeout
+        self.draining = False
+        self._tasks: Set[asyncio.Task] = set()
+        dispatcher.update.outer_middleware(self._track_update)
+
+    @property
+    def in_flight(self) -> int:
+        """Сколько апдейтов сейчас обрабатывается"""
+        return len(self._tasks)
+
+    async def _track_update(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        # Апдейт обрабатывается в своей фоновой задаче - ее и ждет drain()
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            return await handler(event, data)
+        finally:
+            self._tasks.discard(task)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.draining:
+            return web.Response(status=503, text="Shutting down")
+        return await super().handle(request)
+
+    async def drain(self) -> int:
+        """Перестать принимать апдейты и дождаться начатых, вернуть число прерванных"""
+        self.draining = True
+        # Задачи уже принятых апдейтов доходят до middleware за один шаг цикла
+        await asyncio.sleep(0)
+        tasks = set(self._tasks)
+        if not tasks:
+            return 0
+
+        logging.info(f"Webhook: ожидание {len(tasks)} обработчиков...")
+        _, pending = await asyncio.wait(tasks, timeout=self.drain_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logging.warning(f"Webhook: прервано обработчиков по таймауту: {len(pending)}")
+        return len(pending)
+
+    async def close(self):
+        await self.drain()
+
+
+# Ключ обработчика webhook в приложении aiohttp
+WEBHOOK_HANDLER = web.AppKey("webhook_handler", DrainingRequestHandler)
+
+
+def create_app(
+    dp: Dispatcher,
+    bot: Bot,
+    path: str = "/webhook",
+    secret_token: Optional[str] = None,
+    drain_timeout: float = 30
+) -> web.Application:
+    """Приложение aiohttp: POST path - апдейты, GET /health - проверка живости.
+
+    При остановке приложения (on_shutdown) сначала дожидаемся начатых
+    обработчиков, затем диспетчер получает событие shutdown.
+    """
+    app = web.Application()
+    handler = DrainingRequestHandler(dp, bot, secret_token=secret_token, drain_timeout=drain_timeout)
+    handler.register(app, path=path)
+    app[WEBHOOK_HANDLER] = handler
+    started = time.monotonic()
+
+    async def health(request: web.Request) -> web.Response:
+        # Во время остановки отвечаем 503, чтобы балансировщик снял трафик
+        return web.json_response(
+            {
+                "status": "draining" if handler.draining else "ok",
+                "in_flight": handler.in_flight,
+                "uptime": round(time.monotonic() - started)
+            },
+            status=503 if handler.draining else 200
+        )
+
+    app.router.add_get("/health", health)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def _wait_for_stop_signal():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # На Windows обработчиков сигналов нет - остается KeyboardInterrupt
+        with suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with suppress(NotImplementedError):
+                loop.remove_signal_handler(sig)
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """Поднять сервер, зарегистрировать webhook и работать до SIGINT/SIGTERM"""
+    app = create_app(
+        dp, bot,
+        path=settings.webhook_path,
+        secret_token=settings.webhook_secret or None,
+        drain_timeout=settings.webhook_drain_timeout
+    )
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.webapp_host, settings.webapp_port)
+    await site.start()
+    logging.info(f"Webhook: сервер слушает {settings.webapp_host}:{settings.webapp_port}{settings.webhook_path}")
+
+    try:
+        if settings.webhook_url:
+            await bot.set_webhook(
+                url=settings.webhook_url.rstrip("/") + settings.webhook_path,
+                secret_token=settings.webhook_secret or None,
+                allowed_updates=dp.resolve_used_update_types(),
+                # Апдейты, отклоненные 503 при остановке прошлого процесса, ждут в очереди Telegram
+                drop_pending_updates=settings.webhook_drop_pending_updates
+            )
+        else:
+            logging.warning("WEBHOOK_URL не задан - webhook в Telegram не регистрируется")
+        await _wait_for_stop_signal()
+    finally:
+        # Закрываем порт, дожидаемся обработчиков, останавливаем диспетчер
+        logging.info("Webhook: остановка сервера...")
+        await runner.cleanup()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Заполнение сводок daily_sales / daily_dish_sales / user_sales по истории заказов.
+
+Нужно один раз после миграций 0004 и 0008 (или при расхождении статистики).
+Запуск: python backfill_sales_stats.py
+"""
+import asyncio
+
+from app.database import async_session_maker, init_database
+from app.services.sales_stats import SalesStatsService
+
+
+async def backfill():
+    await init_database()
+
+    async with async_session_maker() as session:
+        sales_rows, dish_rows, user_rows = await SalesStatsService.rebuild(session)
+        await session.commit()
+
+    print(
+        f"✅ Сводки пересобраны: {sales_rows} строк daily_sales, {dish_rows} строк daily_dish_sales, "
+        f"{user_rows} строк user_sales"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Сравнение SQLite и PostgreSQL на сквозном бенчмарке диспетчера.
+
+Запускает bench_dispatcher.py по разу на каждой СУБД (отдельным
+процессом - движок создается при импорте app.database) и печатает оба
+отчета подряд.
+
+PostgreSQL берется из BENCH_POSTGRES_URL (postgresql+asyncpg://...),
+например из docker compose --profile postgres up -d db; иначе
+поднимается встроенный сервер pgserver (pip install pgserver). База
+бенчмарка пересоздается - не указывайте рабочую.
+
+Запуск: python bench_backends.py [пользователей]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+USERS = sys.argv[1] if len(sys.argv) > 1 else "100"
+
+
+def run_bench(title: str, database_url: str):
+    print(f"\n🗄 {title}: {database_url}")
+    env = dict(os.environ, BENCH_DATABASE_URL=database_url)
+    subprocess.run([sys.executable, "bench_dispatcher.py", USERS], env=env, check=True)
+
+
+def main():
+    bench_db = os.getenv("BENCH_DB_PATH", "./bench.db")
+    run_bench("SQLite", f"sqlite+aiosqlite:///{bench_db}")
+
+    postgres_url = os.getenv("BENCH_POSTGRES_URL")
+    if postgres_url:
+        run_bench("PostgreSQL", postgres_url)
+        return
+
+    try:
+        import pgserver
+    except ImportError:
+        print(
+            "\n⚠️ PostgreSQL пропущен: задайте BENCH_POSTGRES_URL "
+            "(docker compose --profile postgres up -d db) или установите pgserver"
+        )
+        return
+
+    server = pgserver.get_server(tempfile.mkdtemp(prefix="pg_bench_"), cleanup_mode="stop")
+    try:
+        socket_dir = server.get_uri().split("host=", 1)[1]
+        run_bench("PostgreSQL (pgserver)", f"postgresql+asyncpg://postgres@/postgres?host={socket_dir}")
+    finally:
+        server.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарк выбора обработчика для callback query.
+
+Собирает настоящие роутеры (register_all_handlers) и для набора
+нажатий пользователя и админа считает, сколько стоит найти обработчик
+(без его вызова), тремя способами:
+- прежние фильтры F.data == ... / F.data.startswith(...) по очереди;
+- CallbackRoute по очереди, как в обычном Router;
+- CallbackRoute по индексу префиксов (CallbackRouter).
+
+aiogram выполняет синхронные фильтры (в том числе F.data) через
+asyncio.to_thread, поэтому в первом способе каждая проверка - переход
+в пул потоков; CallbackRoute - асинхронный фильтр.
+
+Запуск: python bench_callbacks.py
+"""
+import asyncio
+import time
+
+from aiogram import Dispatcher, F
+from aiogram.dispatcher.event.handler import FilterObject, HandlerObject
+from aiogram.types import CallbackQuery, User as TelegramUser
+
+from app.handlers import register_all_handlers
+from app.utils.callbacks import CallbackRoute
+
+ROUNDS = 2000
+
+# Нажатия пользователя (основная нагрузка) и несколько админских
+CALLBACKS = [
+    "menu", "category_3", "dish_12", "add_to_cart_12_5", "cart",
+    "cart_increase_7", "cart_decrease_7", "checkout", "payment_card",
+    "order_15", "faq_delivery", "main_menu",
+    "admin_order_15", "confirm_payment_15",
+]
+
+
+def legacy_handlers(handlers):
+    """Те же обработчики с фильтрами F.data, как до CallbackRoute"""
+    legacy = []
+    for handler in handlers:
+        filters = []
+        for filter_object in handler.filters:
+            route = filter_object.callback
+            if isinstance(route, CallbackRoute):
+                magic = F.data.startswith(route.prefix + "_") if route.fields else F.data == route.prefix
+                filters.append(FilterObject(magic))
+            else:
+                filters.append(filter_object)
+        legacy.append(HandlerObject(callback=handler.callback, filters=filters))
+    return legacy
+
+
+async def resolve(chains, callback: CallbackQuery):
+    """Первый подходящий обработчик; возвращает число проверенных"""
+    checked = 0
+    for handlers in chains(callback.data):
+        for handler in handlers:
+            checked += 1
+            passed, _ = await handler.check(callback, raw_state=None)
+            if passed:
+                return checked
+    return checked
+
+
+async def measure(title, chains, callbacks):
+    for callback in callbacks:
+        await resolve(chains, callback)  # прогрев
+
+    checked = 0
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for callback in callbacks:
+            checked += await resolve(chains, callback)
+    elapsed = time.perf_counter() - started
+
+    calls = ROUNDS * len(callbacks)
+    print(f"{title}:")
+    print(f"   ⏱ {elapsed / calls * 1e6:.1f} мкс на нажатие, проверено обработчиков: {checked / calls:.1f}")
+    return elapsed
+
+
+async def main():
+    print("🔀 Бенчмарк выбора обработчика callback query")
+    print("=" * 60)
+
+    dp = Dispatcher()
+    register_all_handlers(dp)
+    routers = dp.sub_routers
+    total = sum(len(router.callback_query.handlers) for router in routers)
+    print(f"Обработчиков callback query: {total} в {len(routers)} роутерах")
+
+    user = TelegramUser(id=1, is_bot=False, first_name="Bench")
+    callbacks = [
+        CallbackQuery(id=str(i), chat_instance="1", data=data, from_user=user)
+        for i, data in enumerate(CALLBACKS)
+    ]
+
+    legacy = [legacy_handlers(router.callback_query.handlers) for router in routers]
+    linear = [router.callback_query.handlers for router in routers]
+
+    before = await measure("🐢 F.data по очереди (как было)", lambda data: legacy, callbacks)
+    await measure("🚶 CallbackRoute по очереди", lambda data: linear, callbacks)
+    after = await measure(
+        "⚡ CallbackRoute по индексу",
+        lambda data: (router.callback_query.candidates(data) for router in routers),
+        callbacks
+    )
+
+    print("=" * 60)
+    print(f"🚀 Ускорение выбора обработчика: x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
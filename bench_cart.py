@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк нажатия "+"/"-" в корзине: старый путь (загрузка всей корзины
+и пересчет суммы в Python) против точечных UPDATE.
+
+Запуск: python bench_cart.py [позиций_в_корзине] [нажатий]
+"""
+import asyncio
+import sys
+
+from bench_utils import (
+    Timer, reset_database, seed_catalog, seed_users
+)
+from sqlalchemy import select, and_
+
+from app.database import async_session_maker, Order, OrderItem, OrderStatus
+from app.database.instrumentation import QueryCounter
+from app.services.cart import CartService
+
+CART_ITEMS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+TAPS = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+
+async def legacy_tap(session, user_id: int, item_id: int, delta: int):
+    """Нажатие в прежней реализации обработчика и сервиса"""
+    cart = await CartService.get_cart_with_items(session, user_id)
+    for item in cart.items:
+        if item.id == item_id:
+            item.quantity += delta
+            break
+
+    items = (await session.execute(
+        select(OrderItem).where(OrderItem.order_id == cart.id)
+    )).scalars().all()
+    order = await session.get(Order, cart.id)
+    order.total_amount = sum(item.quantity * item.price for item in items)
+    await session.commit()
+
+
+async def current_tap(session, user_id: int, item_id: int, delta: int):
+    """Нажатие в текущей реализации"""
+    await CartService.change_item_quantity(session, user_id, item_id, delta, max_quantity=10)
+    await session.commit()
+
+
+async def run(title: str, tap, user_id: int, item_id: int):
+    timer = Timer()
+
+    with QueryCounter() as counter:
+        for i in range(TAPS):
+            delta = 1 if i % 2 == 0 else -1
+            async with async_session_maker() as session:
+                with timer.measure():
+                    await tap(session, user_id, item_id, delta)
+
+    print(f"{title}:")
+    print(f"   ⏱ {timer.summary()}")
+    print(f"   🗄 {counter.count / TAPS:.1f} SQL-запросов на нажатие")
+    return timer
+
+
+async def main():
+    print(f"🛒 Бенчмарк корзины: {CART_ITEMS} позиций, {TAPS} нажатий")
+    print("=" * 60)
+
+    await reset_database()
+    dish_ids = await seed_catalog(categories=5, dishes_per_category=max(1, CART_ITEMS // 5 + 1))
+    user_id = (await seed_users(1))[0]
+
+    async with async_session_maker() as session:
+        for dish_id in dish_ids[:CART_ITEMS]:
+            await CartService.add_item_to_cart(session, user_id, dish_id, 1)
+        await session.commit()
+
+        item_id = (await session.execute(
+            select(OrderItem.id)
+            .join(Order)
+            .where(and_(Order.user_id == user_id, Order.status == OrderStatus.CART.value))
+            .limit(1)
+        )).scalar_one()
+
+    legacy = await run("🐢 Прежняя реализация", legacy_tap, user_id, item_id)
+    current = await run("⚡ Точечные UPDATE", current_tap, user_id, item_id)
+
+    print("=" * 60)
+    print(f"🚀 Ускорение по p50: x{legacy.percentile(50) / current.percentile(50):.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк склейки нажатий +/- в корзине.
+
+Покупатели добавляют блюдо в корзину, открывают позицию и жмут "+" и
+"-" сериями с паузой между нажатиями, как живой пользователь; все
+покупатели одновременно. Считаются задержка ответа на нажатие, COMMIT
+и правки сообщений (EditMessageText) на нажатие - без склейки
+(CART_TAP_WINDOW=0: запись сразу после нажатия) и с окном по
+умолчанию. При окне 0 нажатия тоже склеиваются, если приходят, пока
+пишется предыдущая пачка, - чем больше нагрузка, тем заметнее.
+
+Запуск: python bench_cart_taps.py [пользователей] [нажатий]
+"""
+import asyncio
+import sys
+
+from bench_utils import Timer, reset_database, seed_catalog
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session_maker, Order, OrderItem, OrderStatus, User
+from app.database.instrumentation import QueryCounter
+from app.keyboards.callbacks import CART_DECREASE, CART_INCREASE, EDIT_CART_ITEM
+from app.services.cart_taps import cart_taps
+from app.services.user_cache import user_cache
+from bench_dispatcher import Bench, Journey
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+TAPS = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+TAP_INTERVAL = 0.05  # пауза между нажатиями одного покупателя, секунды
+LATENCY = 0.02  # ответ Telegram API, секунды
+
+
+async def item_id(telegram_id: int) -> int:
+    async with async_session_maker() as session:
+        return await session.scalar(
+            select(OrderItem.id)
+            .join(Order, Order.id == OrderItem.order_id)
+            .join(User, User.id == Order.user_id)
+            .where(User.telegram_id == telegram_id, Order.status == OrderStatus.CART.value)
+        )
+
+
+async def run(bench: Bench, title: str, window: float, dish_id: int, base_id: int):
+    cart_taps.window = window
+    journeys = [Journey(base_id + i) for i in range(USERS)]
+
+    async def prepare(journey: Journey) -> int:
+        await bench.feed(journey.command("/start"))
+        await bench.feed(journey.callback(f"add_to_cart_{dish_id}_1"))
+        item = await item_id(journey.telegram_id)
+        await bench.feed(journey.callback(EDIT_CART_ITEM.pack(item)))
+        return item
+
+    items = await asyncio.gather(*(prepare(journey) for journey in journeys))
+
+    timer = Timer()
+
+    async def storm(journey: Journey, item: int):
+        # Сначала "+" на две трети серии, затем "-"
+        for tap in range(TAPS):
+            route = CART_INCREASE if tap < TAPS * 2 // 3 else CART_DECREASE
+            with timer.measure():
+                await bench.feed(journey.callback(route.pack(item)))
+            await asyncio.sleep(TAP_INTERVAL)
+
+    edits = bench.session.calls["EditMessageText"]
+    flushes = cart_taps.flushes
+    with QueryCounter() as counter:
+        await asyncio.gather(*(storm(journey, item) for journey, item in zip(journeys, items)))
+        await cart_taps.close()
+    flushes = cart_taps.flushes - flushes
+    edits = bench.session.calls["EditMessageText"] - edits
+
+    taps = USERS * TAPS
+    print(f"{title}:")
+    print(f"   ⏱ ответ на нажатие: {timer.summary()}")
+    print(
+        f"   🗄 на нажатие: {counter.commits / taps:.2f} COMMIT, {counter.count / taps:.2f} SQL-запросов; "
+        f"✏️ правок сообщения: {edits / taps:.2f}"
+    )
+    print(f"   👆 нажатий на одну запись: {taps / max(flushes, 1):.1f}")
+    return counter.commits, edits
+
+
+async def main():
+    print(f"👆 Бенчмарк нажатий +/- в корзине: {USERS} покупателей по {TAPS} нажатий")
+    print("=" * 60)
+
+    await reset_database()
+    dish_id = (await seed_catalog(categories=1, dishes_per_category=1))[0]
+    bench = Bench(latency=LATENCY)
+    try:
+        before = await run(bench, "🐢 Окно 0 (запись сразу)", 0, dish_id, 6_000_000)
+        after = await run(
+            bench, f"⚡ Окно {settings.cart_tap_window} с", settings.cart_tap_window, dish_id, 7_000_000
+        )
+    finally:
+        cart_taps.window = settings.cart_tap_window
+        await user_cache.close()
+        await bench.storage.close()
+
+    print("=" * 60)
+    print(f"🚀 COMMIT меньше в x{before[0] / max(after[0], 1):.1f}, правок сообщения - в x{before[1] / max(after[1], 1):.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
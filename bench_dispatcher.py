@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Сквозной бенчмарк диспетчера: сколько апдейтов в секунду выдерживает бот.
+
+Собирает настоящий Dispatcher (register_all_middlewares и
+register_all_handlers) с фиктивной сессией бота и проигрывает путь
+покупателя на заполненной SQLite-базе: /start, меню, категория, блюдо,
+добавление в корзину, корзина, оформление, подтверждение, оплата картой,
+скриншот оплаты и подтверждение оплаты администратором.
+
+Два прохода:
+- последовательный - пользователи по одному, точные задержки и число
+  SQL-запросов для каждого шага;
+- параллельный - все пользователи одновременно (апдейты одного чата
+  по порядку, как их отдает Telegram), пропускная способность.
+
+Запуск: python bench_dispatcher.py [пользователей]
+"""
+import asyncio
+import io
+import sys
+import time
+from collections import defaultdict
+
+from bench_utils import FakeTelegramSession, Timer, reset_database, seed_catalog
+from aiogram import Bot, Dispatcher
+from PIL import Image
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session_maker, Dish
+from app.database.instrumentation import QueryCounter
+from app.handlers import register_all_handlers
+from app.main import create_events_isolation, create_storage
+from app.middlewares import register_all_middlewares, register_bot_middlewares
+from app.services.user_cache import user_cache
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+ADMIN_ID = 777
+QUANTITY = 5  # чтобы пройти MIN_ORDER_AMOUNT
+
+
+def _screenshot() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 1200), "white").save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+class Journey:
+    """Апдейты одного пользователя: текст, фото и нажатия кнопок"""
+
+    def __init__(self, telegram_id: int):
+        self.telegram_id = telegram_id
+        self.user = {"id": telegram_id, "is_bot": False, "first_name": f"User {telegram_id}"}
+        self.message_id = 0
+
+    def _message(self, **fields) -> dict:
+        self.message_id += 1
+        return {
+            "message_id": self.message_id,
+            "date": int(time.time()),
+            "chat": {"id": self.telegram_id, "type": "private"},
+            "from": self.user,
+            **fields
+        }
+
+    def command(self, command: str) -> dict:
+        return {"message": self._message(
+            text=command, entities=[{"type": "bot_command", "offset": 0, "length": len(command)}]
+        )}
+
+    def photo(self, file_id: str) -> dict:
+        return {"message": self._message(photo=[
+            {"file_id": file_id, "file_unique_id": file_id, "width": 800, "height": 1200}
+        ])}
+
+    def callback(self, data: str) -> dict:
+        return {"callback_query": {
+            "id": f"{self.telegram_id}-{self.message_id}",
+            "from": self.user,
+            "chat_instance": str(self.telegram_id),
+            "message": self._message(text="..."),
+            "data": data
+        }}
+
+
+class Bench:
+    def __init__(self, latency: float = 0.0):
+        self.session = FakeTelegramSession(latency=latency, file_content=_screenshot())
+        self.bot = Bot(token="42:BENCH", session=self.session)
+        self.storage = create_storage()
+        self.dp = Dispatcher(storage=self.storage, events_isolation=create_events_isolation())
+        register_all_middlewares(self.dp)
+        register_all_handlers(self.dp)
+        register_bot_middlewares(self.bot)
+        self.update_id = 0
+        self.admin = Journey(ADMIN_ID)
+
+    async def feed(self, update: dict):
+        self.update_id += 1
+        await self.dp.feed_raw_update(self.bot, {"update_id": self.update_id, **update})
+
+    async def order_id(self, journey: Journey) -> int:
+        context = self.dp.fsm.get_context(self.bot, journey.telegram_id, journey.telegram_id)
+        return (await context.get_data())["order_id"]
+
+    async def journey(self, journey: Journey, category_id: int, dish_id: int, step):
+        """Пройти путь покупателя; step(name, update) отправляет апдейт с замером"""
+        await step("start", journey.command("/start"))
+        await step("menu", journey.callback("menu"))
+        await step("category", journey.callback(f"category_{category_id}"))
+        await step("dish", journey.callback(f"dish_{dish_id}"))
+        await step("add_to_cart", journey.callback(f"add_to_cart_{dish_id}_{QUANTITY}"))
+        await step("cart", journey.callback("cart"))
+        await step("checkout", journey.callback("checkout"))
+        await step("confirm_order", journey.callback("confirm_order"))
+        await step("payment_card", journey.callback("payment_card"))
+        await step("screenshot", journey.photo(f"screenshot-{journey.telegram_id}"))
+        order_id = await self.order_id(journey)
+        await step("admin_confirm", self.admin.callback(f"confirm_payment_{order_id}"))
+
+
+async def sequential(bench: Bench, journeys, dishes):
+    timers = defaultdict(Timer)
+    queries = defaultdict(int)
+    checkouts = defaultdict(int)
+    commits = defaultdict(int)
+
+    async def step(name, update):
+        with QueryCounter() as counter:
+            with timers[name].measure():
+                await bench.feed(update)
+        queries[name] += counter.count
+        checkouts[name] += counter.checkouts
+        commits[name] += counter.commits
+
+    for journey, (dish_id, category_id) in zip(journeys, dishes):
+        await bench.journey(journey, category_id, dish_id, step)
+
+    print("🐢 Последовательно, по шагам:")
+    for name, timer in timers.items():
+        calls = len(timer.samples)
+        print(
+            f"   {name:<14} {timer.summary()}, SQL: {queries[name] / calls:.1f}, "
+            f"соединений: {checkouts[name] / calls:.1f}, COMMIT: {commits[name] / calls:.1f}"
+        )
+
+    total = Timer()
+    for timer in timers.values():
+        total.samples.extend(timer.samples)
+    calls = len(total.samples)
+    print(
+        f"   {'все апдейты':<14} {total.summary()}, SQL: {sum(queries.values()) / calls:.2f}, "
+        f"соединений: {sum(checkouts.values()) / calls:.2f}, COMMIT: {sum(commits.values()) / calls:.2f}"
+    )
+
+
+async def concurrent(bench: Bench, journeys, dishes):
+    timer = Timer()
+
+    async def step(name, update):
+        with timer.measure():
+            await bench.feed(update)
+
+    with QueryCounter() as counter:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            bench.journey(journey, category_id, dish_id, step)
+            for journey, (dish_id, category_id) in zip(journeys, dishes)
+        ))
+        elapsed = time.perf_counter() - started
+
+    updates = len(timer.samples)
+    print(f"⚡ Параллельно, {len(journeys)} пользователей:")
+    print(f"   {updates} апдейтов за {elapsed:.2f} с - {updates / elapsed:.0f} апдейтов/с")
+    print(f"   ⏱ {timer.summary()}")
+    print(
+        f"   🗄 на апдейт: {counter.count / updates:.2f} SQL-запросов, "
+        f"{counter.checkouts / updates:.2f} соединений, {counter.commits / updates:.2f} COMMIT"
+    )
+
+
+async def main():
+    print(f"🚚 Сквозной бенчмарк диспетчера: {USERS} покупателей")
+    print("=" * 60)
+
+    await reset_database()
+    await seed_catalog()
+    async with async_session_maker() as session:
+        dishes = (await session.execute(select(Dish.id, Dish.category_id).order_by(Dish.id))).all()
+    dishes = [tuple(dishes[i % len(dishes)]) for i in range(USERS)]
+
+    saved_admin_ids = settings.admin_ids
+    settings.admin_ids = [ADMIN_ID]
+    bench = Bench()
+    try:
+        await sequential(bench, [Journey(1_000_000 + i) for i in range(USERS)], dishes)
+        await concurrent(bench, [Journey(2_000_000 + i) for i in range(USERS)], dishes)
+    finally:
+        settings.admin_ids = saved_admin_ids
+        await user_cache.close()
+        await bench.storage.close()
+
+    print(f"📤 вызовов Telegram API: {sum(bench.session.calls.values())}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
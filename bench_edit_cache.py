@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пропуска правок без изменений на кнопке "🔄 Обновить".
+
+Покупатели оформляют заказы, затем администратор много раз подряд
+обновляет список заказов, который не меняется. Считаются задержка
+нажатия и число EditMessageText - без кэша отпечатков
+(EDIT_CACHE_SIZE=0) и с ним. Ответ Telegram API имитируется задержкой.
+
+Запуск: python bench_edit_cache.py [обновлений]
+"""
+import asyncio
+import statistics
+import sys
+
+from bench_utils import Timer, reset_database, seed_catalog
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session_maker, Dish
+from app.keyboards.callbacks import FILTER_ORDERS
+from app.services.edit_cache import edit_cache
+from app.services.user_cache import user_cache
+from bench_dispatcher import ADMIN_ID, Bench, Journey
+
+REFRESHES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+CUSTOMERS = 10
+LATENCY = 0.02  # ответ Telegram API, секунды
+
+
+async def refresh(bench: Bench, title: str, cache_size: int):
+    edit_cache.max_size = cache_size
+    edit_cache.clear()
+    edit_cache.hits = edit_cache.misses = 0
+    timer = Timer()
+    edits = bench.session.calls["EditMessageText"]
+    data = FILTER_ORDERS.pack("all")
+    for _ in range(REFRESHES):
+        # Кнопка "Обновить" нажимается на одном и том же сообщении
+        update = bench.admin.callback(data)
+        update["callback_query"]["message"]["message_id"] = 1
+        with timer.measure():
+            await bench.feed(update)
+    edits = bench.session.calls["EditMessageText"] - edits
+
+    print(f"{title}:")
+    print(f"   ⏱ {timer.summary()}")
+    print(f"   ✏️ EditMessageText: {edits} на {REFRESHES} нажатий")
+    print(f"   🎯 попаданий: {edit_cache.hits}, промахов: {edit_cache.misses}")
+    return statistics.mean(timer.samples)
+
+
+async def main():
+    print(f"🔄 Бенчмарк кнопки \"Обновить\": {REFRESHES} нажатий")
+    print("=" * 60)
+
+    await reset_database()
+    await seed_catalog()
+    async with async_session_maker() as session:
+        dishes = (await session.execute(select(Dish.id, Dish.category_id).order_by(Dish.id))).all()
+
+    saved_admin_ids, saved_size = settings.admin_ids, edit_cache.max_size
+    settings.admin_ids = [ADMIN_ID]
+    bench = Bench(latency=LATENCY)
+    try:
+        async def step(name, update):
+            await bench.feed(update)
+
+        for i in range(CUSTOMERS):
+            dish_id, category_id = dishes[i]
+            await bench.journey(Journey(1_000_000 + i), category_id, dish_id, step)
+
+        before = await refresh(bench, "🐢 Без кэша отпечатков", 0)
+        after = await refresh(bench, "⚡ С кэшем отпечатков", saved_size)
+    finally:
+        settings.admin_ids = saved_admin_ids
+        edit_cache.max_size = saved_size
+        await user_cache.close()
+        await bench.storage.close()
+
+    print("=" * 60)
+    print(f"🚀 Нажатие быстрее в x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк хранилищ FSM: MemoryStorage против DatabaseStorage.
+
+Каждый шаг имитирует обработчик оформления заказа: прочитать
+состояние, дополнить данные, сменить состояние, прочитать данные.
+DatabaseStorage проверяется в двух режимах: с объединением записей
+(как в боте) и с немедленной записью каждой операции.
+
+Запуск: python bench_fsm.py [пользователей] [шагов_на_пользователя]
+"""
+import asyncio
+import sys
+
+from bench_utils import Timer, reset_database
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.database.instrumentation import QueryCounter
+from app.services.fsm_storage import DatabaseStorage
+from app.utils.states import UserStates
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+STEPS = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+CHECKOUT_STATES = [
+    UserStates.CHOOSING_PAYMENT,
+    UserStates.UPLOADING_PAYMENT_SCREENSHOT
+]
+
+
+async def handler_step(storage, key: StorageKey, step: int, reads: Timer):
+    with reads.measure():
+        await storage.get_state(key)
+    await storage.update_data(key, {"order_id": step, "awaiting_quantity": step % 2 == 0})
+    await storage.set_state(key, CHECKOUT_STATES[step % len(CHECKOUT_STATES)])
+    with reads.measure():
+        await storage.get_data(key)
+
+
+async def run(title: str, storage):
+    keys = [StorageKey(bot_id=1, chat_id=user_id, user_id=user_id) for user_id in range(USERS)]
+    steps, reads = Timer(), Timer()
+
+    with QueryCounter() as counter:
+        for step in range(STEPS):
+            for key in keys:
+                with steps.measure():
+                    await handler_step(storage, key, step, reads)
+        await storage.close()
+
+    total = USERS * STEPS
+    print(f"{title}:")
+    print(f"   ⏱ шаг обработчика: {steps.summary()}")
+    print(f"   📖 чтение состояния: {reads.summary()}")
+    print(f"   🗄 {counter.count / total:.2f} SQL-запросов на шаг")
+    return steps
+
+
+async def main():
+    print(f"🧠 Бенчмарк FSM: {USERS} пользователей, {STEPS} шагов")
+    print("=" * 60)
+
+    await reset_database()
+
+    memory = await run("💨 MemoryStorage", MemoryStorage())
+    await run("🐢 DatabaseStorage, запись сразу", DatabaseStorage(flush_interval=0))
+    await reset_database()
+    # Интервал больше длительности прогона - все изменения уходят в БД при close()
+    coalesced = await run("⚡ DatabaseStorage, объединение записей", DatabaseStorage(flush_interval=60))
+
+    print("=" * 60)
+    print(
+        f"📊 p50 шага: DatabaseStorage {coalesced.percentile(50):.3f} мс, "
+        f"MemoryStorage {memory.percentile(50):.3f} мс"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарк клавиатур каталога: построение с нуля против кэша.
+
+Запуск: python bench_keyboards.py
+"""
+import gc
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from app.keyboards.user import (
+    get_categories_keyboard, get_dishes_keyboard,
+    get_dish_detail_keyboard, get_main_menu_keyboard, keyboard_cache
+)
+
+ITERATIONS = 2000
+CATALOG_VERSION = 1
+
+categories = [
+    SimpleNamespace(id=i, name=f"Категория {i}") for i in range(1, 9)
+]
+dishes = [
+    SimpleNamespace(
+        id=i, name=f"Блюдо {i}", price=100.0 + i, is_available=i % 7 != 0,
+        telegram_post_url=f"https://t.me/channel/{i}" if i % 2 else None
+    )
+    for i in range(1, 16)
+]
+
+
+def render_screen(version=None):
+    """Один 'экран' пользователя: меню, категория, блюдо и главное меню"""
+    get_categories_keyboard(categories, version)
+    get_dishes_keyboard(dishes, 1, version)
+    get_dish_detail_keyboard(dishes[0].id, 1, dishes[0], version)
+    # Главное меню закэшировано всегда, поэтому для "без кэша" зовем оригинал
+    if version is None:
+        get_main_menu_keyboard.__wrapped__(3)
+    else:
+        get_main_menu_keyboard(3)
+
+
+def measure(title, version=None):
+    """Замерить время и аллокации на ITERATIONS экранов"""
+    render_screen(version)  # прогрев
+
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    started = time.perf_counter()
+
+    for _ in range(ITERATIONS):
+        render_screen(version)
+
+    elapsed = time.perf_counter() - started
+    snapshot_after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Считаем все выделения за прогон (в т.ч. уже освобожденные - через peak)
+    stats = snapshot_after.compare_to(snapshot_before, "filename")
+    allocated_blocks = sum(max(stat.count_diff, 0) for stat in stats)
+
+    print(f"{title}:")
+    print(f"   ⏱ {elapsed / ITERATIONS * 1e6:.1f} мкс на экран")
+    print(f"   📦 пик памяти {peak / 1024:.1f} КБ, удержано блоков {allocated_blocks}")
+    return elapsed
+
+
+def count_allocations(version=None) -> int:
+    """Количество новых объектов (отслеживаемых gc) на один экран"""
+    gc.collect()
+    before = len(gc.get_objects())
+    # Держим результаты, чтобы созданные объекты не успели освободиться
+    screens = [render_screen_collect(version) for _ in range(100)]
+    after = len(gc.get_objects())
+    del screens
+    return (after - before) // 100
+
+
+def render_screen_collect(version=None):
+    """Вернуть созданные клавиатуры, чтобы gc их учел"""
+    return (
+        get_categories_keyboard(categories, version),
+        get_dishes_keyboard(dishes, 1, version),
+        get_dish_detail_keyboard(dishes[0].id, 1, dishes[0], version),
+    )
+
+
+def main():
+    print("⌨️ Бенчмарк клавиатур каталога")
+    print("=" * 50)
+
+    uncached = measure("🔨 Построение с нуля")
+    cached = measure("⚡ Из кэша", CATALOG_VERSION)
+
+    uncached_objects = count_allocations()
+    cached_objects = count_allocations(CATALOG_VERSION)
+
+    print("=" * 50)
+    print(f"🚀 Ускорение: x{uncached / cached:.1f}")
+    print(f"🧮 Новых объектов на экран: {uncached_objects} без кэша, {cached_objects} с кэшем")
+    print(f"📊 Кэш: {keyboard_cache.hits} попаданий, {keyboard_cache.misses} промахов")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк очередей апдейтов: быстрые нажатия "В корзину" многих
+пользователей одновременно.
+
+Каждый покупатель после /start нажимает кнопку добавления блюда
+несколько раз подряд, все нажатия всех покупателей приходят сразу.
+Ответ Telegram API имитируется задержкой. Три режима изоляции:
+- без изоляции - нажатия одного чата гоняются друг с другом;
+- общая блокировка - все апдейты бота по одному;
+- очереди по чатам (UpdateLanes).
+
+Для каждого режима - пропускная способность, лишние корзины и
+позиции с неверным количеством.
+
+На SQLite нажатия и без изоляции не создают лишних корзин - записи
+выстраивает очередь писателя; гонку видно на PostgreSQL
+(BENCH_DATABASE_URL, см. bench_backends.py).
+
+Запуск: python bench_lanes.py [пользователей] [нажатий]
+"""
+import asyncio
+import sys
+import time
+
+from bench_utils import reset_database, seed_catalog
+from aiogram.fsm.storage.memory import DisabledEventIsolation
+from sqlalchemy import func, select
+
+from app.database import async_session_maker, Order, OrderItem, OrderStatus
+from app.services.update_lanes import UpdateLanes
+from app.services.user_cache import user_cache
+from bench_dispatcher import Bench, Journey
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+TAPS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+LATENCY = 0.02  # ответ Telegram API, секунды
+
+
+class GlobalLock(UpdateLanes):
+    """Одна очередь на все чаты"""
+
+    def lane_key(self, key):
+        return "all"
+
+
+async def run(bench: Bench, title: str, events_isolation, base_id: int):
+    await reset_database()
+    dish_id = (await seed_catalog(categories=1, dishes_per_category=1))[0]
+
+    # Роутеры подключаются к одному диспетчеру, поэтому меняется только изоляция
+    bench.dp.fsm.events_isolation = events_isolation
+    journeys = [Journey(base_id + i) for i in range(USERS)]
+    try:
+        await asyncio.gather(*(bench.feed(journey.command("/start")) for journey in journeys))
+        taps = [journey.callback(f"add_to_cart_{dish_id}_1") for journey in journeys for _ in range(TAPS)]
+
+        started = time.perf_counter()
+        await asyncio.gather(*(bench.feed(update) for update in taps))
+        elapsed = time.perf_counter() - started
+    finally:
+        for journey in journeys:
+            user_cache.invalidate(journey.telegram_id)
+
+    async with async_session_maker() as session:
+        carts = await session.scalar(
+            select(func.count()).select_from(Order).where(Order.status == OrderStatus.CART.value)
+        )
+        wrong = await session.scalar(
+            select(func.count()).select_from(OrderItem).where(OrderItem.quantity != TAPS)
+        )
+
+    print(f"{title}:")
+    print(f"   {len(taps)} нажатий за {elapsed:.2f} с - {len(taps) / elapsed:.0f} апдейтов/с")
+    print(f"   🛒 корзин: {carts} на {USERS} покупателей, позиций с неверным количеством: {wrong}")
+    return elapsed
+
+
+async def main():
+    print(f"🚦 Бенчмарк очередей апдейтов: {USERS} покупателей по {TAPS} нажатий")
+    print("=" * 60)
+
+    bench = Bench(latency=LATENCY)
+    try:
+        await run(bench, "🏁 Без изоляции", DisabledEventIsolation(), 3_000_000)
+        locked = await run(bench, "🐢 Общая блокировка", GlobalLock(max_pending=USERS * TAPS), 4_000_000)
+        lanes = await run(bench, "⚡ Очереди по чатам", UpdateLanes(max_pending=TAPS), 5_000_000)
+    finally:
+        await user_cache.close()
+        await bench.storage.close()
+
+    print("=" * 60)
+    print(f"🚀 Очереди по чатам быстрее общей блокировки: x{locked / lanes:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+"""
+Общие утилиты бенчмарков: отдельная БД, наполнение данными, замеры времени.
+
+Импортируйте этот модуль ДО любых модулей app - он подменяет DATABASE_URL,
+чтобы бенчмарки не трогали рабочую базу бота.
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+BENCH_DB_PATH = os.getenv("BENCH_DB_PATH", "./bench.db")
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL", f"sqlite+aiosqlite:///{BENCH_DB_PATH}"
+)
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+os.environ["UPLOAD_PATH"] = os.getenv("BENCH_UPLOAD_PATH", "./bench_uploads")
+
+from app.database import (  # noqa: E402
+    Base, engine, async_session_maker, init_database,
+    User, Category, Dish
+)
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.exceptions import ClientDecodeError  # noqa: E402
+
+
+async def reset_database():
+    """Пересоздать все таблицы бенчмарк-базы"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await init_database()
+
+
+async def seed_catalog(categories: int = 5, dishes_per_category: int = 20):
+    """Заполнить каталог: categories категорий по dishes_per_category блюд"""
+    async with async_session_maker() as session:
+        category_objects = [
+            Category(name=f"Категория {i}", is_active=True, sort_order=i)
+            for i in range(1, categories + 1)
+        ]
+        session.add_all(category_objects)
+        await session.flush()
+
+        dishes = [
+            Dish(
+                name=f"Блюдо {category.id}-{j}", price=100.0 + j,
+                category_id=category.id, is_available=True, sort_order=j
+            )
+            for category in category_objects
+            for j in range(1, dishes_per_category + 1)
+        ]
+        session.add_all(dishes)
+        await session.commit()
+        return [dish.id for dish in dishes]
+
+
+async def seed_users(count: int, start_telegram_id: int = 1_000_000):
+    """Создать count пользователей, вернуть их ID"""
+    async with async_session_maker() as session:
+        users = [
+            User(telegram_id=start_telegram_id + i, first_name=f"User {i}")
+            for i in range(count)
+        ]
+        session.add_all(users)
+        await session.commit()
+        return [user.id for user in users]
+
+
+class Timer:
+    """Сбор длительностей и расчет перцентилей"""
+
+    def __init__(self):
+        self.samples = []
+
+    @contextmanager
+    def measure(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append(time.perf_counter() - started)
+
+    def percentile(self, p: float) -> float:
+        """Перцентиль в миллисекундах"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+    def summary(self) -> str:
+        if not self.samples:
+            return "нет замеров"
+        return (
+            f"p50 {self.percentile(50):.2f} мс, "
+            f"p95 {self.percentile(95):.2f} мс, "
+            f"p99 {self.percentile(99):.2f} мс, "
+            f"среднее {statistics.mean(self.samples) * 1000:.2f} мс"
+        )
+
+
+class FakeTelegramSession(BaseSession):
+    """Сессия бота без сети: вызовы API считаются и получают правдоподобный ответ.
+
+    latency - имитация задержки Telegram на каждый вызов, секунды;
+    file_content - содержимое, которое "скачивается" по любому file_id.
+    """
+
+    def __init__(self, latency: float = 0.0, file_content: bytes = b""):
+        super().__init__()
+        self.latency = latency
+        self.file_content = file_content
+        self.calls = Counter()
+        self._message_id = 0
+        # Какой вид ответа подходит методу - подбирается один раз
+        self._result_kinds = {}
+
+    async def make_request(self, bot, method, timeout=None):
+        name = type(method).__name__
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        kinds = [self._result_kinds[name]] if name in self._result_kinds else ["message", "bool", "file", "user", "list"]
+        for kind in kinds:
+            content = json.dumps({"ok": True, "result": self._result(kind, method)})
+            try:
+                response = self.check_response(bot=bot, method=method, status_code=200, content=content)
+            except ClientDecodeError:
+                continue
+            self._result_kinds[name] = kind
+            return response.result
+        raise ClientDecodeError(f"Нет фиктивного ответа для {name}", ValueError(name), {})
+
+    def _result(self, kind: str, method):
+        if kind == "bool":
+            return True
+        if kind == "list":
+            return []
+        if kind == "file":
+            file_id = getattr(method, "file_id", "bench")
+            return {
+                "file_id": file_id,
+                "file_unique_id": file_id,
+                "file_size": len(self.file_content),
+                "file_path": f"photos/{file_id}.jpg"
+            }
+        if kind == "user":
+            return {"id": 1, "is_bot": True, "first_name": "Bench"}
+        self._message_id += 1
+        chat_id = getattr(method, "chat_id", None)
+        return {
+            "message_id": getattr(method, "message_id", None) or self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id if isinstance(chat_id, int) else 1, "type": "private"},
+            "text": getattr(method, "text", None)
+        }
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        for start in range(0, len(self.file_content), chunk_size):
+            yield self.file_content[start:start + chunk_size]
+
+    async def close(self):
+        pass
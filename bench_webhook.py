@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест режима webhook без Telegram.
+
+Поднимает настоящее aiohttp-приложение бота (create_app) на локальном
+порту с фиктивной сессией бота и отправляет в него синтетические
+Update JSON: /start, меню, категории, блюда, добавление в корзину.
+Меряется время ответа webhook (Telegram ждет только его), время
+обработки апдейта диспетчером и общая пропускная способность. В конце
+сервер останавливается сразу после последнего запроса - все принятые
+апдейты должны успеть обработаться.
+
+Запуск: python bench_webhook.py [апдейтов] [параллельных_запросов]
+"""
+import asyncio
+import sys
+import time
+
+from bench_utils import FakeTelegramSession, Timer, reset_database, seed_catalog
+import aiohttp
+from aiogram import Bot, Dispatcher
+from aiohttp.test_utils import TestServer
+
+from app.database.instrumentation import QueryCounter
+from app.handlers import register_all_handlers
+from app.main import create_storage
+from app.middlewares import register_all_middlewares
+from app.services.user_cache import user_cache
+from app.webhook import WEBHOOK_HANDLER, create_app
+
+UPDATES = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+USERS = 200
+SECRET = "bench-secret"
+
+
+def make_update(update_id: int, dish_ids) -> dict:
+    """Синтетический апдейт от одного из USERS пользователей"""
+    user_id = 5_000_000 + update_id % USERS
+    user = {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": user,
+        "text": "/start"
+    }
+
+    dish_id = dish_ids[update_id % len(dish_ids)]
+    scenario = update_id % 6
+    if scenario == 0:
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": 6}]
+        return {"update_id": update_id, "message": message}
+
+    data = ["menu", "category_1", f"dish_{dish_id}", f"add_to_cart_{dish_id}_1", "cart"][scenario - 1]
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": user,
+            "chat_instance": str(user_id),
+            "message": {**message, "text": "Меню"},
+            "data": data
+        }
+    }
+
+
+async def main():
+    print(f"🌐 Бенчмарк webhook: {UPDATES} апдейтов, {CONCURRENCY} параллельных запросов")
+    print("=" * 60)
+
+    await reset_database()
+    dish_ids = await seed_catalog()
+
+    session = FakeTelegramSession()
+    bot = Bot(token="42:BENCH", session=session)
+    storage = create_storage()
+    dp = Dispatcher(storage=storage)
+    register_all_middlewares(dp)
+    register_all_handlers(dp)
+
+    processing = Timer()
+
+    @dp.update.outer_middleware()
+    async def measure(handler, event, data):
+        with processing.measure():
+            return await handler(event, data)
+
+    app = create_app(dp, bot, path="/webhook", secret_token=SECRET)
+    webhook = app[WEBHOOK_HANDLER]
+    server = TestServer(app)
+    await server.start_server()
+    url = str(server.make_url("/webhook"))
+
+    responses = Timer()
+    statuses = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    max_in_flight = 0
+
+    async def post(client, update):
+        nonlocal max_in_flight
+        async with semaphore:
+            with responses.measure():
+                async with client.post(
+                    url, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}
+                ) as response:
+                    await response.read()
+            statuses.append(response.status)
+            max_in_flight = max(max_in_flight, webhook.in_flight)
+
+    updates = [make_update(i, dish_ids) for i in range(1, UPDATES + 1)]
+    connector = aiohttp.TCPConnector(limit=CONCURRENCY)
+    with QueryCounter() as counter:
+        started = time.perf_counter()
+        async with aiohttp.ClientSession(connector=connector) as client:
+            await asyncio.gather(*(post(client, update) for update in updates))
+        accepted = time.perf_counter() - started
+
+        # Остановка сразу после приема: сервер должен дождаться обработчиков
+        await server.close()
+        finished = time.perf_counter() - started
+        await user_cache.close()
+        await storage.close()
+
+    print(f"📨 Принято: {statuses.count(200)} из {UPDATES} за {accepted:.2f} с "
+          f"({UPDATES / accepted:.0f} апдейтов/с)")
+    print(f"   ⏱ ответ webhook: {responses.summary()}")
+    print(f"⚙️  Обработано: {len(processing.samples)} из {UPDATES} за {finished:.2f} с "
+          f"({len(processing.samples) / finished:.0f} апдейтов/с)")
+    print(f"   ⏱ обработка апдейта: {processing.summary()}")
+    print(f"   📈 одновременно в обработке: до {max_in_flight}")
+    print(f"   🗄 {counter.count / UPDATES:.2f} SQL-запросов на апдейт")
+    print(f"   📤 вызовов Telegram API: {sum(session.calls.values())} ({dict(session.calls.most_common(3))})")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
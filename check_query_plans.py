@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Проверка планов запросов CartService / OrderService на большой базе.
+
+Скрипт заполняет бенчмарк-базу (см. bench_utils), прогоняет методы
+сервисов, записывает каждый выполненный SQL и делает для него
+EXPLAIN QUERY PLAN. Если хоть один запрос полностью сканирует таблицу
+(SCAN без индекса), скрипт печатает план и завершается с кодом 1.
+
+Проверяются таблицы заказов: каталог (categories, dishes) бот читает
+целиком в кэш, а пакетная подгрузка пользователей для больших списков
+вправе выбрать скан - это осознанные решения, а не горячие пути.
+
+Запуск: python check_query_plans.py [пользователей] [заказов_на_пользователя]
+"""
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+
+from bench_utils import QueryCounter, reset_database, seed_catalog, seed_users
+from sqlalchemy import insert, select, text
+
+from app.database import (
+    engine, async_session_maker, Order, OrderItem, OrderStatus
+)
+from app.services.admin_orders import AdminOrderService
+from app.services.cart import CartService
+from app.services.order import OrderService
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+ORDERS_PER_USER = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+# Таблицы, полный скан которых считается ошибкой
+CHECKED_TABLES = {"orders", "order_items", "daily_sales", "daily_dish_sales"}
+
+HISTORY_STATUSES = [
+    OrderStatus.PENDING_PAYMENT.value,
+    OrderStatus.PAYMENT_RECEIVED.value,
+    OrderStatus.CONFIRMED.value,
+    OrderStatus.READY.value,
+    OrderStatus.COMPLETED.value,
+    OrderStatus.CANCELLED_BY_CLIENT.value,
+    OrderStatus.CANCELLED_BY_MASTER.value
+]
+
+
+async def seed_history(user_ids, dish_ids):
+    """История заказов: ORDERS_PER_USER заказов по 3 позиции на пользователя"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    orders = [
+        {
+            "user_id": user_id,
+            "status": rng.choice(HISTORY_STATUSES),
+            "total_amount": 0.0,
+            "created_at": now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        }
+        for user_id in user_ids
+        for _ in range(ORDERS_PER_USER)
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(insert(Order), orders)
+        order_ids = (await conn.execute(select(Order.id))).scalars().all()
+        items = [
+            {"order_id": order_id, "dish_id": dish_id, "quantity": rng.randint(1, 3), "price": 100.0}
+            for order_id in order_ids
+            for dish_id in rng.sample(dish_ids, 3)
+        ]
+        await conn.execute(insert(OrderItem), items)
+        # Статистика для планировщика, как на живой базе
+        await conn.execute(text("ANALYZE"))
+
+    return len(orders), len(items)
+
+
+async def exercise_services(user_id: int, dish_ids):
+    """Прогон всех путей CartService / OrderService для одного пользователя"""
+    async with async_session_maker() as session:
+        await CartService.get_or_create_cart(session, user_id)
+        await CartService.add_item_to_cart(session, user_id, dish_ids[0], 2)
+        await CartService.add_item_to_cart(session, user_id, dish_ids[1], 1)
+        await CartService.get_cart_count(session, user_id)
+
+        cart = await CartService.get_cart_with_items(session, user_id)
+        item_id = cart.items[0].id
+        await CartService.update_item_quantity(session, user_id, item_id, 3)
+        await CartService.change_item_quantity(session, user_id, item_id, 1, max_quantity=10)
+        await CartService.get_item_quantity(session, user_id, item_id)
+        await CartService.remove_item_from_cart(session, user_id, cart.items[1].id)
+        await session.commit()
+
+    async with async_session_maker() as session:
+        order = await OrderService.create_order_from_cart(session, user_id, "card")
+        await session.commit()
+
+        await OrderService.get_user_orders(session, user_id)
+        await OrderService.get_user_saved_orders(session, user_id)
+        await OrderService.get_order_by_id(session, order.id)
+        await OrderService.get_order_details(session, order.id)
+        await OrderService.update_payment_screenshot(session, order.id, "uploads/x.jpg", "file-id")
+        await OrderService.change_status(session, order.id, OrderStatus.CONFIRMED.value)
+        await OrderService.update_order_status(session, order.id, OrderStatus.READY.value)
+        await OrderService.get_all_orders(session, OrderStatus.READY.value)
+        await OrderService.get_orders_stats(session)
+        await OrderService.repeat_order(session, user_id, order.id)
+        await CartService.clear_cart(session, user_id)
+        await OrderService.cancel_order(session, order.id, user_id)
+        await session.commit()
+
+        page = await AdminOrderService.get_orders_page(session, [OrderStatus.COMPLETED.value])
+        await AdminOrderService.get_orders_page(
+            session, [OrderStatus.COMPLETED.value], older_than=page.orders[-1].id
+        )
+        await AdminOrderService.get_order_details(session, order.id)
+
+
+def full_scans(plan_rows):
+    """Строки плана с полным сканированием проверяемых таблиц"""
+    scans = []
+    for *_, detail in plan_rows:
+        # "SCAN orders" или "SCAN orders AS o" - без индекса
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and "INDEX" not in words:
+            if words[1] in CHECKED_TABLES:
+                scans.append(detail)
+    return scans
+
+
+async def check_plans(executed):
+    failures = []
+    async with engine.connect() as conn:
+        for statement, parameters in executed:
+            if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "INSERT")):
+                continue
+            plan = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+            scans = full_scans(plan)
+            if scans:
+                failures.append((statement, scans))
+    return failures
+
+
+async def main():
+    print(f"🔎 Проверка планов запросов: {USERS} пользователей, {USERS * ORDERS_PER_USER} заказов")
+    print("=" * 60)
+
+    await reset_database()
+    dish_ids = await seed_catalog(categories=5, dishes_per_category=20)
+    user_ids = await seed_users(USERS)
+    orders_count, items_count = await seed_history(user_ids, dish_ids)
+    print(f"📦 Заполнено: {orders_count} заказов, {items_count} позиций")
+
+    with QueryCounter() as counter:
+        await exercise_services(user_ids[len(user_ids) // 2], dish_ids)
+
+    failures = await check_plans(counter.executed)
+    print(f"🧾 Проверено запросов: {len(counter.executed)}")
+
+    if failures:
+        print(f"❌ Полное сканирование таблиц в {len(failures)} запросах:")
+        for statement, scans in failures:
+            print(f"\n{statement}\n   → {'; '.join(scans)}")
+        sys.exit(1)
+
+    print("✅ Все запросы используют индексы")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Тест AdminMiddleware: флаг is_admin читается из БД только для апдейтов
+админского роутера, пользовательские апдейты закэшированного
+пользователя обходятся без запросов, а права из БД действуют сразу.
+
+Запуск: python -m pytest test_admin_middleware.py  или  python test_admin_middleware.py
+"""
+import asyncio
+import os
+from datetime import datetime
+
+os.environ.setdefault("BOT_TOKEN", "0:test")
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import Chat, Message, Update, User as TelegramUser
+from sqlalchemy import update
+
+from app.database import User
+from app.database.instrumentation import QueryCounter
+from app.database.sqlite import SerializedWriteSession
+from app.middlewares import register_all_middlewares
+from app.middlewares.admin import AdminMiddleware
+from app.middlewares.auth import AuthMiddleware
+from app.middlewares.db import DbSessionMiddleware
+from app.services.user_cache import user_cache
+from testing_utils import temp_database
+
+TELEGRAM_ID = 4343
+
+
+def _routers(seen):
+    admin = Router()
+    admin.message.middleware(AdminMiddleware())
+
+    @admin.message(F.text == "admin")
+    async def admin_handler(message: Message, is_admin: bool):
+        seen.append(is_admin)
+
+    user = Router()
+
+    @user.message(F.text == "menu")
+    async def user_handler(message: Message):
+        seen.append("menu")
+
+    return admin, user
+
+
+async def _check_admin_flag():
+    # Глобально AdminMiddleware не регистрируется - только на админском роутере
+    dp = Dispatcher()
+    register_all_middlewares(dp)
+    assert not any(isinstance(m, AdminMiddleware) for m in dp.message.middleware)
+    assert not any(isinstance(m, AdminMiddleware) for m in dp.callback_query.middleware)
+
+    async with temp_database("admin.db", session_class=SerializedWriteSession) as (engine, session_maker):
+        seen = []
+        dp = Dispatcher()
+        dp.message.middleware(DbSessionMiddleware(session_maker))
+        dp.message.middleware(AuthMiddleware())
+        dp.include_routers(*_routers(seen))
+        bot = Bot(token="42:TEST")
+        update_ids = iter(range(1, 100))
+
+        async def send(text: str):
+            message = Message(
+                message_id=1, date=datetime.now(), text=text,
+                chat=Chat(id=TELEGRAM_ID, type="private"),
+                from_user=TelegramUser(id=TELEGRAM_ID, is_bot=False, first_name="Test")
+            )
+            with QueryCounter(engine) as counter:
+                await dp.feed_update(bot, Update(update_id=next(update_ids), message=message))
+            return counter
+
+        user_cache.invalidate(TELEGRAM_ID)
+        try:
+            await send("menu")
+
+            # Закэшированный пользователь листает меню без запросов к БД
+            counter = await send("menu")
+            assert (counter.count, counter.checkouts) == (0, 0), (counter.count, counter.checkouts)
+
+            # Админский апдейт - один запрос флага
+            counter = await send("admin")
+            assert counter.count == 1, counter.count
+
+            # Права, выданные в БД, действуют без сброса кэша пользователей
+            async with session_maker() as session:
+                await session.execute(
+                    update(User).where(User.telegram_id == TELEGRAM_ID).values(is_admin=True)
+                )
+                await session.commit()
+            await send("admin")
+            assert seen == ["menu", "menu", False, True], seen
+        finally:
+            user_cache.invalidate(TELEGRAM_ID)
+            await bot.session.close()
+
+
+def test_admin_flag():
+    asyncio.run(_check_admin_flag())
+
+
+if __name__ == "__main__":
+    test_admin_flag()
+    print("✅ Права администратора проверяются только в админском роутере")
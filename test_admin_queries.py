@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Тест количества SQL-запросов в админских списках, пагинации и карточке заказа.
+
+Запуск: python -m pytest test_admin_queries.py  или  python test_admin_queries.py
+"""
+import asyncio
+
+from app.database import User, Category, Dish, Order, OrderItem, OrderStatus
+from app.database.instrumentation import assert_max_queries
+from app.services.admin_orders import AdminOrderService, CANCELLED_STATUSES, ORDERS_PAGE_SIZE
+from app.services.status_counts import StatusCountRegistry
+from testing_utils import temp_database
+
+ORDERS = 30
+
+
+async def _fill_database(session_maker):
+    """Пользователи и заказы из нескольких позиций"""
+    async with session_maker() as session:
+        category = Category(name="Супы")
+        session.add(category)
+        await session.flush()
+
+        dishes = [Dish(name=f"Блюдо {i}", price=100.0 * i, category_id=category.id) for i in range(1, 4)]
+        session.add_all(dishes)
+        await session.flush()
+
+        statuses = [
+            OrderStatus.PAYMENT_RECEIVED.value,
+            OrderStatus.CONFIRMED.value,
+            OrderStatus.CANCELLED_BY_MASTER.value
+        ]
+        for i in range(ORDERS):
+            user = User(telegram_id=500_000 + i, username=f"user{i}" if i % 2 else None)
+            session.add(user)
+            await session.flush()
+
+            order = Order(user_id=user.id, status=statuses[i % len(statuses)], total_amount=600.0)
+            session.add(order)
+            await session.flush()
+            session.add_all([
+                OrderItem(order_id=order.id, dish_id=dish.id, quantity=1, price=dish.price)
+                for dish in dishes
+            ])
+        await session.commit()
+
+
+def _render_list(orders):
+    """Обращение к тем же атрибутам, что и у админских списков"""
+    return [(order.id, AdminOrderService.format_customer(order.user), order.total_amount) for order in orders]
+
+
+async def _check_queries():
+    async with temp_database("admin.db") as (engine, session_maker):
+        await _fill_database(session_maker)
+        async with session_maker() as session:
+            # Все заказы: один запрос независимо от числа заказов
+            with assert_max_queries(1, engine):
+                orders = await AdminOrderService.get_orders(session)
+                _render_list(orders)
+            assert len(orders) == 20
+
+        async with session_maker() as session:
+            # Фильтр по статусам
+            with assert_max_queries(1, engine):
+                orders = await AdminOrderService.get_orders(session, CANCELLED_STATUSES)
+                _render_list(orders)
+            assert orders and all(o.status in CANCELLED_STATUSES for o in orders)
+
+        async with session_maker() as session:
+            # Карточка заказа: клиент, позиции и блюда одним запросом
+            with assert_max_queries(1, engine):
+                order = await AdminOrderService.get_order_details(session, 1)
+                names = [item.dish.name for item in order.items]
+                customer = AdminOrderService.format_customer(order.user)
+            assert len(names) == 3
+            assert customer == "ID: 500000"
+
+        async with session_maker() as session:
+            # Keyset-пагинация: каждая страница - один запрос, заказы не теряются
+            seen = []
+            page = await AdminOrderService.get_orders_page(session)
+            seen.extend(order.id for order in page.orders)
+            assert not page.has_newer
+            while page.has_older:
+                with assert_max_queries(1, engine):
+                    page = await AdminOrderService.get_orders_page(
+                        session, older_than=page.orders[-1].id
+                    )
+                assert page.has_newer
+                seen.extend(order.id for order in page.orders)
+            assert sorted(seen) == list(range(1, ORDERS + 1))
+            assert len(seen) == len(set(seen))
+
+            # Обратно к более новым заказам
+            with assert_max_queries(1, engine):
+                newer = await AdminOrderService.get_orders_page(
+                    session, newer_than=page.orders[0].id
+                )
+            assert [o.id for o in newer.orders] == seen[-len(page.orders) - ORDERS_PAGE_SIZE:-len(page.orders)]
+
+
+async def _check_status_counts():
+    async with temp_database("counts.db") as (engine, session_maker):
+        await _fill_database(session_maker)
+        registry = StatusCountRegistry(session_maker=session_maker)
+        # Первое чтение - один GROUP BY, дальше - из памяти
+        with assert_max_queries(1, engine):
+            counts = await registry.get_counts()
+        with assert_max_queries(0, engine):
+            assert await registry.get_counts() == counts
+        assert sum(counts.values()) == ORDERS
+
+        confirmed = OrderStatus.CONFIRMED.value
+        ready = OrderStatus.READY.value
+
+        # До commit счетчики не меняются, после - меняются без запросов
+        async with session_maker() as session:
+            registry.track_transition(session, confirmed, ready)
+            assert (await registry.get_counts())[confirmed] == counts[confirmed]
+            await session.commit()
+        with assert_max_queries(0, engine):
+            updated = await registry.get_counts()
+        assert updated[confirmed] == counts[confirmed] - 1
+        assert updated.get(ready, 0) == counts.get(ready, 0) + 1
+
+        # Откат отбрасывает накопленные изменения
+        async with session_maker() as session:
+            registry.track_transition(session, ready, confirmed)
+            await session.rollback()
+        assert await registry.get_counts() == updated
+
+
+def test_admin_order_queries():
+    asyncio.run(_check_queries())
+
+
+def test_status_count_registry():
+    asyncio.run(_check_status_counts())
+
+
+if __name__ == "__main__":
+    test_admin_order_queries()
+    test_status_count_registry()
+    print("✅ Админские запросы укладываются в лимит")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Тест маршрутов callback data: сборка и разбор полей, выбор обработчика
+по индексу совпадает с последовательной проверкой фильтров, у каждого
+обработчика есть аргументы под поля своего маршрута, а обработчики,
+которые вызывают другие обработчики, передают им разобранные поля.
+
+Запуск: python -m pytest test_callback_routes.py  или  python test_callback_routes.py
+"""
+import asyncio
+import os
+from datetime import datetime
+
+os.environ.setdefault("BOT_TOKEN", "0:test")
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.types import CallbackQuery, Chat, Message, Update, User as TelegramUser
+
+from app.database import Category, Dish, Order, OrderStatus, User
+from app.database.sqlite import SerializedWriteSession
+from app.handlers import register_all_handlers
+from app.handlers.admin import admin_panel
+from app.keyboards.callbacks import (
+    ADD_TO_CART, ADMIN_COMPLETE, FILTER_ORDERS, ORDERS_PAGE, SET_STATUS, TOGGLE_CATEGORY, TOGGLE_DISH
+)
+from app.middlewares.db import DbSessionMiddleware
+from app.utils.callbacks import CallbackRoute, CallbackRouter
+from app.utils.states import UserStates
+from testing_utils import temp_database
+
+# callback data -> (состояние FSM, ожидаемый обработчик)
+EXPECTED = {
+    "menu": (None, "show_menu"),
+    "category_3": (None, "show_category"),
+    "dish_12": (None, "show_dish"),
+    "dish_unavailable": (None, "dish_unavailable"),
+    "add_to_cart_12_5": (None, "add_to_cart"),
+    "cart_increase_7": (None, "increase_cart_item"),
+    "cart_set_7_2": (None, "set_cart_item_quantity"),
+    "confirm_order": (UserStates.CONFIRMING_ORDER.state, "confirm_order"),
+    "confirm_order_15": (None, "confirm_cash_order"),
+    "order_15": (None, "show_order_details"),
+    "repeat_order_15": (None, "repeat_order_prompt_name"),
+    "repeat_order_skip_15": (None, "repeat_order_skip_name"),
+    "cancel_order_15": (None, "cancel_payment_order"),
+    "cancel_order_confirm_15": (None, "confirm_cancel_order"),
+    "cancel_order_final_15": (None, "final_cancel_order"),
+    "faq": (None, "show_faq"),
+    "faq_delivery": (None, "show_faq_answer"),
+    "add_dish": (None, "choose_category_for_dish"),
+    "add_dish_4": (None, "add_dish_start"),
+    "edit_dish_9": (None, "edit_dish"),
+    "edit_dish_price_9": (None, "edit_dish_price_start"),
+    "filter_orders_pending_payment": (None, "show_filtered_orders"),
+    "orders_page_payment_received_o_40": (None, "show_filtered_orders"),
+    "set_status_15_cancelled_by_master": (None, "set_order_status"),
+    "main_menu": (None, "main_menu"),
+    "unknown_button": (None, None),
+}
+
+
+def _callback(data: str) -> CallbackQuery:
+    return CallbackQuery(
+        id="1", chat_instance="1", data=data,
+        from_user=TelegramUser(id=1, is_bot=False, first_name="Test")
+    )
+
+
+async def _resolve(routers, data: str, raw_state, indexed: bool):
+    """Первый обработчик, чьи фильтры прошли, - как при обработке апдейта"""
+    callback = _callback(data)
+    for router in routers:
+        observer = router.callback_query
+        handlers = observer.candidates(data) if indexed else observer.handlers
+        for handler in handlers:
+            passed, values = await handler.check(callback, raw_state=raw_state)
+            if passed:
+                return handler.callback.__name__, values
+    return None, {}
+
+
+def test_codec():
+    assert ADD_TO_CART.pack(12, 5) == "add_to_cart_12_5"
+    assert ADD_TO_CART.unpack("add_to_cart_12_5") == {"dish_id": 12, "quantity": 5}
+    assert ADD_TO_CART.unpack("add_to_cart_12") is None
+    assert ADD_TO_CART.unpack("add_to_cart_x_5") is None
+
+    # Первое str-поле забирает "_", остальные поля - справа от него
+    data = ORDERS_PAGE.pack("pending_payment", "n", 40)
+    assert data == "orders_page_pending_payment_n_40"
+    assert ORDERS_PAGE.unpack(data) == {"filter_type": "pending_payment", "direction": "n", "cursor": 40}
+    assert SET_STATUS.unpack("set_status_15_cancelled_by_master") == {
+        "order_id": 15, "new_status": "cancelled_by_master"
+    }
+    assert FILTER_ORDERS.unpack("filter_orders_") is None
+
+    for bad in (lambda: ORDERS_PAGE.pack("all", "n_x", 1), lambda: ADD_TO_CART.pack(1),
+                lambda: FILTER_ORDERS.pack("x" * 64)):
+        try:
+            bad()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("pack должен отклонять недопустимые значения")
+
+
+async def _check_dispatch():
+    dp = Dispatcher()
+    register_all_handlers(dp)
+    routers = dp.sub_routers
+
+    for data, (raw_state, expected) in EXPECTED.items():
+        indexed = await _resolve(routers, data, raw_state, indexed=True)
+        linear = await _resolve(routers, data, raw_state, indexed=False)
+        assert indexed == linear, (data, indexed, linear)
+        assert indexed[0] == expected, (data, indexed[0])
+
+    _, values = await _resolve(routers, "cart_set_7_2", None, indexed=True)
+    assert (values["item_id"], values["quantity"]) == (7, 2)
+
+    # Разобранные поля приходят в обработчик аргументами
+    for router in routers:
+        for handler in router.callback_query.handlers:
+            for filter_object in handler.filters:
+                if isinstance(filter_object.callback, CallbackRoute):
+                    fields = {name for name, _ in filter_object.callback.fields}
+                    assert fields <= handler.params, (handler.callback.__name__, fields - handler.params)
+
+
+class FakeSession(BaseSession):
+    """Сессия без сети: вызовы API записываются, любой метод возвращает True"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests.append(type(method).__name__)
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+async def _check_nested_handlers():
+    async with temp_database("routes.db", session_class=SerializedWriteSession) as (engine, session_maker):
+
+        async with session_maker() as session:
+            user = User(telegram_id=1, first_name="Test")
+            category = Category(name="Супы")
+            session.add_all([user, category])
+            await session.flush()
+            dish = Dish(name="Борщ", price=100.0, category_id=category.id)
+            order = Order(user_id=user.id, status=OrderStatus.READY.value, total_amount=100.0)
+            session.add_all([dish, order])
+            await session.commit()
+            ids = {"category": category.id, "dish": dish.id, "order": order.id}
+
+        # Те же обработчики, что в app.handlers.admin.admin_panel, на отдельном роутере
+        router = CallbackRouter()
+        router.callback_query.register(admin_panel.toggle_category_availability, TOGGLE_CATEGORY)
+        router.callback_query.register(admin_panel.toggle_dish_availability, TOGGLE_DISH)
+        router.callback_query.register(admin_panel.complete_order, ADMIN_COMPLETE)
+        dp = Dispatcher()
+        dp.callback_query.middleware(DbSessionMiddleware(session_maker))
+        dp.include_router(router)
+        api = FakeSession()
+        bot = Bot(token="42:TEST", session=api)
+
+        async def press(data: str):
+            telegram_user = TelegramUser(id=1, is_bot=False, first_name="Test")
+            message = Message(message_id=1, date=datetime.now(), text="⚙️",
+                              chat=Chat(id=1, type="private"), from_user=telegram_user)
+            await dp.feed_update(bot, Update(update_id=1, callback_query=CallbackQuery(
+                id="1", chat_instance="1", from_user=telegram_user, message=message, data=data
+            )), raise_errors=True)
+
+        try:
+            # Переключение и смена статуса перерисовывают карточку тем же id
+            await press(TOGGLE_CATEGORY.pack(ids["category"]))
+            await press(TOGGLE_DISH.pack(ids["dish"]))
+            await press(ADMIN_COMPLETE.pack(ids["order"]))
+            assert api.requests == ["AnswerCallbackQuery", "EditMessageText", "AnswerCallbackQuery"] * 3, api.requests
+
+            async with session_maker() as session:
+                assert not (await session.get(Category, ids["category"])).is_active
+                assert not (await session.get(Dish, ids["dish"])).is_available
+                assert (await session.get(Order, ids["order"])).status == OrderStatus.COMPLETED.value
+        finally:
+            await bot.session.close()
+
+
+def test_dispatch():
+    asyncio.run(_check_dispatch())
+
+
+def test_nested_handlers():
+    asyncio.run(_check_nested_handlers())
+
+
+if __name__ == "__main__":
+    test_codec()
+    test_dispatch()
+    test_nested_handlers()
+    print("✅ Маршруты callback data разбираются и находят свои обработчики")
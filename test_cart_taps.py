@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Тест склейки нажатий +/- в корзине: каждое нажатие отвечается сразу,
+серия нажатий записывается одной транзакцией и одной правкой сообщения,
+нажатие сверх максимума отвечается сообщением об ограничении, упавшая
+запись повторяется, а после второй ошибки сообщение показывает корзину
+из БД; следующий апдейт пользователя видит корзину с учетом еще не
+записанных нажатий.
+
+Запуск: python -m pytest test_cart_taps.py  или  python test_cart_taps.py
+"""
+import asyncio
+import os
+from collections import Counter
+from datetime import datetime
+
+os.environ.setdefault("BOT_TOKEN", "0:test")
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.types import CallbackQuery, Chat, Message, Update, User as TelegramUser
+from sqlalchemy import select
+
+from app.database import Category, Dish, Order, OrderItem, OrderStatus, User
+from app.database.instrumentation import QueryCounter
+from app.database.sqlite import SerializedWriteSession
+from app.handlers.user.cart import decrease_cart_item, increase_cart_item, show_cart
+from app.keyboards.callbacks import CART, CART_DECREASE, CART_INCREASE
+from app.middlewares.auth import AuthMiddleware
+from app.middlewares.cart_taps import CartTapsMiddleware
+from app.middlewares.db import DbSessionMiddleware
+from app.services.cart_taps import cart_taps
+from app.services.user_cache import user_cache
+from app.utils.callbacks import CallbackRouter
+from testing_utils import temp_database
+
+TELEGRAM_ID = 5_200_000
+WINDOW = 0.05
+
+
+async def _settle():
+    """Дождаться записи всех пачек нажатий (под нагрузкой - дольше окна)"""
+    await asyncio.sleep(WINDOW)
+    for _ in range(100):
+        if not cart_taps.pending:
+            return
+        await asyncio.sleep(WINDOW)
+    raise AssertionError("нажатия не записаны за 100 окон")
+
+
+class FakeSession(BaseSession):
+    """Сессия без сети: вызовы API считаются, тексты ответов на нажатия записываются"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = Counter()
+        self.answers = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls[type(method).__name__] += 1
+        if type(method).__name__ == "AnswerCallbackQuery":
+            self.answers.append(method.text)
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+class FlakySessionMaker:
+    """Фабрика сессий, которая первые failures раз падает"""
+
+    def __init__(self, session_maker):
+        self.session_maker = session_maker
+        self.failures = 0
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("БД недоступна")
+        return self.session_maker()
+
+
+def _router() -> CallbackRouter:
+    # Те же обработчики, что в app.handlers.user.cart, на отдельном роутере
+    router = CallbackRouter()
+    router.callback_query.register(increase_cart_item, CART_INCREASE, flags={"cart_tap": True})
+    router.callback_query.register(decrease_cart_item, CART_DECREASE, flags={"cart_tap": True})
+    router.callback_query.register(show_cart, CART)
+    return router
+
+
+async def _check_coalescing():
+    async with temp_database("taps.db", session_class=SerializedWriteSession) as (engine, session_maker):
+
+        async with session_maker() as session:
+            user = User(telegram_id=TELEGRAM_ID, first_name="Test")
+            category = Category(name="Супы")
+            session.add_all([user, category])
+            await session.flush()
+            dish = Dish(name="Борщ", price=100.0, category_id=category.id)
+            cart = Order(user_id=user.id, status=OrderStatus.CART.value, total_amount=100.0)
+            session.add_all([dish, cart])
+            await session.flush()
+            item = OrderItem(order_id=cart.id, dish_id=dish.id, quantity=1, price=100.0)
+            session.add(item)
+            await session.commit()
+            item_id = item.id
+
+        dp = Dispatcher()
+        dp.callback_query.middleware(CartTapsMiddleware())
+        dp.callback_query.middleware(DbSessionMiddleware(session_maker))
+        dp.callback_query.middleware(AuthMiddleware())
+        dp.include_router(_router())
+        api = FakeSession()
+        bot = Bot(token="42:TEST", session=api)
+        update_ids = iter(range(1, 1000))
+
+        async def press(data: str):
+            telegram_user = TelegramUser(id=TELEGRAM_ID, is_bot=False, first_name="Test")
+            message = Message(message_id=1, date=datetime.now(), text="🛒",
+                              chat=Chat(id=TELEGRAM_ID, type="private"), from_user=telegram_user)
+            update_id = next(update_ids)
+            await dp.feed_update(bot, Update(update_id=update_id, callback_query=CallbackQuery(
+                id=str(update_id), chat_instance="1", from_user=telegram_user, message=message, data=data
+            )))
+
+        async def quantity():
+            async with session_maker() as session:
+                return await session.scalar(select(OrderItem.quantity).where(OrderItem.id == item_id))
+
+        flaky = FlakySessionMaker(session_maker)
+        saved = cart_taps.window, cart_taps.session_maker
+        cart_taps.window, cart_taps.session_maker = WINDOW, flaky
+        user_cache.invalidate(TELEGRAM_ID)
+        try:
+            # Серия нажатий: каждое отвечено сразу, в БД и сообщении - пока ничего
+            with QueryCounter(engine) as counter:
+                for route in [CART_INCREASE] * 7 + [CART_DECREASE] * 2:
+                    await press(route.pack(item_id))
+                assert api.calls["AnswerCallbackQuery"] == 9
+                assert api.calls["EditMessageText"] == 0
+                assert await quantity() == 1
+
+                await _settle()
+            # Одна запись и одна правка сообщения на всю серию
+            assert await quantity() == 6
+            assert counter.commits == 1, counter.commits
+            assert api.calls["EditMessageText"] == 1
+            assert cart_taps.pending == 0
+
+            # Нажатия сверх максимума не учитываются, и пользователь это видит
+            api.answers.clear()
+            for _ in range(cart_taps.max_quantity):
+                await press(CART_INCREASE.pack(item_id))
+            await _settle()
+            assert await quantity() == cart_taps.max_quantity
+            limit = f"❌ Максимальное количество: {cart_taps.max_quantity}"
+            assert api.answers == ["✅ Количество увеличено"] * 4 + [limit] * 6, api.answers
+
+            # "-" и "+" взаимно гасятся - ни записи, ни правки
+            edits = api.calls["EditMessageText"]
+            with QueryCounter(engine) as counter:
+                await press(CART_DECREASE.pack(item_id))
+                await press(CART_INCREASE.pack(item_id))
+                await _settle()
+            assert counter.commits == 0 and api.calls["EditMessageText"] == edits
+
+            # Ошибка записи - повтор в новой сессии
+            flaky.failures = 1
+            await press(CART_DECREASE.pack(item_id))
+            await _settle()
+            assert await quantity() == cart_taps.max_quantity - 1
+            assert cart_taps.failures == 0
+
+            # Повтор тоже не удался - сообщение показывает корзину из БД
+            flaky.failures = 2
+            edits = api.calls["EditMessageText"]
+            await press(CART_DECREASE.pack(item_id))
+            await _settle()
+            assert await quantity() == cart_taps.max_quantity - 1
+            assert cart_taps.failures == 1 and api.calls["EditMessageText"] == edits + 1
+
+            # Следующий апдейт видит корзину с учетом нажатий, не дожидаясь таймера
+            cart_taps.window = 10
+            for _ in range(3):
+                await press(CART_DECREASE.pack(item_id))
+            await press(CART.pack())
+            assert await quantity() == cart_taps.max_quantity - 4
+            assert cart_taps.pending == 0
+        finally:
+            cart_taps.window, cart_taps.session_maker = saved
+            user_cache.invalidate(TELEGRAM_ID)
+            await bot.session.close()
+
+
+def test_cart_taps_coalescing():
+    asyncio.run(_check_coalescing())
+
+
+if __name__ == "__main__":
+    test_cart_taps_coalescing()
+    print("✅ Нажатия +/- в корзине склеиваются в одну запись")
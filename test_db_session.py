@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Тест DbSessionMiddleware: апдейт получает одну сессию - ее используют
+и AuthMiddleware, и обработчик; соединение берется из пула один раз,
+COMMIT выполняется только при изменениях, ошибка откатывает транзакцию.
+
+Запуск: python -m pytest test_db_session.py  или  python test_db_session.py
+"""
+import asyncio
+import os
+from datetime import datetime
+
+os.environ.setdefault("BOT_TOKEN", "0:test")
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import Chat, Message, Update, User as TelegramUser
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Category, User
+from app.database.instrumentation import QueryCounter
+from app.database.sqlite import SerializedWriteSession
+from app.middlewares.auth import AuthMiddleware
+from app.middlewares.db import DbSessionMiddleware
+from app.services.user_cache import user_cache
+from testing_utils import temp_database
+
+TELEGRAM_ID = 4242
+
+
+def _router(sessions):
+    router = Router()
+
+    @router.message(F.text == "read")
+    async def read(message: Message, session: AsyncSession, user: User):
+        sessions.append(session)
+        await session.scalar(select(func.count()).select_from(Category))
+
+    @router.message(F.text.startswith("add "))
+    async def add(message: Message, session: AsyncSession, user: User):
+        sessions.append(session)
+        session.add(Category(name=message.text[4:]))
+
+    @router.message(F.text == "undo")
+    async def undo(message: Message, session: AsyncSession, user: User):
+        # Как обработчики, которые откатывают изменения после ошибки сервиса
+        session.add(Category(name="undone"))
+        await session.flush()
+        await session.rollback()
+
+    @router.message(F.text == "fail")
+    async def fail(message: Message, session: AsyncSession, user: User):
+        session.add(Category(name="broken"))
+        await session.flush()
+        raise RuntimeError("ошибка обработчика")
+
+    return router
+
+
+async def _check_unit_of_work():
+    async with temp_database("uow.db", session_class=SerializedWriteSession) as (engine, session_maker):
+
+        sessions = []
+        dp = Dispatcher()
+        dp.message.middleware(DbSessionMiddleware(session_maker))
+        dp.message.middleware(AuthMiddleware())
+        dp.include_router(_router(sessions))
+        bot = Bot(token="42:TEST")
+        update_ids = iter(range(1, 100))
+
+        async def send(text: str):
+            message = Message(
+                message_id=1, date=datetime.now(), text=text,
+                chat=Chat(id=TELEGRAM_ID, type="private"),
+                from_user=TelegramUser(id=TELEGRAM_ID, is_bot=False, first_name="Test")
+            )
+            with QueryCounter(engine) as counter:
+                await dp.feed_update(bot, Update(update_id=next(update_ids), message=message))
+            return counter
+
+        async def categories():
+            async with session_maker() as session:
+                return list(await session.scalars(select(Category.name).order_by(Category.id)))
+
+        user_cache.invalidate(TELEGRAM_ID)
+        try:
+            # Новый пользователь создается в сессии апдейта
+            await send("read")
+            user_cache.invalidate(TELEGRAM_ID)
+
+            # Промах кэша пользователей и чтение обработчика - одно соединение, без COMMIT
+            counter = await send("read")
+            assert (counter.checkouts, counter.commits) == (1, 0), (counter.checkouts, counter.commits)
+
+            # Запись без commit в обработчике фиксирует middleware
+            counter = await send("add Супы")
+            assert (counter.checkouts, counter.commits) == (1, 1), (counter.checkouts, counter.commits)
+            assert await categories() == ["Супы"]
+
+            # Каждому апдейту - своя сессия, после апдейта она закрыта
+            assert len(set(map(id, sessions))) == len(sessions) == 3
+            assert not any(session.in_transaction() for session in sessions)
+
+            # Исключение в обработчике откатывает изменения
+            try:
+                await send("fail")
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError("исключение обработчика должно дойти до диспетчера")
+            assert await categories() == ["Супы"]
+
+            # Пользователь загружается сессией, которую обработчик откатывает:
+            # закэшированный объект к ней не привязан и не сбрасывается
+            user_cache.invalidate(TELEGRAM_ID)
+            await send("undo")
+            assert await categories() == ["Супы"]
+            cached = await user_cache.get_user(
+                TelegramUser(id=TELEGRAM_ID, is_bot=False, first_name="Test")
+            )
+            assert cached.telegram_id == TELEGRAM_ID and cached.id
+        finally:
+            user_cache.invalidate(TELEGRAM_ID)
+            await bot.session.close()
+
+
+def test_db_session_unit_of_work():
+    asyncio.run(_check_unit_of_work())
+
+
+if __name__ == "__main__":
+    test_db_session_unit_of_work()
+    print("✅ Апдейт обрабатывается в одной сессии и одной транзакции")
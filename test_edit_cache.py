@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Тест пропуска правок без изменений: повторная правка тем же текстом и
+клавиатурой не уходит в Telegram и возвращает тот же Message, смена
+клавиатуры сбрасывает отпечаток текста, ошибки и удаление сообщения
+сбрасывают запись, а память ограничена max_size сообщений.
+
+Запуск: python -m pytest test_edit_cache.py  или  python test_edit_cache.py
+"""
+import asyncio
+import os
+from datetime import datetime
+
+os.environ.setdefault("BOT_TOKEN", "0:test")
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError
+from aiogram.methods import EditMessageReplyMarkup, EditMessageText
+from aiogram.types import Chat, InlineKeyboardButton, InlineKeyboardMarkup, Message
+
+from app.config import settings
+from app.middlewares import register_bot_middlewares
+from app.middlewares.edit_cache import SkipUnchangedEditMiddleware
+from app.services.edit_cache import EditCache
+
+CHAT_ID = 42
+
+
+class FakeSession(BaseSession):
+    """Сессия без сети: запросы записываются, ошибку можно задать заранее"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self.error = None
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests.append(type(method).__name__)
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error(method=method, message=error.__name__)
+        if isinstance(method, (EditMessageText, EditMessageReplyMarkup)) and not method.inline_message_id:
+            # Как Telegram: правка сообщения возвращает само сообщение
+            return Message(
+                message_id=method.message_id, date=datetime.now(), chat=Chat(id=CHAT_ID, type="private"),
+                text=getattr(method, "text", None), reply_markup=method.reply_markup
+            )
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+class NotModified(TelegramBadRequest):
+    def __init__(self, method, message):
+        super().__init__(method=method, message="Bad Request: message is not modified")
+
+
+def _keyboard(data: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="🔄 Обновить", callback_data=data)]])
+
+
+async def _check_edit_cache():
+    cache = EditCache(max_size=3)
+    session = FakeSession()
+    session.middleware(SkipUnchangedEditMiddleware(cache))
+    bot = Bot(token="42:TEST", session=session)
+
+    async def edit_text(message_id: int, text: str, data: str = "refresh", **kwargs):
+        return await bot.edit_message_text(
+            text, chat_id=CHAT_ID, message_id=message_id, reply_markup=_keyboard(data), **kwargs
+        )
+
+    def sent() -> int:
+        count = len(session.requests)
+        session.requests.clear()
+        return count
+
+    try:
+        # "🔄 Обновить" без изменений - запрос только первый раз,
+        # а пропущенная правка возвращает тот же Message, что и отправленная
+        results = [await edit_text(1, "📋 Заказы") for _ in range(3)]
+        assert sent() == 1 and (cache.hits, cache.misses) == (2, 1)
+        assert isinstance(results[0], Message) and results[0].text == "📋 Заказы"
+        assert results[1] is results[0] and results[2] is results[0]
+
+        # Любое отличие в тексте, разметке или клавиатуре - правка уходит
+        await edit_text(1, "📋 Заказы: 2")
+        await edit_text(1, "📋 Заказы: 2", parse_mode="HTML")
+        await edit_text(1, "📋 Заказы: 2", parse_mode="HTML", data="page_2")
+        assert sent() == 3
+
+        # Та же клавиатура отдельно не отправляется, новая - отправляется
+        await bot.edit_message_reply_markup(chat_id=CHAT_ID, message_id=1, reply_markup=_keyboard("page_2"))
+        assert sent() == 0
+        await bot.edit_message_reply_markup(chat_id=CHAT_ID, message_id=1, reply_markup=_keyboard("page_3"))
+        assert sent() == 1
+        # Текст с прежней клавиатурой после этого уже не совпадает
+        await edit_text(1, "📋 Заказы: 2", parse_mode="HTML", data="page_2")
+        assert sent() == 1
+
+        # "message is not modified" доходит до вызова, а содержимое запоминается:
+        # повтор не уходит в Telegram и получает ту же ошибку
+        session.error = NotModified
+        for _ in range(2):
+            try:
+                await edit_text(2, "Без изменений")
+            except TelegramBadRequest as e:
+                assert "message is not modified" in str(e)
+            else:
+                raise AssertionError("ошибка Telegram должна дойти до обработчика")
+        assert sent() == 1
+
+        # Другая ошибка и удаление сообщения сбрасывают запись
+        session.error = TelegramNetworkError
+        try:
+            await edit_text(2, "Сеть")
+        except TelegramNetworkError:
+            pass
+        await edit_text(2, "Без изменений")
+        await bot.delete_message(chat_id=CHAT_ID, message_id=2)
+        await edit_text(2, "Без изменений")
+        assert session.requests == ["EditMessageText"] * 2 + ["DeleteMessage", "EditMessageText"]
+        sent()
+
+        # Inline-сообщения - по inline_message_id; Telegram отвечает на их правку True
+        for _ in range(2):
+            assert await bot.edit_message_text("inline", inline_message_id="abc", reply_markup=_keyboard("x")) is True
+        assert sent() == 1
+
+        # Память ограничена: самые старые сообщения вытесняются
+        for message_id in range(10, 15):
+            await edit_text(message_id, "текст")
+        assert len(cache) == 3 and sent() == 5
+        await edit_text(14, "текст")
+        await edit_text(10, "текст")
+        assert sent() == 1
+    finally:
+        await bot.session.close()
+
+
+async def _check_polling_only():
+    async def edits_sent(bot_mode: str) -> int:
+        session = FakeSession()
+        bot = Bot(token="42:TEST", session=session)
+        saved, settings.bot_mode = settings.bot_mode, bot_mode
+        try:
+            register_bot_middlewares(bot)
+            for _ in range(2):
+                await bot.edit_message_text("📋 Заказы", chat_id=CHAT_ID, message_id=100, reply_markup=_keyboard("r"))
+            return len(session.requests)
+        finally:
+            settings.bot_mode = saved
+            await bot.session.close()
+
+    # В webhook-режиме сообщение могли изменить в другом процессе - правки уходят всегда
+    assert await edits_sent("polling") == 1
+    assert await edits_sent("webhook") == 2
+
+
+def test_edit_cache():
+    asyncio.run(_check_edit_cache())
+
+
+def test_edit_cache_polling_only():
+    asyncio.run(_check_polling_only())
+
+
+if __name__ == "__main__":
+    test_edit_cache()
+    test_edit_cache_polling_only()
+    print("✅ Правки сообщений без изменений не отправляются")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Тест потокового скачивания файлов: хэш и размер считаются на лету,
+лимит размера прерывает скачивание без недописанных файлов, а
+медленный поток не блокирует цикл событий. Слишком большой скриншот
+оплаты клиент отправляет заново, заказ при этом не меняется.
+
+Запуск: python -m pytest test_file_streaming.py  или  python test_file_streaming.py
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from types import SimpleNamespace
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.config import settings
+from app.database import Order, OrderStatus, User
+from app.handlers.user.orders import receive_payment_screenshot
+from app.utils import texts
+from app.utils.helpers import CHUNK_SIZE, FileTooLargeError, download_telegram_file
+from app.utils.states import UserStates
+from testing_utils import temp_database
+
+
+class FakeSession:
+    """Сессия бота, отдающая содержимое файла частями с задержкой"""
+
+    def __init__(self, content: bytes, delay: float):
+        self.content = content
+        self.delay = delay
+        self.api = SimpleNamespace(is_local=False, file_url=lambda token, path: f"https://files/{path}")
+
+    async def stream_content(self, url, timeout, chunk_size, raise_for_status):
+        for start in range(0, len(self.content), chunk_size):
+            await asyncio.sleep(self.delay)
+            yield self.content[start:start + chunk_size]
+
+
+class FakeBot:
+    def __init__(self, content: bytes, delay: float = 0.01):
+        self.token = "42:TEST"
+        self.session = FakeSession(content, delay)
+
+    async def get_file(self, file_id):
+        return SimpleNamespace(file_path=f"photos/{file_id}.jpg", file_size=None)
+
+
+async def _check_streaming():
+    content = os.urandom(CHUNK_SIZE * 8 + 123)
+    photo = SimpleNamespace(file_id="photo", file_size=len(content))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        destination = os.path.join(tmp, "screenshots", "payment.jpg")
+
+        # Пока файл скачивается, цикл событий продолжает работать
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticker_task = asyncio.create_task(ticker())
+        saved = await download_telegram_file(FakeBot(content), photo, destination)
+        ticker_task.cancel()
+
+        assert saved.size == len(content)
+        assert saved.sha256 == hashlib.sha256(content).hexdigest()
+        with open(destination, "rb") as f:
+            assert f.read() == content
+        assert ticks >= 5, ticks
+
+        # Размер из апдейта больше лимита - даже не начинаем скачивание
+        try:
+            await download_telegram_file(FakeBot(content), photo, destination + "2", max_size=1000)
+            assert False, "ожидалась FileTooLargeError"
+        except FileTooLargeError:
+            pass
+
+        # Размер заранее неизвестен - поток обрывается на лимите, .part удален
+        unknown_size = SimpleNamespace(file_id="doc", file_size=None)
+        try:
+            await download_telegram_file(FakeBot(content), unknown_size, destination + "3", max_size=CHUNK_SIZE * 2)
+            assert False, "ожидалась FileTooLargeError"
+        except FileTooLargeError:
+            pass
+        assert sorted(os.listdir(os.path.dirname(destination))) == ["payment.jpg"]
+
+
+async def _check_oversize_screenshot():
+    async with temp_database("screenshots.db") as (engine, session_maker):
+        async with session_maker() as session:
+            user = User(telegram_id=1, first_name="Test")
+            session.add(user)
+            await session.flush()
+            order = Order(user_id=user.id, status=OrderStatus.PENDING_PAYMENT.value, total_amount=500.0)
+            session.add(order)
+            await session.commit()
+
+        state = FSMContext(storage=MemoryStorage(), key=StorageKey(bot_id=42, chat_id=1, user_id=1))
+        await state.set_state(UserStates.UPLOADING_PAYMENT_SCREENSHOT)
+        await state.update_data(order_id=order.id)
+
+        answers = []
+
+        async def answer(text, **kwargs):
+            answers.append(text)
+
+        # Telegram сообщил размер больше лимита - файл не скачивается
+        photo = SimpleNamespace(file_id="big", file_size=settings.max_file_size + 1)
+        message = SimpleNamespace(photo=[photo], bot=FakeBot(b""), answer=answer)
+        async with session_maker() as session:
+            await receive_payment_screenshot(message, state, user, session)
+
+        assert answers == [texts.SCREENSHOT_TOO_LARGE.format(max_size_mb=settings.max_file_size // (1024 * 1024))]
+        assert await state.get_state() == UserStates.UPLOADING_PAYMENT_SCREENSHOT.state
+        async with session_maker() as session:
+            order = await session.get(Order, order.id)
+            assert order.status == OrderStatus.PENDING_PAYMENT.value
+            assert not order.payment_screenshot
+
+
+def test_streaming_download():
+    asyncio.run(_check_streaming())
+
+
+def test_oversize_screenshot():
+    asyncio.run(_check_oversize_screenshot())
+
+
+if __name__ == "__main__":
+    test_streaming_download()
+    test_oversize_screenshot()
+    print("✅ Потоковое скачивание соблюдает лимит и не блокирует цикл событий")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Тест хранилища FSM в БД: состояние переживает перезапуск,
+серия записей сохраняется одним upsert, повторные чтения по умолчанию
+идут из кэша, при ttl=0 изменения другого процесса видны сразу,
+очистка удаляет строку.
+
+Запуск: python -m pytest test_fsm_storage.py  или  python test_fsm_storage.py
+"""
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+from sqlalchemy import func, select
+
+from app.database import FsmState
+from app.database.instrumentation import QueryCounter
+from app.services.fsm_storage import DatabaseStorage
+from app.utils.states import UserStates
+from testing_utils import temp_database
+
+
+async def _check_storage():
+    async with temp_database("fsm.db") as (engine, session_maker):
+        key = StorageKey(bot_id=1, chat_id=100, user_id=100)
+
+        storage = DatabaseStorage(flush_interval=60, session_maker=session_maker)
+        with QueryCounter(engine) as counter:
+            await storage.set_state(key, UserStates.UPLOADING_PAYMENT_SCREENSHOT)
+            await storage.update_data(key, {"order_id": 42})
+            await storage.update_data(key, {"payment_method": "card"})
+            assert await storage.get_state(key) == UserStates.UPLOADING_PAYMENT_SCREENSHOT.state
+            # Один SELECT на промах кэша, записей в БД еще нет
+            assert counter.count == 1, counter.statements
+
+        with QueryCounter(engine) as counter:
+            await storage.close()
+            # Три изменения - один upsert
+            writes = [s for s in counter.statements if s.lstrip().upper().startswith("INSERT")]
+            assert len(writes) == 1, counter.statements
+
+        # "Перезапуск": новое хранилище читает состояние из БД.
+        # ttl=0 и flush_interval=0 - настройка для нескольких процессов бота
+        restarted = DatabaseStorage(ttl=0, flush_interval=0, session_maker=session_maker)
+        assert await restarted.get_state(key) == UserStates.UPLOADING_PAYMENT_SCREENSHOT.state
+        assert await restarted.get_data(key) == {"order_id": 42, "payment_method": "card"}
+
+        # Другой процесс бота меняет состояние - следующее чтение его видит
+        other = DatabaseStorage(ttl=0, flush_interval=0, session_maker=session_maker)
+        await other.update_data(key, {"order_id": 43})
+        assert (await restarted.get_data(key))["order_id"] == 43
+        await other.close()
+
+        # По умолчанию (один процесс) повторные чтения - из кэша, без запросов
+        cached = DatabaseStorage(flush_interval=0, session_maker=session_maker)
+        await cached.get_data(key)
+        with QueryCounter(engine) as counter:
+            for _ in range(10):
+                await cached.get_state(key)
+                await cached.get_data(key)
+            assert (counter.count, counter.checkouts) == (0, 0), (counter.count, counter.checkouts)
+        await cached.close()
+
+        # state.clear() удаляет строку
+        await restarted.set_state(key, None)
+        await restarted.set_data(key, {})
+        async with session_maker() as session:
+            rows = await session.scalar(select(func.count()).select_from(FsmState))
+        assert rows == 0
+        await restarted.close()
+
+
+def test_fsm_storage_persists_and_coalesces():
+    asyncio.run(_check_storage())
+
+
+if __name__ == "__main__":
+    test_fsm_storage_persists_and_coalesces()
+    print("✅ Хранилище FSM сохраняет состояние и объединяет записи")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Тест миграций Alembic на обеих СУБД: upgrade head создает все таблицы
+моделей, downgrade base их удаляет; группировка по дню (day_of) дает
+одинаковый результат на SQLite и PostgreSQL.
+
+SQLite проверяется всегда. PostgreSQL - если задан TEST_POSTGRES_URL
+(postgresql+asyncpg://...) или установлен pgserver (встроенный сервер
+PostgreSQL для тестов: pip install pgserver).
+
+Запуск: python -m pytest test_migrations_backends.py  или  python test_migrations_backends.py
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from datetime import datetime, date
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, inspect, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import Base, Order, User, day_of
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _alembic(url: str) -> Config:
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    config.cmd_opts = argparse.Namespace(x=[f"url={url}"])
+    return config
+
+
+async def _tables(url: str) -> set:
+    engine = create_async_engine(url)
+    try:
+        async with engine.connect() as conn:
+            return set(await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names()))
+    finally:
+        await engine.dispose()
+
+
+async def _orders_by_day(url: str) -> list:
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            user_id = (await conn.execute(
+                User.__table__.insert().values(telegram_id=1).returning(User.__table__.c.id)
+            )).scalar_one()
+            await conn.execute(Order.__table__.insert(), [
+                {"user_id": user_id, "total_amount": amount, "created_at": created_at}
+                for amount, created_at in (
+                    (100.0, datetime(2024, 3, 1, 0, 5)),
+                    (200.0, datetime(2024, 3, 1, 23, 55)),
+                    (50.0, datetime(2024, 3, 2, 12, 0)),
+                )
+            ])
+            day = day_of(Order.created_at)
+            rows = (await conn.execute(
+                select(day, func.count(), func.sum(Order.total_amount)).group_by(day).order_by(day)
+            )).all()
+            await conn.execute(Order.__table__.delete())
+            await conn.execute(User.__table__.delete())
+            return [tuple(row) for row in rows]
+    finally:
+        await engine.dispose()
+
+
+def _check_backend(url: str):
+    config = _alembic(url)
+    command.upgrade(config, "head")
+    tables = asyncio.run(_tables(url))
+    assert set(Base.metadata.tables) <= tables, set(Base.metadata.tables) - tables
+
+    rows = asyncio.run(_orders_by_day(url))
+    assert rows == [(date(2024, 3, 1), 2, 300.0), (date(2024, 3, 2), 1, 50.0)], rows
+
+    command.downgrade(config, "base")
+    assert asyncio.run(_tables(url)) <= {"alembic_version"}
+
+
+def _postgres():
+    """URL тестового PostgreSQL и функция остановки сервера"""
+    url = os.getenv("TEST_POSTGRES_URL")
+    if url:
+        return url, lambda: None
+    try:
+        import pgserver
+    except ImportError:
+        return None, None
+
+    data_dir = tempfile.mkdtemp(prefix="pg_test_")
+    server = pgserver.get_server(data_dir, cleanup_mode="stop")
+    socket_dir = server.get_uri().split("host=", 1)[1]
+    return f"postgresql+asyncpg://postgres@/postgres?host={socket_dir}", server.cleanup
+
+
+def test_migrations_sqlite():
+    with tempfile.TemporaryDirectory() as tmp:
+        _check_backend(f"sqlite+aiosqlite:///{tmp}/migrations.db")
+
+
+def test_migrations_postgres():
+    url, stop = _postgres()
+    if url is None:
+        print("PostgreSQL недоступен (TEST_POSTGRES_URL не задан, pgserver не установлен) - пропуск")
+        return
+    try:
+        _check_backend(url)
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    test_migrations_sqlite()
+    test_migrations_postgres()
+    print("✅ Миграции применяются и откатываются на SQLite и PostgreSQL")
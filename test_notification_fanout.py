@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Тест рассылки уведомлений администраторам на фейковом боте:
+параллельность, лимит одновременных отправок, flood wait и
+результаты по каждому получателю.
+
+Запуск: python -m pytest test_notification_fanout.py  или  python test_notification_fanout.py
+"""
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from app.config import settings
+from app.services.broadcast import Broadcaster
+from app.services.notifications import NotificationService
+
+
+class FakeBot:
+    """Бот с задержкой latency на каждый вызов и сценарием ошибок по чатам"""
+
+    def __init__(self, latency: float = 0.05, errors=None):
+        self.latency = latency
+        # chat_id -> список исключений, по одному на попытку
+        self.errors = errors or {}
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            errors = self.errors.get(chat_id)
+            if errors:
+                raise errors.pop(0)
+            self.sent.append((chat_id, text, time.monotonic()))
+            return chat_id
+        finally:
+            self.in_flight -= 1
+
+    send_photo = send_message
+
+
+def _method(chat_id):
+    return SendMessage(chat_id=chat_id, text="test")
+
+
+async def _check_fanout():
+    admin_ids = list(range(1, 11))
+    saved_admin_ids = settings.admin_ids
+    settings.admin_ids = admin_ids
+    try:
+        # 10 админов по 100 мс - параллельно, а не 1 секунда подряд
+        bot = FakeBot(latency=0.1)
+        started = time.monotonic()
+        assert await NotificationService.notify_admins(bot, "Новый заказ")
+        elapsed = time.monotonic() - started
+        assert elapsed < 0.5, elapsed
+        assert sorted(chat_id for chat_id, *_ in bot.sent) == admin_ids
+
+        # Flood wait для одного чата и запрет для другого
+        bot = FakeBot(latency=0.01, errors={
+            3: [TelegramRetryAfter(_method(3), "Flood control", 1)],
+            7: [TelegramForbiddenError(_method(7), "bot was blocked by the user")]
+        })
+        results = await NotificationService.send_to_admins(
+            lambda admin_id: bot.send_message(chat_id=admin_id, text="Оплата")
+        )
+        by_chat = {result.chat_id: result for result in results}
+        assert [result.chat_id for result in results] == admin_ids
+        assert by_chat[3].ok and by_chat[3].attempts == 2
+        assert not by_chat[7].ok and "blocked" in by_chat[7].error
+        assert sum(result.ok for result in results) == 9
+        # Повтор для чата 3 не раньше, чем через retry_after
+        times = {chat_id: sent_at for chat_id, _, sent_at in bot.sent}
+        assert times[3] - times[1] >= 0.9
+    finally:
+        settings.admin_ids = saved_admin_ids
+
+    # Не больше concurrency отправок одновременно
+    bot = FakeBot(latency=0.02)
+    results = await Broadcaster(concurrency=3).send(
+        range(20), lambda chat_id: bot.send_message(chat_id, "x")
+    )
+    assert all(result.ok for result in results)
+    assert bot.max_in_flight == 3
+
+    # Лимит на чат: 5 сообщений в один чат при 10/с без запаса - не быстрее 0.4 с
+    bot = FakeBot(latency=0)
+    limited = Broadcaster(chat_rate=10, chat_burst=1)
+    started = time.monotonic()
+    for _ in range(5):
+        await limited.send([42], lambda chat_id: bot.send_message(chat_id, "x"))
+    assert time.monotonic() - started >= 0.39
+
+
+def test_notification_fanout():
+    asyncio.run(_check_fanout())
+
+
+if __name__ == "__main__":
+    test_notification_fanout()
+    print("✅ Рассылка администраторам параллельна и соблюдает лимиты")
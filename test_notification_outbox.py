@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Тест outbox уведомлений: сообщения появляются только после commit,
+воркеры их доставляют, временные ошибки повторяются, постоянные -
+нет, а забранное упавшим воркером возвращается по истечении аренды.
+
+Запуск: python -m pytest test_notification_outbox.py  или  python test_notification_outbox.py
+"""
+import asyncio
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramServerError
+from aiogram.methods import SendMessage
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import OutboxMessage
+from app.services.outbox import NotificationOutbox, OutboxWorker
+from testing_utils import temp_database
+
+
+class FakeBot:
+    """Бот, который запоминает отправки и падает по сценарию"""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.sent = []
+
+    async def _send(self, method, chat_id, **kwargs):
+        await asyncio.sleep(0.01)
+        errors = self.errors.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append((method, chat_id, kwargs))
+
+    async def send_message(self, chat_id, **kwargs):
+        await self._send("send_message", chat_id, **kwargs)
+
+    async def send_photo(self, chat_id, **kwargs):
+        await self._send("send_photo", chat_id, **kwargs)
+
+
+async def _statuses(session_maker):
+    async with session_maker() as session:
+        rows = (await session.execute(select(OutboxMessage).order_by(OutboxMessage.id))).scalars()
+        return {row.chat_id: (row.status, row.attempts) for row in rows}
+
+
+async def _check_outbox():
+    async with temp_database("outbox.db") as (engine, session_maker):
+
+        saved_admin_ids = settings.admin_ids
+        settings.admin_ids = [10, 11]
+        try:
+            # Откат транзакции заказа откатывает и уведомления
+            async with session_maker() as session:
+                NotificationOutbox.enqueue_message(session, 1, "Не будет отправлено")
+                await session.rollback()
+            assert await _statuses(session_maker) == {}
+
+            async with session_maker() as session:
+                NotificationOutbox.enqueue_message(session, 1, "Заказ готов")
+                NotificationOutbox.enqueue_admins(session, "send_photo", photo="file-id", caption="Оплата")
+                await session.commit()
+
+            bot = FakeBot()
+            worker = OutboxWorker(session_maker=session_maker, retry_delay=0)
+            worker.bot = bot
+            assert await worker.process_batch() == 3
+            assert sorted((method, chat_id) for method, chat_id, _ in bot.sent) == [
+                ("send_message", 1), ("send_photo", 10), ("send_photo", 11)
+            ]
+            assert set(await _statuses(session_maker)) == {1, 10, 11}
+            assert all(status == "sent" for status, _ in (await _statuses(session_maker)).values())
+
+            # Временная ошибка - повтор, постоянная - сразу failed
+            method = SendMessage(chat_id=2, text="x")
+            bot = FakeBot(errors={
+                2: [TelegramServerError(method, "Bad Gateway")],
+                3: [TelegramForbiddenError(method, "bot was blocked by the user")]
+            })
+            worker.bot = bot
+            async with session_maker() as session:
+                NotificationOutbox.enqueue(session, [2, 3], "send_message", text="Статус изменен")
+                await session.commit()
+            await worker.process_batch()
+            statuses = await _statuses(session_maker)
+            assert statuses[2] == ("pending", 1) and statuses[3] == ("failed", 1)
+            await worker.process_batch()
+            assert (await _statuses(session_maker))[2] == ("sent", 2)
+
+            # Воркер забрал сообщение и "упал": до конца аренды его никто не берет
+            async with session_maker() as session:
+                NotificationOutbox.enqueue_message(session, 4, "После перезапуска")
+                await session.commit()
+            assert len(await worker._claim()) == 1
+            restarted = OutboxWorker(session_maker=session_maker)
+            restarted.bot = bot
+            assert await restarted.process_batch() == 0
+            async with session_maker() as session:
+                # Аренда истекла
+                message = (await session.execute(
+                    select(OutboxMessage).where(OutboxMessage.chat_id == 4)
+                )).scalar_one()
+                message.next_attempt_at = message.created_at
+                await session.commit()
+            assert await restarted.process_batch() == 1
+            assert (await _statuses(session_maker))[4] == ("sent", 2)
+
+            # Запущенные воркеры просыпаются по commit, не дожидаясь опроса
+            pool = OutboxWorker(workers=2, poll_interval=60, session_maker=session_maker)
+            pool.start(bot)
+            await asyncio.sleep(0.05)
+            async with session_maker() as session:
+                NotificationOutbox.enqueue_message(session, 5, "Сразу")
+                await session.commit()
+            for _ in range(100):
+                if (await _statuses(session_maker)).get(5, ("",))[0] == "sent":
+                    break
+                await asyncio.sleep(0.02)
+            await pool.close()
+            assert (await _statuses(session_maker))[5][0] == "sent"
+        finally:
+            settings.admin_ids = saved_admin_ids
+
+
+def test_notification_outbox():
+    asyncio.run(_check_outbox())
+
+
+if __name__ == "__main__":
+    test_notification_outbox()
+    print("✅ Outbox уведомлений доставляет сообщения и переживает сбои")
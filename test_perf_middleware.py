@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Тест метрик обработчиков: время, SQL-запросы, строки и вызовы API
+записываются на обработчик, фоновые задачи обработчика не
+засчитываются, выгрузка Prometheus содержит гистограмму и счетчики.
+
+Запуск: python -m pytest test_perf_middleware.py  или  python test_perf_middleware.py
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.filters import Command
+from aiogram.types import Message
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.middlewares.perf import PerfMiddleware, PerfHandlerMiddleware, PerfRequestMiddleware
+from app.services.perf import PerfRegistry, perf_stats
+
+
+class FakeSession(BaseSession):
+    """Сессия без сети: любой метод API возвращает True"""
+
+    async def make_request(self, bot, method, timeout=None):
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+def _message(update_id: int, text_: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": text_,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text_)}]
+        }
+    }
+
+
+async def _check_perf():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'perf.db')}")
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE items (id INTEGER)"))
+            await conn.execute(text("INSERT INTO items VALUES (1), (2), (3)"))
+
+        background = []
+
+        async def late_query():
+            await asyncio.sleep(0.01)
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT * FROM items"))
+
+        dp = Dispatcher()
+
+        @dp.message(Command("items"))
+        async def list_items(message: Message):
+            # Строки считаются по запросам сессии, как в обработчиках бота
+            async with AsyncSession(engine) as session:
+                rows = (await session.execute(text("SELECT * FROM items"))).all()
+                await session.scalar(text("SELECT COUNT(*) FROM items"))
+            assert len(rows) == 3
+            await message.bot.send_chat_action(message.chat.id, "typing")
+            # Запрос фоновой задачи выполнится после ответа - не в счет обработчика
+            background.append(asyncio.create_task(late_query()))
+
+        @dp.message(Command("fail"))
+        async def fail(message: Message):
+            raise RuntimeError("boom")
+
+        dp.update.outer_middleware(PerfMiddleware())
+        dp.message.middleware(PerfHandlerMiddleware())
+        bot = Bot(token="42:TEST", session=FakeSession())
+        bot.session.middleware(PerfRequestMiddleware())
+
+        perf_stats.reset()
+        try:
+            await dp.feed_raw_update(bot, _message(1, "/items"))
+            await dp.feed_raw_update(bot, _message(2, "/items"))
+            await asyncio.gather(*background)
+            try:
+                await dp.feed_raw_update(bot, _message(3, "/fail"))
+            except RuntimeError:
+                pass
+            await dp.feed_raw_update(bot, _message(4, "/unknown"))
+
+            stats = perf_stats._stats[("test_perf_middleware", "list_items")]
+            assert stats.count == 2
+            assert stats.queries == 4, stats.queries
+            assert stats.rows == 2 * (3 + 1), stats.rows
+            assert stats.api_calls == 2
+            assert len(stats.recent) == 2 and stats.percentile(99) > 0
+
+            assert perf_stats._stats[("test_perf_middleware", "fail")].errors == 1
+            assert perf_stats._stats[("", "unhandled")].count == 1
+
+            assert "test_perf_middleware:list_items</b> - 2 выз." in perf_stats.render_text()
+            exported = perf_stats.render_prometheus()
+            labels = 'router="test_perf_middleware",handler="list_items"'
+            assert f'bot_handler_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in exported
+            assert f"bot_handler_duration_seconds_count{{{labels}}} 2" in exported
+            assert f"bot_handler_sql_queries_total{{{labels}}} 4" in exported
+            assert f"bot_handler_api_calls_total{{{labels}}} 2" in exported
+
+            # Выгрузка в файл
+            registry = PerfRegistry(metrics_file=os.path.join(tmp, "metrics.prom"))
+            await registry.write_file()
+            with open(registry.metrics_file, encoding="utf-8") as f:
+                assert f.read().startswith("# HELP bot_handler_duration_seconds")
+        finally:
+            perf_stats.reset()
+            await engine.dispose()
+
+
+def test_perf_middleware():
+    asyncio.run(_check_perf())
+
+
+if __name__ == "__main__":
+    test_perf_middleware()
+    print("✅ Метрики обработчиков собираются и выгружаются")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Тест сводок продаж: инкрементальные обновления при смене статусов
+должны совпадать с полной пересборкой по истории заказов, в том числе
+после удаления блюда с историей продаж.
+
+Запуск: python -m pytest test_sales_stats.py  или  python test_sales_stats.py
+"""
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import func, select, text
+
+from app.database import (
+    User, Category, Dish, Order, OrderItem, OrderStatus, DailySales, DailyDishSales, UserSales
+)
+from app.handlers.admin import admin_panel
+from app.services.order import OrderService
+from app.services.sales_stats import SalesStatsService, SOLD_STATUSES
+from testing_utils import temp_database
+
+
+async def _snapshot(session):
+    """Содержимое сводок без нулевых строк"""
+    sales = {
+        (row.day, row.status): (row.orders_count, round(row.total_amount, 2))
+        for row in (await session.execute(select(DailySales))).scalars()
+        if row.orders_count
+    }
+    dishes = {
+        (row.day, row.dish_id): (row.quantity, round(row.revenue, 2), row.orders_count)
+        for row in (await session.execute(select(DailyDishSales))).scalars()
+        if row.orders_count
+    }
+    users = {
+        row.user_id: (row.orders_count, round(row.total_spent, 2))
+        for row in (await session.execute(select(UserSales))).scalars()
+        if row.orders_count
+    }
+    return sales, dishes, users
+
+
+async def _noop(*args, **kwargs):
+    pass
+
+
+async def _check_rollups():
+    async with temp_database("stats.db") as (engine, session_maker):
+        async with session_maker() as session:
+            users = [User(telegram_id=1, first_name="Анна"), User(telegram_id=2, first_name="Борис")]
+            category = Category(name="Выпечка")
+            session.add_all([*users, category])
+            await session.flush()
+            dishes = [Dish(name=f"Пирог {i}", price=150.0 + i, category_id=category.id) for i in range(3)]
+            session.add_all(dishes)
+            await session.flush()
+
+            # Заказы за три дня, каждый проходит свою цепочку статусов
+            now = datetime.utcnow()
+            chains = [
+                [OrderStatus.PAYMENT_RECEIVED, OrderStatus.CONFIRMED, OrderStatus.READY, OrderStatus.COMPLETED],
+                [OrderStatus.PAYMENT_RECEIVED, OrderStatus.CANCELLED_BY_MASTER],
+                [OrderStatus.CONFIRMED, OrderStatus.CANCELLED_BY_MASTER],
+                [OrderStatus.CONFIRMED, OrderStatus.READY],
+                [],
+            ]
+            for i, chain in enumerate(chains * 3):
+                order = Order(
+                    user_id=users[i % 2].id,
+                    status=OrderStatus.PENDING_PAYMENT.value,
+                    total_amount=0.0,
+                    created_at=now - timedelta(days=i % 3)
+                )
+                session.add(order)
+                await session.flush()
+                items = [
+                    OrderItem(order_id=order.id, dish_id=dish.id, quantity=j + 1, price=dish.price)
+                    for j, dish in enumerate(dishes[: i % 3 + 1])
+                ]
+                session.add_all(items)
+                order.total_amount = sum(item.quantity * item.price for item in items)
+                await session.flush()
+                await SalesStatsService.record_transition(session, order, None, order.status)
+
+                for status in chain:
+                    await OrderService.change_status(session, order.id, status.value)
+            await session.commit()
+
+            incremental = await _snapshot(session)
+            await SalesStatsService.rebuild(session)
+            await session.commit()
+            rebuilt = await _snapshot(session)
+
+            assert incremental == rebuilt, (incremental, rebuilt)
+            assert rebuilt[1], "сводка по блюдам не должна быть пустой"
+
+            # Статистика за период читается из сводки
+            stats = await SalesStatsService.get_period_stats(session, (now - timedelta(days=1)).date())
+            assert stats[OrderStatus.COMPLETED.value][0] == 2
+            top = await SalesStatsService.get_top_dishes(session)
+            quantities = [row[1] for row in top]
+            assert quantities == sorted(quantities, reverse=True) and len(top) == 3
+
+            # Топ клиентов - из сводки, совпадает с агрегатом по заказам
+            customers = await SalesStatsService.get_top_customers(session)
+            expected = (await session.execute(
+                select(User.first_name, func.count(Order.id))
+                .join(Order, Order.user_id == User.id)
+                .where(Order.status.in_(SOLD_STATUSES))
+                .group_by(User.id)
+            )).all()
+            assert {row[0]: row[3] for row in customers} == dict(expected), customers
+            counts = [row[3] for row in customers]
+            assert counts == sorted(counts, reverse=True)
+
+        # Удаление блюда с историей продаж не нарушает внешний ключ сводки
+        # (SQLite проверяет ключи только с PRAGMA foreign_keys, PostgreSQL - всегда)
+        async with session_maker() as session:
+            await session.execute(text("PRAGMA foreign_keys=ON"))
+            sold_dish = next(iter(rebuilt[1]))[1]
+            callback = SimpleNamespace(message=SimpleNamespace(edit_text=_noop), answer=_noop)
+            await admin_panel.delete_dish_execute(callback, session, sold_dish)
+
+        async with session_maker() as session:
+            assert await session.get(Dish, sold_dish) is None
+            incremental = await _snapshot(session)
+            assert all(dish_id != sold_dish for _, dish_id in incremental[1])
+            await SalesStatsService.rebuild(session)
+            assert incremental == await _snapshot(session)
+
+
+def test_sales_rollups_match_rebuild():
+    asyncio.run(_check_rollups())
+
+
+if __name__ == "__main__":
+    test_sales_rollups_match_rebuild()
+    print("✅ Сводки продаж совпадают с пересборкой")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Тест хранилища скриншотов: одинаковые картинки хранятся один раз,
+миниатюра создается, очистка удаляет только то, что можно удалить.
+
+Запуск: python -m pytest test_screenshot_store.py  или  python test_screenshot_store.py
+"""
+import asyncio
+import io
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from PIL import Image
+
+from app.database import User, Order, OrderStatus
+from app.services.screenshots import ScreenshotStore
+from testing_utils import temp_database
+
+
+def _jpeg(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (1600, 1200), color).save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+
+class FakeBot:
+    """Бот, у которого file_id - это ключ в словаре картинок"""
+
+    def __init__(self, images):
+        self.images = images
+        self.token = "42:TEST"
+        self.session = SimpleNamespace(
+            api=SimpleNamespace(is_local=False, file_url=lambda token, path: path),
+            stream_content=self._stream
+        )
+
+    async def get_file(self, file_id):
+        return SimpleNamespace(file_path=file_id, file_size=len(self.images[file_id]))
+
+    async def _stream(self, url, timeout, chunk_size, raise_for_status):
+        content = self.images[url]
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+
+def _age(store, path, days):
+    """Состарить файл и миниатюру"""
+    old = time.time() - days * 86400
+    for target in (path, store.thumbnail_path(path)):
+        if os.path.exists(store.absolute(target)):
+            os.utime(store.absolute(target), (old, old))
+
+
+async def _check_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        async with temp_database("store.db") as (engine, session_maker):
+            images = {name: _jpeg(color) for name, color in [
+                ("old", "red"), ("active", "green"), ("orphan", "blue"),
+                ("recent", "yellow"), ("finished", "white")
+            ]}
+            images["old-again"] = images["old"]
+            bot = FakeBot(images)
+            store = ScreenshotStore(root=tmp, retention_days=30, session_maker=session_maker)
+
+            # Повторная отправка той же картинки - тот же файл
+            first = await store.save_from_telegram(bot, SimpleNamespace(file_id="old", file_size=None))
+            again = await store.save_from_telegram(bot, SimpleNamespace(file_id="old-again", file_size=None))
+            assert not first.deduplicated and again.deduplicated
+            assert first.path == again.path
+            assert first.path == os.path.join("screenshots", first.sha256[:2], first.sha256[2:4], f"{first.sha256}.jpg")
+
+            with Image.open(store.absolute(first.thumb_path)) as thumb:
+                assert max(thumb.size) == 320
+            assert os.path.getsize(store.absolute(first.thumb_path)) < first.size
+
+            saved = {
+                name: await store.save_from_telegram(bot, SimpleNamespace(file_id=name, file_size=None))
+                for name in ["active", "orphan", "recent", "finished"]
+            }
+            saved["old"] = first
+
+            now = datetime.utcnow()
+            async with session_maker() as session:
+                user = User(telegram_id=1)
+                session.add(user)
+                await session.flush()
+                session.add_all([
+                    # Завершен давно - скриншот можно удалить
+                    Order(user_id=user.id, status=OrderStatus.COMPLETED.value, total_amount=100,
+                          payment_screenshot=saved["old"].path, created_at=now - timedelta(days=60)),
+                    # В работе - не удаляется, даже если старый
+                    Order(user_id=user.id, status=OrderStatus.PAYMENT_RECEIVED.value, total_amount=100,
+                          payment_screenshot=saved["active"].path, created_at=now - timedelta(days=60)),
+                    # Завершен недавно - удаляется только при нехватке места
+                    Order(user_id=user.id, status=OrderStatus.CANCELLED_BY_MASTER.value, total_amount=100,
+                          payment_screenshot=saved["finished"].path, created_at=now - timedelta(days=1)),
+                ])
+                await session.commit()
+
+            for name in ["old", "active", "orphan", "finished"]:
+                _age(store, saved[name].path, 2)
+
+            stats = await store.sweep()
+            exists = {name: os.path.exists(store.absolute(item.path)) for name, item in saved.items()}
+            assert exists == {"old": False, "active": True, "orphan": False, "recent": True, "finished": True}, exists
+            assert not os.path.exists(store.absolute(saved["old"].thumb_path))
+            assert stats.deleted == 2
+
+            # Лимит диска: удаляется скриншот завершенного заказа, активный остается
+            store.max_bytes = 1
+            stats = await store.sweep()
+            exists = {name: os.path.exists(store.absolute(item.path)) for name, item in saved.items()}
+            assert exists == {"old": False, "active": True, "orphan": False, "recent": True, "finished": False}, exists
+            assert stats.deleted == 1
+
+
+def test_screenshot_store():
+    asyncio.run(_check_store())
+
+
+if __name__ == "__main__":
+    test_screenshot_store()
+    print("✅ Хранилище скриншотов дедуплицирует файлы и ограничивает место")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Стресс-тест записи в SQLite: USERS пользователей одновременно
+создаются, наполняют корзину и жмут "+"/"-". С профилем SQLite (WAL,
+busy_timeout, очередь записи) не должно быть ни одной ошибки
+"database is locked", а итоговые количества должны сойтись. Вложенная
+пишущая сессия в той же задаче сразу получает NestedWriterError, а не
+ждет блокировку до busy_timeout.
+
+Запуск: python -m pytest test_sqlite_concurrency.py  или  python test_sqlite_concurrency.py [пользователей]
+"""
+import asyncio
+import os
+import sys
+import time
+
+from sqlalchemy import func, select, text
+
+from app.database import User, Category, Dish, Order, OrderItem, OrderStatus
+from app.database.sqlite import NestedWriterError, SerializedWriteSession
+from app.services.cart import CartService
+from testing_utils import temp_database
+
+USERS = int(os.getenv("SQLITE_STRESS_USERS", "50"))
+TAPS = 10
+
+
+def _delta(tap: int) -> int:
+    return -1 if tap % 4 == 3 else 1
+
+
+async def _customer(session_maker, telegram_id: int, dish_ids):
+    """Путь пользователя: регистрация, корзина, серия нажатий "+"/"-" """
+    async with session_maker() as session:
+        user = User(telegram_id=telegram_id, first_name=f"User {telegram_id}")
+        session.add(user)
+        await session.commit()
+
+    async with session_maker() as session:
+        cart = await CartService.get_or_create_cart(session, user.id)
+        items = [OrderItem(order_id=cart.id, dish_id=dish_id, quantity=1, price=100) for dish_id in dish_ids]
+        session.add_all(items)
+        await session.commit()
+
+    for tap in range(TAPS):
+        item = items[tap % len(items)]
+        async with session_maker() as session:
+            # Чтение перед записью, как в обработчике корзины
+            await CartService.get_cart_count(session, user.id)
+            await CartService.change_item_quantity(session, user.id, item.id, _delta(tap))
+            await session.commit()
+        await asyncio.sleep(0)
+
+    async with session_maker() as session:
+        user = await session.get(User, user.id)
+        user.last_name = "Готово"
+        await session.commit()
+    return user.id
+
+
+async def _check_concurrent_writes(users: int = USERS):
+    async with temp_database(
+        "stress.db", session_class=SerializedWriteSession, sqlite_profile=True
+    ) as (engine, session_maker):
+
+        async with session_maker() as session:
+            category = Category(name="Категория", is_active=True)
+            session.add(category)
+            await session.flush()
+            dishes = [Dish(name=f"Блюдо {i}", price=100, category_id=category.id) for i in range(3)]
+            session.add_all(dishes)
+            await session.commit()
+            journal_mode = (await session.execute(text("PRAGMA journal_mode"))).scalar()
+        assert journal_mode == "wal", journal_mode
+
+        started = time.perf_counter()
+        # Любая ошибка "database is locked" уронит gather
+        user_ids = await asyncio.gather(*(
+            _customer(session_maker, 10_000 + i, [dish.id for dish in dishes]) for i in range(users)
+        ))
+        elapsed = time.perf_counter() - started
+
+        expected_quantity = len(dishes) + sum(_delta(tap) for tap in range(TAPS))
+        async with session_maker() as session:
+            carts = (await session.execute(
+                select(Order.total_amount, func.sum(OrderItem.quantity))
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .where(Order.status == OrderStatus.CART.value)
+                .group_by(Order.id)
+            )).all()
+            finished = (await session.execute(
+                select(func.count()).select_from(User).where(User.last_name == "Готово")
+            )).scalar()
+
+        assert len(carts) == users and finished == users
+        assert all(
+            quantity == expected_quantity and total == expected_quantity * 100
+            for total, quantity in carts
+        ), carts[:3]
+        return len(user_ids) * (TAPS + 3) / elapsed
+
+
+async def _check_nested_writer():
+    async with temp_database(
+        "nested.db", session_class=SerializedWriteSession, sqlite_profile=True
+    ) as (engine, session_maker):
+
+        async def add_category(name: str):
+            async with session_maker() as session:
+                session.add(Category(name=name))
+                await session.commit()
+
+        async with session_maker() as outer:
+            outer.add(Category(name="Внешняя"))
+            await outer.flush()
+
+            # Та же задача: ошибка сразу, а не "database is locked" через busy_timeout
+            started = time.perf_counter()
+            try:
+                await add_category("Вложенная")
+            except NestedWriterError:
+                pass
+            else:
+                raise AssertionError("вложенная запись должна получить NestedWriterError")
+            assert time.perf_counter() - started < 1
+
+            # Другая задача просто ждет своей очереди
+            other = asyncio.create_task(add_category("Из другой задачи"))
+            await asyncio.sleep(0.05)
+            assert not other.done()
+            await outer.commit()
+        await other
+
+        async with session_maker() as session:
+            names = set(await session.scalars(select(Category.name)))
+        assert names == {"Внешняя", "Из другой задачи"}, names
+
+
+def test_concurrent_writes():
+    asyncio.run(_check_concurrent_writes())
+
+
+def test_nested_writer():
+    asyncio.run(_check_nested_writer())
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else USERS
+    rate = asyncio.run(_check_concurrent_writes(users))
+    test_nested_writer()
+    print(f"✅ {users} пользователей пишут одновременно без блокировок ({rate:.0f} транзакций/с)")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Тест очередей апдейтов по чатам: быстрые нажатия одного пользователя
+не создают вторую корзину и не теряют изменения, апдейты чата идут по
+порядку, переполненная очередь отбрасывает лишнее и отвечает на эти
+нажатия, а разные чаты обрабатываются параллельно - быстрее, чем под
+одной общей блокировкой.
+
+Запуск: python -m pytest test_update_lanes.py  или  python test_update_lanes.py
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+
+os.environ.setdefault("BOT_TOKEN", "0:test")
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.client.session.base import BaseSession
+from aiogram.filters import ExceptionTypeFilter
+from aiogram.types import CallbackQuery, Chat, Message, Update, User as TelegramUser
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Order, OrderStatus, User
+from app.database.sqlite import SerializedWriteSession
+from app.handlers.common import lane_overflow
+from app.middlewares.auth import AuthMiddleware
+from app.middlewares.db import DbSessionMiddleware
+from app.services.cart import CartService
+from app.services.update_lanes import LaneOverflowError, UpdateLanes
+from app.services.user_cache import user_cache
+from testing_utils import temp_database
+
+USERS = 30
+TAPS = 8
+BASE_ID = 5_100_000
+
+
+class FakeSession(BaseSession):
+    """Сессия без сети: вызовы API записываются, любой метод возвращает True"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests.append(method)
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+class GlobalLock(UpdateLanes):
+    """Одна очередь на всех - для сравнения"""
+
+    def lane_key(self, key):
+        return "all"
+
+
+def _update(update_id: int, chat_id: int, data: str) -> Update:
+    user = TelegramUser(id=chat_id, is_bot=False, first_name="Test")
+    message = Message(message_id=1, date=datetime.now(), text="...",
+                      chat=Chat(id=chat_id, type="private"), from_user=user)
+    return Update(update_id=update_id, callback_query=CallbackQuery(
+        id=str(update_id), chat_instance=str(chat_id), from_user=user, message=message, data=data
+    ))
+
+
+def _dispatcher(lanes: UpdateLanes, router: Router, session_maker=None) -> Dispatcher:
+    dp = Dispatcher(events_isolation=lanes)
+    if session_maker is not None:
+        dp.callback_query.middleware(DbSessionMiddleware(session_maker))
+        dp.callback_query.middleware(AuthMiddleware())
+    dp.errors.register(lane_overflow, ExceptionTypeFilter(LaneOverflowError))
+    dp.include_router(router)
+    return dp
+
+
+async def _check_no_duplicate_carts():
+    async with temp_database("lanes.db", session_class=SerializedWriteSession) as (engine, session_maker):
+
+        router = Router()
+
+        @router.callback_query(F.data == "tap")
+        async def tap(callback: CallbackQuery, user: User, session: AsyncSession):
+            # Как add_to_cart: найти или создать корзину и пересчитать сумму.
+            # Пауза между чтением и записью - ответ Telegram посреди обработки
+            cart = await CartService.get_or_create_cart(session, user.id)
+            total = cart.total_amount
+            await asyncio.sleep(0.002)
+            cart.total_amount = total + 1
+            await session.commit()
+
+        lanes = UpdateLanes(max_pending=TAPS)
+        dp = _dispatcher(lanes, router, session_maker)
+        bot = Bot(token="42:TEST")
+        update_ids = iter(range(1, 10_000))
+        try:
+            # Все нажатия всех пользователей приходят одновременно
+            await asyncio.gather(*(
+                dp.feed_update(bot, _update(next(update_ids), BASE_ID + i, "tap"))
+                for i in range(USERS) for _ in range(TAPS)
+            ))
+
+            async with session_maker() as session:
+                carts = (await session.execute(
+                    select(User.telegram_id, Order.total_amount)
+                    .join(Order, Order.user_id == User.id)
+                    .where(Order.status == OrderStatus.CART.value)
+                )).all()
+            assert len(carts) == USERS, f"корзин {len(carts)} на {USERS} пользователей"
+            assert all(total == TAPS for _, total in carts), carts
+
+            # Опустевшие очереди удалены, ничего не отброшено
+            assert lanes.active == 0 and lanes.dropped == 0
+        finally:
+            for i in range(USERS):
+                user_cache.invalidate(BASE_ID + i)
+            await bot.session.close()
+
+
+async def _check_order_and_overflow():
+    processed = []
+    release = asyncio.Event()
+    router = Router()
+
+    @router.callback_query(F.data.startswith("step_"))
+    async def step(callback: CallbackQuery):
+        number = int(callback.data[5:])
+        # Первые апдейты обрабатываются дольше - без очереди порядок бы сбился
+        await asyncio.sleep(0.001 * (10 - number))
+        processed.append((callback.message.chat.id, number))
+
+    @router.callback_query(F.data == "block")
+    async def block(callback: CallbackQuery):
+        await release.wait()
+        processed.append((callback.message.chat.id, "block"))
+
+    lanes = UpdateLanes(max_pending=3)
+    dp = _dispatcher(lanes, router)
+    api = FakeSession()
+    bot = Bot(token="42:TEST", session=api)
+    try:
+        # Апдейты каждого чата - в порядке поступления
+        await asyncio.gather(*(
+            dp.feed_update(bot, _update(chat * 100 + n, chat, f"step_{n}"))
+            for chat in (1, 2) for n in range(3)
+        ))
+        for chat in (1, 2):
+            assert [n for c, n in processed if c == chat] == [0, 1, 2], processed
+
+        # В очереди чата не больше max_pending апдейтов, остальные отбрасываются
+        processed.clear()
+        tasks = [asyncio.create_task(dp.feed_update(bot, _update(1000 + n, 3, "block"))) for n in range(5)]
+        await asyncio.sleep(0.01)
+        assert lanes.dropped == 2 and lanes.active == 1
+        # На отброшенные нажатия бот отвечает, чтобы кнопка не крутилась
+        assert [(type(m).__name__, m.callback_query_id) for m in api.requests] == [
+            ("AnswerCallbackQuery", "1003"), ("AnswerCallbackQuery", "1004")
+        ], api.requests
+        # Другой чат не ждет заблокированный
+        await dp.feed_update(bot, _update(2000, 4, "step_9"))
+        assert processed == [(4, 9)]
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert processed.count((3, "block")) == 3
+        assert lanes.active == 0
+    finally:
+        await bot.session.close()
+
+
+async def _io(callback: CallbackQuery):
+    await asyncio.sleep(0.02)  # запрос к Telegram API
+
+
+async def _check_throughput():
+    async def run(lanes: UpdateLanes) -> float:
+        router = Router()
+        router.callback_query.register(_io)
+        dp = _dispatcher(lanes, router)
+        bot = Bot(token="42:TEST")
+        updates = [_update(chat * 10 + n, chat, "io") for chat in range(20) for n in range(3)]
+        try:
+            started = time.perf_counter()
+            await asyncio.gather(*(dp.feed_update(bot, update) for update in updates))
+            return time.perf_counter() - started
+        finally:
+            await bot.session.close()
+
+    global_lock = await run(GlobalLock(max_pending=100))
+    per_chat = await run(UpdateLanes(max_pending=100))
+    # 60 апдейтов по 20 мс: под общей блокировкой ~1.2 с, по чатам ~0.06 с
+    assert per_chat * 5 < global_lock, (per_chat, global_lock)
+
+
+def test_no_duplicate_carts():
+    asyncio.run(_check_no_duplicate_carts())
+
+
+def test_order_and_overflow():
+    asyncio.run(_check_order_and_overflow())
+
+
+def test_throughput():
+    asyncio.run(_check_throughput())
+
+
+if __name__ == "__main__":
+    test_no_duplicate_carts()
+    test_order_and_overflow()
+    test_throughput()
+    print("✅ Апдейты одного чата идут по очереди, разных чатов - параллельно")
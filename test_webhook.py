@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Тест режима webhook: /health, проверка секрета, мягкая остановка
+дожидается начатых обработчиков и не принимает новые апдейты.
+
+Запуск: python -m pytest test_webhook.py  или  python test_webhook.py
+"""
+import asyncio
+import time
+
+import aiohttp
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp.test_utils import TestServer
+
+from app.webhook import WEBHOOK_HANDLER, create_app
+
+SECRET = "s3cret"
+
+
+def _update(update_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": text
+        }
+    }
+
+
+async def _check_webhook():
+    started = asyncio.Event()
+    handled = []
+    dp = Dispatcher()
+
+    @dp.message()
+    async def slow_handler(message: Message):
+        started.set()
+        await asyncio.sleep(0.3 if message.text == "slow" else 30)
+        handled.append(message.text)
+
+    app = create_app(dp, Bot(token="42:TEST"), path="/webhook", secret_token=SECRET, drain_timeout=1)
+    handler = app[WEBHOOK_HANDLER]
+    server = TestServer(app)
+    await server.start_server()
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+
+    try:
+        async with aiohttp.ClientSession() as client:
+            async with client.get(server.make_url("/health")) as response:
+                assert response.status == 200
+                assert (await response.json())["status"] == "ok"
+
+            async with client.post(server.make_url("/webhook"), json=_update(1, "slow")) as response:
+                assert response.status == 401
+
+            # Ответ приходит сразу, обработчик продолжает работу в фоне
+            async with client.post(server.make_url("/webhook"), json=_update(2, "slow"), headers=headers) as response:
+                assert response.status == 200
+            await started.wait()
+            async with client.get(server.make_url("/health")) as response:
+                assert (await response.json())["in_flight"] == 1
+
+            # Во время остановки новые апдейты отклоняются, начатые дорабатывают
+            drain = asyncio.create_task(handler.drain())
+            await asyncio.sleep(0)
+            async with client.post(server.make_url("/webhook"), json=_update(3, "late"), headers=headers) as response:
+                assert response.status == 503
+            async with client.get(server.make_url("/health")) as response:
+                assert response.status == 503
+                assert (await response.json())["status"] == "draining"
+            assert await drain == 0
+            assert handled == ["slow"]
+
+            # Зависший обработчик прерывается по drain_timeout
+            handler.draining = False
+            async with client.post(server.make_url("/webhook"), json=_update(4, "hang"), headers=headers) as response:
+                assert response.status == 200
+            await asyncio.sleep(0.05)
+            assert await handler.drain() == 1
+            assert handler.in_flight == 0
+    finally:
+        await server.close()
+
+
+def test_webhook():
+    asyncio.run(_check_webhook())
+
+
+if __name__ == "__main__":
+    test_webhook()
+    print("✅ Webhook отвечает на /health и мягко останавливается")
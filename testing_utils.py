@@ -0,0 +1,47 @@
+"""
+Общие утилиты тестов: временная база SQLite со схемой бота.
+
+Импортируйте этот модуль до модулей app - он задает BOT_TOKEN для
+настроек, если тест запущен без .env.
+"""
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, NamedTuple
+
+os.environ.setdefault("BOT_TOKEN", "0:test")
+
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+)
+
+from app.database import Base  # noqa: E402
+from app.database.database import create_database_engine  # noqa: E402
+
+
+class TempDatabase(NamedTuple):
+    engine: AsyncEngine
+    session_maker: async_sessionmaker
+
+
+@asynccontextmanager
+async def temp_database(
+    name: str = "test.db",
+    session_class=AsyncSession,
+    sqlite_profile: bool = False
+) -> AsyncIterator[TempDatabase]:
+    """Временная база с таблицами бота; движок закрывается, файл удаляется после блока.
+
+    session_class - класс сессий фабрики (SerializedWriteSession - с
+    очередью записи SQLite), sqlite_profile=True - движок с профилем
+    бота (WAL, busy_timeout, пул соединений).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, name)}"
+        engine = create_database_engine(url) if sqlite_profile else create_async_engine(url)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            yield TempDatabase(engine, async_sessionmaker(engine, class_=session_class, expire_on_commit=False))
+        finally:
+            await engine.dispose()